@@ -0,0 +1,85 @@
+import threading
+from collections import Counter
+
+import storage
+
+# --- Materialized counters ---
+# Per-collection counters grouped by status/assignment, updated by the
+# storage listener on every write. The header badge and the dashboards read
+# them in O(1) instead of walking the records on each rerun.
+
+# collection -> groupings to maintain
+COUNTERS = {
+    'missions': [('status',), ('assignment',), ('status', 'assignment')],
+    'problem_reports': [('status',)],
+    'submitted_reports': [('status',)],
+    'alerts': [('status',)],
+}
+
+
+class Aggregates:
+    collections = tuple(COUNTERS)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = Counter()
+        # (collection, fields) -> Counter(values -> n)
+        self._counts = {(name, fields): Counter() for name, groups in COUNTERS.items() for fields in groups}
+
+    def _apply(self, name, record, delta):
+        self._totals[name] += delta
+        for fields in COUNTERS[name]:
+            values = tuple(record.get(f) for f in fields)
+            counter = self._counts[(name, fields)]
+            counter[values] += delta
+            if counter[values] <= 0:
+                del counter[values]
+
+    # --- storage listener ---
+    def reset(self, name, records):
+        with self._lock:
+            self._totals[name] = 0
+            for fields in COUNTERS[name]:
+                self._counts[(name, fields)].clear()
+            for record in records:
+                self._apply(name, record, 1)
+
+    def change(self, name, old, new):
+        with self._lock:
+            if old is not None:
+                self._apply(name, old, -1)
+            if new is not None:
+                self._apply(name, new, 1)
+
+    def count(self, name, **where):
+        with self._lock:
+            if not where:
+                return self._totals[name]
+            fields = tuple(f for f in where)
+            for group in COUNTERS[name]:
+                if set(group) == set(fields):
+                    return self._counts[(name, group)][tuple(where[f] for f in group)]
+        raise KeyError(f'No counter for {name} by {fields}')
+
+
+_aggregates = None
+_aggregates_lock = threading.Lock()
+
+
+def get_aggregates():
+    global _aggregates
+    if _aggregates is None:
+        with _aggregates_lock:
+            if _aggregates is None:
+                aggregates = Aggregates()
+                storage.add_listener(aggregates)
+                _aggregates = aggregates
+    return _aggregates
+
+
+def count(name, **where):
+    """Number of records in a collection matching a maintained grouping."""
+    aggregates = get_aggregates()
+    # Pick up writes made by other processes
+    storage.refresh(name)
+    return aggregates.count(name, **where)
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import storage
+
+# --- Mission assignments ---
+# A new mission is announced to the ATSEPs with a 'new_mission' notification,
+# written in the same transaction as the mission. Answering it (accept or
+# reject) sets the mission's assignment and removes the notification in one
+# transaction that re-reads both, so of two ATSEPs answering at once only the
+# first is recorded; the second finds the notification gone. The pages and
+# the load test (benchmarks/load.py) both go through these functions.
+
+
+def create(mission):
+    """Insert a mission and its notification.
+
+    Raises sqlite3.IntegrityError if the reference is taken and ValueError
+    if it is missing, as storage.insert does.
+    """
+    with storage.atomic() as tx:
+        tx.insert('missions', mission)
+        tx.insert('atsep_notifications', {
+            'type': 'new_mission',
+            'mission_ref': mission['ref'],
+            'airport': mission['airport'],
+            'problem': mission['problem'],
+            'date': datetime.now().strftime('%Y-%m-%d')
+        })
+    return mission
+
+
+def answer(notification_id, assignment):
+    """Accept or reject the mission of a notification ('Accepted' or
+    'Rejected'). Returns False, and changes nothing but the notification,
+    when it was already answered or the mission was assigned meanwhile."""
+    with storage.atomic() as tx:
+        notif = tx.fetch('atsep_notifications', notification_id)
+        if notif is None:
+            return False
+        tx.delete('atsep_notifications', notification_id)
+        mission = tx.fetch('missions', notif['mission_ref'])
+        if mission is None or mission['assignment'] != 'New':
+            return False
+        tx.update('missions', mission['ref'], {'assignment': assignment})
+    return True
@@ -0,0 +1,350 @@
+import argparse
+import heapq
+import math
+import random
+import re
+import time
+from datetime import date, datetime, timedelta
+
+import blobstore
+import storage
+
+# --- Synthetic fleet ---
+# Deterministic data shaped like what the forms create, for sizing, load and
+# soak tests. 'size' is the number of missions, problem reports and
+# maintenance records; mission reports exist for every finished mission.
+# Everything else (airports, drones, crew, parts) scales with it.
+#
+#   python -m benchmarks.datasets --size 10000 --blob-size 256KiB
+#
+# loads into the store configured by GESTIONUNITE_DB / GESTIONUNITE_BLOBS.
+
+SYSTEMS = ['ILS', 'VOR', 'DME', 'NDB', 'Radar', 'ADS-B']
+# One group chief for every two pilots and two data analysts
+CREW_ROLES = ['Group Chief', 'Pilot', 'Pilot', 'Data Analyst', 'Data Analyst']
+FIRST_NAMES = ['ahmed', 'karim', 'yacine', 'sofiane', 'nadia', 'samir', 'lina', 'amine',
+               'meriem', 'walid', 'imane', 'reda', 'sara', 'jamal', 'salma', 'hassan']
+LAST_NAMES = ['benali', 'haddad', 'saidi', 'bouzid', 'mansouri', 'cherif', 'kaci', 'larbi']
+WORDS = ['signal', 'drift', 'alignment', 'glide', 'path', 'localizer', 'antenna', 'power',
+         'interference', 'calibration', 'bearing', 'deviation', 'monitor', 'alarm', 'flight', 'check']
+PARTS = ['Propeller', 'Battery', 'Motor', 'ESC', 'GPS module', 'Gimbal', 'Antenna', 'Landing gear',
+         'Camera', 'Flight controller', 'Charger', 'Telemetry radio']
+
+# Missions per weekday, Monday first: little flying on the Friday/Saturday weekend
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 0.3, 0.2, 1.0]
+# Seasonal activity by month: calibration campaigns peak in spring and autumn
+MONTH_WEIGHTS = [0.7, 0.8, 1.2, 1.3, 1.2, 0.9, 0.6, 0.5, 1.1, 1.3, 1.1, 0.7]
+
+
+def _text(rng, n):
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+
+def _stamp(day, rng):
+    return f"{day.strftime('%Y-%m-%d')} {rng.randrange(7, 19):02d}:{rng.randrange(60):02d}:00"
+
+
+def _zipf_weights(n, s=1.1):
+    # A few busy airports, a long tail of quiet ones
+    return [1 / (rank + 1) ** s for rank in range(n)]
+
+
+def _days(rng, n, first, last):
+    # n dates in [first, last], weighted by weekday and season, sorted
+    span = (last - first).days + 1
+    calendar = [first + timedelta(days=i) for i in range(span)]
+    weights = [WEEKDAY_WEIGHTS[d.weekday()] * MONTH_WEIGHTS[d.month - 1] for d in calendar]
+    return sorted(rng.choices(calendar, weights=weights, k=n))
+
+
+def _attachment(rng, name, size):
+    if not size:
+        return {'name': None, 'blob': None}
+    return {'name': name, 'blob': blobstore.put_bytes(rng.randbytes(size), name, 'application/pdf')}
+
+
+def airports(rng, size):
+    count = max(5, min(300, size // 50))
+    codes = set()
+    while len(codes) < count:
+        codes.add('DA' + ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(2)))
+    return sorted(codes)
+
+
+def drones(rng, size):
+    return [{
+        'drone_id': f'D{i + 1:03d}',
+        'model': rng.choice(['Flight inspection UAV', 'Quadcopter', 'Fixed wing']),
+        'home_base': 'Local Home',
+        'status': 'Active' if rng.random() < 0.95 else 'Retired',
+    } for i in range(max(3, min(500, size // 200)))]
+
+
+def crew(rng, size):
+    records = []
+    count = max(len(CREW_ROLES), min(1000, size // 20))
+    for i in range(count):
+        role = CREW_ROLES[i % len(CREW_ROLES)]
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        username = f'{first}{i + 1}'
+        records.append({
+            'name': f'{first} {last}',
+            'role': role,
+            'email': f'{username}@example.com',
+            # The first member of each role is always Active, so every role
+            # can be staffed however small the dataset
+            'status': 'Active' if rng.random() < 0.9 or i < len(CREW_ROLES) else 'Inactive',
+            'username': username,
+            'password': f'{username}123',
+        })
+    return records
+
+
+def missions(rng, size, airport_codes, people, drone_records, today):
+    by_role = {role: [p['username'] for p in people if p['role'] == role and p['status'] == 'Active']
+               for role in CREW_ROLES}
+    for role, usernames in by_role.items():
+        if not usernames:
+            raise ValueError(f'No active {role} in the crew to staff missions with')
+    airport_weights = _zipf_weights(len(airport_codes))
+    # About 40 missions a week, back from a few weeks ahead of today
+    history = max(30, math.ceil(size / 40 * 7))
+    starts = _days(rng, size, today - timedelta(days=history), today + timedelta(days=21))
+    # (free from, drone): missions come in start order, so the drone that
+    # frees up first is the one to book, and bookings never overlap
+    fleet = [(date.min, d['drone_id']) for d in drone_records if d['status'] == 'Active']
+    heapq.heapify(fleet)
+    records = []
+    for i, start in enumerate(starts):
+        duration = min(10, max(1, round(rng.lognormvariate(0.7, 0.5))))
+        finish = start + timedelta(days=duration)
+        drone_id = None
+        if fleet and fleet[0][0] <= start:
+            drone_id = heapq.heapreplace(fleet, (finish + timedelta(days=1), fleet[0][1]))[1]
+        if finish < today:
+            status, assignment = 'Done', 'Accepted'
+        elif start <= today:
+            status, assignment = 'En cours', 'Accepted'
+        else:
+            status = 'New'
+            assignment = 'Accepted' if rng.random() < 0.5 else 'New'
+        records.append({
+            'ref': f'M{i + 1:06d}',
+            'airport': rng.choices(airport_codes, weights=airport_weights)[0],
+            'date_start': start.strftime('%Y-%m-%d'),
+            'date_finish': finish.strftime('%Y-%m-%d'),
+            'duration': f'{duration}d',
+            'problem': f'{rng.choice(SYSTEMS)} {_text(rng, 4)}',
+            'status': status,
+            'assignment': assignment,
+            'groupchief': rng.choice(by_role['Group Chief']),
+            'pilote': rng.choice(by_role['Pilot']),
+            'data_analyst': rng.choice(by_role['Data Analyst']),
+            'drone_id': drone_id,
+        })
+    return records
+
+
+def atsep_notifications(mission_records):
+    return [
+        {'type': 'new_mission', 'mission_ref': m['ref'], 'airport': m['airport'], 'problem': m['problem']}
+        for m in mission_records if m['assignment'] == 'New'
+    ]
+
+
+def problem_reports(rng, size, airport_codes, today):
+    airport_weights = _zipf_weights(len(airport_codes))
+    history = max(30, math.ceil(size / 40 * 7))
+    records = []
+    for day in _days(rng, size, today - timedelta(days=history), today):
+        age = (today - day).days
+        # Older problems are more likely to be resolved
+        resolved = 1 - math.exp(-age / 14)
+        roll = rng.random()
+        status = 'Resolved' if roll < resolved else ('In Progress' if roll < resolved + 0.3 * (1 - resolved) else 'New')
+        rank = rng.choices(range(len(airport_codes)), weights=airport_weights)[0]
+        airport = airport_codes[rank]
+        records.append({
+            'airport': airport,
+            'system': rng.choice(SYSTEMS),
+            'priority': rng.choices(['Low', 'Medium', 'High'], weights=[5, 4, 1])[0],
+            # Client accounts are numbered by airport activity (airport1: busiest)
+            'reporter': f'airport{rank + 1}-CLIENT',
+            'contact': f'ops@{airport.lower()}.example.com',
+            'date': day.strftime('%Y-%m-%d'),
+            'description': _text(rng, 12),
+            'impact': _text(rng, 6),
+            'additional_info': '',
+            'status': status,
+            'timestamp': _stamp(day, rng),
+        })
+    return records
+
+
+def submitted_reports(rng, mission_records, today, blob_size=0):
+    records = []
+    for m in mission_records:
+        if m['status'] != 'Done':
+            continue
+        finish = datetime.strptime(m['date_finish'], '%Y-%m-%d').date()
+        # Reviews catch up within a couple of weeks
+        pending = (today - finish).days < rng.randint(1, 14)
+        records.append({
+            'ref': m['ref'],
+            'airport': m['airport'],
+            'date_start': m['date_start'],
+            'date_finish': m['date_finish'],
+            'status': 'Submitted' if pending else rng.choices(['Approved', 'Reviewed', 'Needs Revision'], weights=[8, 3, 1])[0],
+            'mission_status': 'Completed',
+            'pilote': m['pilote'],
+            'data_analyst': m['data_analyst'],
+            'findings': _text(rng, 15),
+            'actions': _text(rng, 8),
+            'recommendations': _text(rng, 8),
+            'flight_profile': _attachment(rng, f"{m['ref']}_profile.pdf", blob_size),
+            'report': _attachment(rng, f"{m['ref']}_report.pdf", blob_size),
+            'timestamp': _stamp(finish, rng),
+        })
+    return records
+
+
+def spare_parts(rng, size):
+    count = max(len(PARTS), min(2000, size // 50))
+    records = []
+    for i in range(count):
+        name = PARTS[i] if i < len(PARTS) else f'{rng.choice(PARTS)} rev {i // len(PARTS) + 1}'
+        minimum = rng.randint(2, 10)
+        records.append({
+            'part_id': f'P{i + 1:04d}',
+            'name': name,
+            'desc': _text(rng, 3),
+            'qty': rng.randint(0, minimum * 4),
+            'min': minimum,
+        })
+    return records
+
+
+def maintenance(rng, size, drone_records, part_records, people, today):
+    # Maintenance log entries and the parts consumed by repairs
+    techs = [p['username'] for p in people if p['status'] == 'Active']
+    drone_ids = [d['drone_id'] for d in drone_records]
+    history = max(30, math.ceil(size / 40 * 7))
+    entries, usage = [], []
+    for day in _days(rng, size, today - timedelta(days=history), today):
+        drone = rng.choice(drone_ids)
+        kind = rng.choices(['Routine', 'Inspection', 'Calibration', 'Repair'], weights=[5, 3, 2, 2])[0]
+        used = rng.choice(part_records) if kind == 'Repair' else None
+        tech = rng.choice(techs)
+        detailed = kind != 'Routine'
+        entries.append({
+            'equipment': drone,
+            'date': day.strftime('%Y-%m-%d'),
+            'type': kind,
+            'status': 'Completed' if (today - day).days > 2 else rng.choice(['Completed', 'In Progress']),
+            'technician': tech,
+            'description': _text(rng, 8),
+            'parts': used['name'] if used else '',
+            'findings': _text(rng, 6) if detailed else '',
+            'actions': _text(rng, 6) if detailed else '',
+            'next_date': (day + timedelta(days=rng.choice([30, 90, 180]))).strftime('%Y-%m-%d') if detailed else None,
+            'timestamp': _stamp(day, rng),
+        })
+        if used:
+            usage.append({
+                'part_id': used['part_id'],
+                'name': used['name'],
+                'qty_used': rng.randint(1, 3),
+                'date': _stamp(day, rng),
+                'user': tech,
+                'note': f'Repair on {drone}',
+            })
+    return entries, usage
+
+
+def parts_ledger(part_records, usage):
+    # Stock movements: an opening balance per part, then the usages, ending
+    # on each part's current quantity
+    used = {}
+    for u in sorted(usage, key=lambda u: u['date']):
+        used.setdefault(u['part_id'], []).append(u)
+    # Parts never used open with the oldest usage
+    first = min((u['date'] for u in usage), default='')
+    entries = []
+    for part in part_records:
+        moves = used.get(part['part_id'], [])
+        balance = part['qty'] + sum(u['qty_used'] for u in moves)
+        entries.append({
+            'op_id': f"opening-{part['part_id']}", 'part_id': part['part_id'], 'name': part['name'],
+            'kind': 'opening', 'qty': balance, 'balance': balance,
+            'date': moves[0]['date'] if moves else first, 'user': '', 'note': 'Opening stock',
+        })
+        for i, u in enumerate(moves):
+            balance -= u['qty_used']
+            entries.append({
+                'op_id': f"usage-{part['part_id']}-{i + 1}", 'part_id': part['part_id'], 'name': part['name'],
+                'kind': 'usage', 'qty': -u['qty_used'], 'balance': balance,
+                'date': u['date'], 'user': u['user'], 'note': u['note'],
+            })
+    return entries
+
+
+def generate(size, seed=0, blob_size=0, today=None):
+    """Records per collection for a fleet of the given size."""
+    rng = random.Random(seed)
+    today = today or date.today()
+    airport_codes = airports(rng, size)
+    drone_records = drones(rng, size)
+    people = crew(rng, size)
+    mission_records = missions(rng, size, airport_codes, people, drone_records, today)
+    part_records = spare_parts(rng, size)
+    maintenance_log, usage = maintenance(rng, size, drone_records, part_records, people, today)
+    return {
+        'drones': drone_records,
+        'users_list': people,
+        'missions': mission_records,
+        'atsep_notifications': atsep_notifications(mission_records),
+        'problem_reports': problem_reports(rng, size, airport_codes, today),
+        'submitted_reports': submitted_reports(rng, mission_records, today, blob_size),
+        'spare_parts': part_records,
+        'maintenance_log': maintenance_log,
+        'parts_ledger': parts_ledger(part_records, usage),
+    }
+
+
+def load(size, seed=0, blob_size=0):
+    """Bulk load a fleet into the configured store; returns record counts."""
+    storage.init()
+    counts = {}
+    for name, records in generate(size, seed, blob_size).items():
+        if name == 'drones':
+            # The seeded drones share their IDs with the generated ones
+            records = [r for r in records if storage.fetch('drones', r['drone_id']) is None]
+        counts[name] = len(storage.insert_many(name, records))
+    return counts
+
+
+def parse_size(text):
+    # '4096', '64KiB', '1.5MB'
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([km]?)i?b?\s*', text.lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f'invalid size: {text!r}')
+    number, unit = match.groups()
+    return int(float(number) * {'': 1, 'k': 1024, 'm': 1024 ** 2}[unit])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load a synthetic fleet into the configured store.')
+    parser.add_argument('--size', type=int, default=1000, help='missions, problem reports and maintenance records')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--blob-size', type=parse_size, default=0,
+                        help='bytes per mission report attachment, e.g. 256KiB (0: no attachments)')
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    counts = load(args.size, args.seed, args.blob_size)
+    for name, count in counts.items():
+        print(f'{name:<28}{count:>10}')
+    print(f'Loaded into {storage.DB_PATH} in {time.perf_counter() - start:.1f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# --- Load test ---
+# N simulated users, each in its own process (like separate server workers
+# sharing one database), loop over the Chief / ATSEP / Client flows for a
+# fixed duration. Flows go through the same storage calls and helpers the
+# pages use.
+# Reports throughput and per-flow latency, conflicts (another user got there
+# first) and errors.
+#
+#   python -m benchmarks.load --users 20 --duration 60 --size 5000
+#   python -m benchmarks.load --users 50 --mix chief=1,atsep=2,client=7 --think 200
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MIX = {'chief': 2, 'atsep': 3, 'client': 5}
+
+
+class Conflict(Exception):
+    """Another user changed the record first; expected under load."""
+
+
+class Idle(Exception):
+    """Nothing to do for this flow right now."""
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+# --- Client flows ---
+def client_report_problem(rng, user):
+    import storage
+    storage.insert('problem_reports', {
+        'airport': user['airport'],
+        'system': rng.choice(['ILS', 'VOR', 'DME', 'Radar']),
+        'priority': rng.choices(['Low', 'Medium', 'High'], weights=[5, 4, 1])[0],
+        'reporter': user['account'],
+        'contact': 'ops@example.com',
+        'date': datetime.now().strftime('%Y-%m-%d'),
+        'description': 'Signal drift reported by approach control',
+        'impact': 'Reduced availability',
+        'additional_info': '',
+        'status': 'New',
+        'timestamp': _now(),
+    })
+    storage.page('problem_reports', limit=10, reporter=user['account'])
+
+
+def client_browse_problems(rng, user):
+    import storage
+    records, cursor = storage.page('problem_reports', limit=10, reporter=user['account'])
+    if cursor is not None:
+        storage.page('problem_reports', limit=10, cursor=cursor, reporter=user['account'])
+
+
+# --- ATSEP flows ---
+def atsep_accept_mission(rng, user):
+    import assignments
+    import storage
+    notifications, _ = storage.page('atsep_notifications', limit=10, type='new_mission')
+    if not notifications:
+        raise Idle()
+    notif = rng.choice(notifications)
+    if not assignments.answer(notif['id'], 'Accepted'):
+        raise Conflict()
+
+
+def atsep_submit_report(rng, user):
+    import blobstore
+    import storage
+    open_missions = [m for m in storage.find('missions', assignment='Accepted') if m['status'] != 'Done']
+    if not open_missions:
+        raise Idle()
+    mission = rng.choice(open_missions)
+    attachments = {}
+    for field in ('flight_profile', 'report'):
+        name = f"{mission['ref']}_{field}.pdf"
+        blob = blobstore.put_bytes(rng.randbytes(user['blob_size']), name, 'application/pdf') if user['blob_size'] else None
+        attachments[field] = {'name': name if blob else None, 'blob': blob}
+    try:
+        storage.insert('submitted_reports', dict({
+            'ref': mission['ref'],
+            'airport': mission['airport'],
+            'date_start': mission['date_start'],
+            'date_finish': datetime.now().strftime('%Y-%m-%d'),
+            'status': 'Submitted',
+            'mission_status': 'Completed',
+            'pilote': mission.get('pilote', ''),
+            'data_analyst': mission.get('data_analyst', ''),
+            'findings': 'Within tolerance',
+            'actions': 'None',
+            'recommendations': 'None',
+            'timestamp': _now(),
+        }, **attachments))
+    except sqlite3.IntegrityError:
+        raise Conflict()
+    storage.update('missions', mission['ref'], {'status': 'Done'})
+
+
+def atsep_use_part(rng, user):
+    import stock
+    import storage
+    parts = [p for p in storage.fetch_all('spare_parts') if p['qty'] >= 1]
+    if not parts:
+        raise Idle()
+    part = rng.choice(parts)
+    try:
+        stock.use(part['part_id'], 1, user=user['account'], note='load test')
+    except stock.InsufficientStock:
+        raise Conflict()
+
+
+def atsep_log_maintenance(rng, user):
+    import maintenance
+    maintenance.log({
+        'equipment': rng.choice(['D001', 'D002', 'D003']),
+        'type': rng.choice(['Routine', 'Inspection', 'Repair']),
+        'description': 'Post-flight check',
+        'technician': user['account'],
+    })
+
+
+# --- Chief flows ---
+def chief_create_mission(rng, user):
+    import assignments
+    user['created'] += 1
+    ref = f"L{user['id']:03d}-{user['created']:06d}"
+    today = datetime.now().strftime('%Y-%m-%d')
+    assignments.create({
+        'ref': ref, 'airport': user['airport'], 'date_start': today, 'date_finish': today,
+        'duration': '1d', 'problem': 'ILS calibration', 'status': 'New', 'assignment': 'New',
+        'groupchief': 'houcine', 'pilote': 'jamal', 'data_analyst': 'sara',
+    })
+
+
+def chief_review_report(rng, user):
+    import storage
+    pending, _ = storage.page('submitted_reports', limit=10, descending=False, status='Submitted')
+    if not pending:
+        raise Idle()
+    report = rng.choice(pending)
+    try:
+        storage.update('submitted_reports', report['ref'], {'status': 'Approved'})
+    except KeyError:
+        raise Conflict()
+
+
+def chief_triage_problem(rng, user):
+    import storage
+    new, _ = storage.page('problem_reports', limit=10, status='New')
+    if not new:
+        raise Idle()
+    problem = rng.choice(new)
+    storage.update('problem_reports', problem['id'], {'status': 'In Progress', 'last_updated': _now()})
+
+
+def chief_dashboard(rng, user):
+    import aggregates
+    from search import search
+    aggregates.count('missions', status='En cours')
+    aggregates.count('missions', assignment='New')
+    aggregates.count('problem_reports', status='New')
+    aggregates.count('submitted_reports', status='Submitted')
+    search(user['airport'], limit=10)
+
+
+# role -> [(weight, flow)]
+FLOWS = {
+    'client': [(3, client_browse_problems), (1, client_report_problem)],
+    'atsep': [(2, atsep_accept_mission), (2, atsep_submit_report), (1, atsep_use_part), (1, atsep_log_maintenance)],
+    'chief': [(3, chief_dashboard), (2, chief_review_report), (2, chief_triage_problem), (1, chief_create_mission)],
+}
+
+
+def run_user(user):
+    # Worker process: the store location comes from the parent's environment
+    sys.path.insert(0, ROOT)
+    import storage
+    storage.init()
+    storage.refresh(*storage.COLLECTIONS)
+    rng = random.Random(user['id'])
+    weights, flows = zip(*FLOWS[user['role']])
+    stats = {}
+    time.sleep(max(0, user['start_at'] - time.time()))
+    while time.time() < user['end_at']:
+        flow = rng.choices(flows, weights=weights)[0]
+        entry = stats.setdefault(flow.__name__, {'latencies': [], 'conflict': 0, 'idle': 0, 'error': 0, 'errors': []})
+        start = time.perf_counter()
+        try:
+            flow(rng, user)
+        except Idle:
+            entry['idle'] += 1
+        except Conflict:
+            entry['conflict'] += 1
+        except Exception as e:
+            entry['error'] += 1
+            if len(entry['errors']) < 3:
+                entry['errors'].append(f'{type(e).__name__}: {e}')
+        else:
+            entry['latencies'].append((time.perf_counter() - start) * 1000)
+        if user['think']:
+            time.sleep(rng.expovariate(1000 / user['think']))
+    return stats
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        role, _, weight = part.partition('=')
+        if role.strip() not in FLOWS:
+            raise argparse.ArgumentTypeError(f'unknown role {role!r}; expected {", ".join(FLOWS)}')
+        mix[role.strip()] = int(weight or 1)
+    return mix
+
+
+def assign_roles(users, mix):
+    # Spread roles over users in proportion to the mix
+    roles = []
+    total = sum(mix.values())
+    for i in range(users):
+        slot = i % total
+        for role, weight in mix.items():
+            if slot < weight:
+                roles.append(role)
+                break
+            slot -= weight
+    return roles
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def report(results, duration):
+    merged = {}
+    for stats in results:
+        for flow, entry in stats.items():
+            total = merged.setdefault(flow, {'latencies': [], 'conflict': 0, 'idle': 0, 'error': 0, 'errors': []})
+            total['latencies'] += entry['latencies']
+            for k in ('conflict', 'idle', 'error'):
+                total[k] += entry[k]
+            total['errors'] += entry['errors'][:3 - len(total['errors'])]
+    print(f"\n{'flow':<26}{'ok':>8}{'ops/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'conflict':>10}{'idle':>7}{'error':>7}")
+    completed = 0
+    for flow in sorted(merged):
+        m = merged[flow]
+        n = len(m['latencies'])
+        completed += n
+        p50 = statistics.median(m['latencies']) if n else 0
+        p95 = percentile(m['latencies'], 0.95) if n else 0
+        print(f"{flow:<26}{n:>8}{n / duration:>9.1f}{p50:>9.1f}{p95:>9.1f}{m['conflict']:>10}{m['idle']:>7}{m['error']:>7}")
+    print(f'\nThroughput: {completed / duration:.1f} completed flows/s over {duration:.0f} s')
+    for flow in sorted(merged):
+        for message in merged[flow]['errors']:
+            print(f'  {flow}: {message}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Drive concurrent simulated users against a generated store.')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=30, help='seconds of load')
+    parser.add_argument('--size', type=int, default=1000, help='fleet size loaded before the run')
+    parser.add_argument('--blob-size', default='0', help='bytes per uploaded report attachment, e.g. 64KiB')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='role weights, e.g. chief=2,atsep=3,client=5')
+    parser.add_argument('--think', type=float, default=0, help='mean think time between flows, in ms')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='gestionunite-load-') as scratch:
+        # Set before storage is imported, here and in the worker processes
+        os.environ['GESTIONUNITE_DB'] = os.path.join(scratch, 'load.db')
+        os.environ['GESTIONUNITE_BLOBS'] = os.path.join(scratch, 'blobs')
+        sys.path.insert(0, ROOT)
+        from benchmarks import datasets
+        blob_size = datasets.parse_size(args.blob_size)
+        start = time.perf_counter()
+        datasets.load(args.size, blob_size=blob_size)
+        print(f'Loaded a fleet of {args.size} in {time.perf_counter() - start:.1f} s')
+
+        roles = assign_roles(args.users, args.mix)
+        # Leave time for every worker to start and warm its caches
+        start_at = time.time() + 2 + 0.1 * args.users
+        users = [{
+            'id': i, 'role': role, 'account': f'airport{i % 10 + 1}-CLIENT' if role == 'client' else f'user{i}',
+            'airport': f'DA{chr(65 + i % 26)}{chr(65 + i // 26 % 26)}', 'created': 0,
+            'blob_size': blob_size, 'think': args.think,
+            'start_at': start_at, 'end_at': start_at + args.duration,
+        } for i, role in enumerate(roles)]
+        print(f"{args.users} users ({', '.join(f'{roles.count(r)} {r}' for r in args.mix)}) for {args.duration:.0f} s")
+        with multiprocessing.get_context('spawn').Pool(args.users) as pool:
+            results = pool.map(run_user, users)
+        report(results, args.duration)
+
+
+if __name__ == '__main__':
+    main()
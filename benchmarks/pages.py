@@ -0,0 +1,318 @@
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# --- Page benchmarks ---
+# Drives the app headlessly with Streamlit's AppTest: logs in through the
+# login form as each role, opens every page registered in app.PAGES and
+# times script reruns against generated datasets, first in each page's
+# default state and then through the interactions in SCENARIOS (a filter, the
+# next page, a form), each recorded under its own key. Each dataset size runs
+# in its own process so stores, caches and memory figures do not mix.
+#
+#   python -m benchmarks.pages                      # 100 / 10k / 100k
+#   python -m benchmarks.pages --sizes 100 10000 --runs 20
+#   python -m benchmarks.pages --save               # record new baselines
+#   python -m benchmarks.pages --compare            # exit 1 on regressions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, 'app.py')
+BASELINES = os.path.join(ROOT, 'benchmarks', 'baselines.json')
+DEFAULT_SIZES = [100, 10000, 100000]
+
+# Demo accounts accepted by login_form()
+ACCOUNTS = {
+    'Chief of Unit': ('chief', 'chief123'),
+    'ATSEP': ('houcine', 'atsep123'),
+    'Client': ('airport1', 'client123'),
+}
+
+# A page regresses when both limits are exceeded
+TIME_TOLERANCE = 0.25      # relative, on p95
+TIME_FLOOR_MS = 5.0        # absolute, ignores noise on fast pages
+MEMORY_TOLERANCE = 0.25    # relative, on peak memory
+
+
+# --- Interaction scenarios ---
+# page path -> {scenario: step}. step(at, i) changes widgets before the i-th
+# timed run; the run that processes the change is what is timed. Steps
+# alternate between two states so every run is a change.
+def _widget(at, kind, label=None, key=None):
+    for widget in getattr(at, kind):
+        if (key is None or widget.key == key) and (label is None or widget.label == label):
+            return widget
+    raise RuntimeError(f'No {kind} {key or label!r} on the page')
+
+
+def set_filter(kind, values, label=None, key=None):
+    def step(at, i):
+        _widget(at, kind, label, key).set_value(values[i % len(values)])
+    return step
+
+
+def turn_page(state_key):
+    # Next page, then back to the first one
+    def step(at, i):
+        _widget(at, 'button', key=f"{state_key}_{'next' if i % 2 == 0 else 'prev'}").click()
+    return step
+
+
+def submit_form(button, fields):
+    # fields: (kind, label, value); the form is submitted on every run
+    def step(at, i):
+        for kind, label, value in fields:
+            _widget(at, kind, label).set_value(value)
+        _widget(at, 'button', button).click()
+    return step
+
+
+SCENARIOS = {
+    'views/chief_dashboard.py': {
+        'filter by airport': set_filter('text_input', ['a', ''], label='🔍 Filter by Airport'),
+        'next page': turn_page('dashboard_missions_page'),
+    },
+    'views/chief_mission_management.py': {
+        'filter by airport': set_filter('text_input', ['a', ''], key='missions_airport_filter'),
+        'next page': turn_page('missions_editor_page'),
+    },
+    'views/chief_drone_equipment.py': {
+        'spare parts section': set_filter('radio', ['Spare Parts Management', 'Maintenance History'], label='Section'),
+        'next page': turn_page('chief_maintenance_page'),
+    },
+    'views/chief_portal_problems.py': {
+        'filter by airport': set_filter('text_input', ['a', ''], label='Filter by Airport'),
+        'next page': turn_page('portal_problems_page'),
+    },
+    'views/chief_downloads.py': {
+        'search': set_filter('text_input', ['M00', ''], key='global_search'),
+    },
+    'views/chief_completed_reports.py': {
+        'next page': turn_page('reviewed_reports_page'),
+    },
+    'views/chief_users_management.py': {
+        'filter users': set_filter('text_input', ['a', ''], key='user_search'),
+    },
+    'views/atsep_dashboard.py': {
+        'next page': turn_page('atsep_missions_page'),
+    },
+    'views/atsep_drone_maintenance.py': {
+        'add record': submit_form('Add Record', [('text_input', 'Equipment', 'D001'),
+                                                 ('text_area', 'Description of Work', 'Benchmark check')]),
+        'next page': turn_page('atsep_maintenance_page'),
+    },
+    'views/atsep_mission_reports.py': {
+        'next page': turn_page('atsep_reports_page'),
+    },
+    'views/client_home.py': {
+        'next page': turn_page('client_home_page'),
+    },
+    'views/client_report_problem.py': {
+        'submit report': submit_form('Submit Report', [('text_input', 'Airport', 'Benchmark'),
+                                                       ('text_input', 'System/Equipment Affected', 'ILS'),
+                                                       ('text_area', 'Problem Description', 'Benchmark report')]),
+        'next page': turn_page('client_problems_page'),
+    },
+}
+
+
+def registered_pages():
+    # Read PAGES from app.py without executing it
+    tree = ast.parse(open(APP, encoding='utf-8').read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], 'id', None) == 'PAGES':
+            return ast.literal_eval(node.value)
+    raise RuntimeError('PAGES registry not found in app.py')
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def login(role, timeout):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    at.run()
+    username, password = ACCOUNTS[role]
+    at.selectbox(key='login_role').select(role)
+    at.text_input(key='login_username').input(username)
+    at.text_input(key='login_password').input(password)
+    at.button[0].click().run()
+    if 'authenticated' not in at.session_state or not at.session_state['authenticated']:
+        raise RuntimeError(f'Login failed for {role}')
+    return at
+
+
+def measure_page(at, path, runs, step=None):
+    # Plain reruns, or with step the reruns that follow each interaction
+    at.switch_page(path)
+    start = time.perf_counter()
+    at.run()
+    cold = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise RuntimeError(f'{path}: {at.exception[0].message}')
+    times = []
+    for i in range(runs + 1):
+        if step:
+            step(at, i)
+        if i == runs:
+            # Memory is traced on a separate run so tracing does not skew timings
+            tracemalloc.start()
+            at.run()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            start = time.perf_counter()
+            at.run()
+            times.append((time.perf_counter() - start) * 1000)
+        if at.exception:
+            raise RuntimeError(f'{path}: {at.exception[0].message}')
+    return {
+        'first_ms': round(cold, 2),
+        'p50_ms': round(statistics.median(times), 2),
+        'p95_ms': round(percentile(times, 0.95), 2),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run_size(size, runs, timeout):
+    # Worker: the store was pointed at a scratch directory by the parent
+    sys.path.insert(0, ROOT)
+    from benchmarks import datasets
+    start = time.perf_counter()
+    datasets.load(size)
+    load_s = time.perf_counter() - start
+    results = {}
+    for role, pages in registered_pages().items():
+        at = login(role, timeout)
+        for path, title in pages:
+            # The default state first, then each scenario in a fresh session
+            # so it starts from the default state too
+            cases = [(f'{role} / {title}', None)]
+            cases += [(f'{role} / {title} / {name}', step) for name, step in SCENARIOS.get(path, {}).items()]
+            for n, (page, step) in enumerate(cases):
+                if n:
+                    at = login(role, timeout)
+                try:
+                    results[page] = measure_page(at, path, runs, step)
+                except RuntimeError as e:
+                    # Timeouts and page errors are results too; start a fresh
+                    # session for the next page
+                    results[page] = {'error': str(e).splitlines()[0]}
+                    at = login(role, timeout)
+                print(f'  {size:>7} {page}: {results[page]}', file=sys.stderr, flush=True)
+    return {'load_s': round(load_s, 2), 'pages': results}
+
+
+def spawn(size, runs, timeout):
+    with tempfile.TemporaryDirectory(prefix='gestionunite-bench-') as scratch:
+        env = dict(os.environ,
+                   GESTIONUNITE_DB=os.path.join(scratch, 'bench.db'),
+                   GESTIONUNITE_BLOBS=os.path.join(scratch, 'blobs'))
+        # Progress goes to stderr, the result as one JSON line to stdout
+        out = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.pages', '--worker', str(size),
+             '--runs', str(runs), '--timeout', str(timeout)],
+            cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True
+        )
+    if out.returncode != 0:
+        raise RuntimeError(f'size {size} failed')
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baselines):
+    regressions = []
+    for size, result in results.items():
+        base = baselines.get(size, {}).get('pages', {})
+        for page, now in result['pages'].items():
+            old = base.get(page)
+            if old is None:
+                continue
+            # An error on either side leaves nothing to compare against
+            if 'error' in old:
+                regressions.append(f"{size:>7} {page}: baseline is an error ({old['error']}); record it again")
+                continue
+            if 'error' in now:
+                regressions.append(f"{size:>7} {page}: {now['error']}")
+                continue
+            if (now['p95_ms'] > old['p95_ms'] * (1 + TIME_TOLERANCE)
+                    and now['p95_ms'] - old['p95_ms'] > TIME_FLOOR_MS):
+                regressions.append(f"{size:>7} {page}: p95 {old['p95_ms']} -> {now['p95_ms']} ms")
+            if now['peak_kb'] > old['peak_kb'] * (1 + MEMORY_TOLERANCE):
+                regressions.append(f"{size:>7} {page}: peak {old['peak_kb']} -> {now['peak_kb']} KiB")
+    return regressions
+
+
+def print_table(size, result):
+    print(f"\n== {size} records per collection (loaded in {result['load_s']} s)")
+    print(f"{'page':<64}{'first':>10}{'p50':>10}{'p95':>10}{'peak KiB':>12}")
+    for page, m in result['pages'].items():
+        if 'error' in m:
+            print(f"{page:<64}  {m['error']}")
+            continue
+        print(f"{page:<64}{m['first_ms']:>10.1f}{m['p50_ms']:>10.1f}{m['p95_ms']:>10.1f}{m['peak_kb']:>12.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark page reruns on synthetic datasets.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--runs', type=int, default=10, help='timed reruns per page')
+    parser.add_argument('--timeout', type=float, default=120, help='seconds allowed per script run')
+    parser.add_argument('--save', action='store_true', help=f'write results to {os.path.relpath(BASELINES, ROOT)}')
+    parser.add_argument('--compare', action='store_true', help='compare with the stored baselines')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        print(json.dumps(run_size(args.worker, args.runs, args.timeout)))
+        return 0
+
+    results = {}
+    for size in args.sizes:
+        results[str(size)] = spawn(size, args.runs, args.timeout)
+        print_table(size, results[str(size)])
+
+    status = 0
+    if args.compare:
+        if not os.path.exists(BASELINES):
+            print('\nNo baselines stored yet; run with --save first.')
+        else:
+            with open(BASELINES, encoding='utf-8') as f:
+                regressions = compare(results, json.load(f))
+            if regressions:
+                print('\nRegressions:')
+                for line in regressions:
+                    print('  ' + line)
+                status = 1
+            else:
+                print('\nNo regressions against the stored baselines.')
+    failed = [f'{size:>7} {page}: {m["error"]}' for size, result in results.items()
+              for page, m in result['pages'].items() if 'error' in m]
+    if args.save and failed:
+        # A baseline that is an error would fail every later comparison
+        print('\nNot saving baselines; these pages failed:')
+        for line in failed:
+            print('  ' + line)
+        status = 1
+    elif args.save:
+        baselines = {}
+        if os.path.exists(BASELINES):
+            with open(BASELINES, encoding='utf-8') as f:
+                baselines = json.load(f)
+        baselines.update(results)
+        with open(BASELINES, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'\nBaselines saved to {os.path.relpath(BASELINES, ROOT)}')
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import tempfile
+
+# --- Blob store ---
+# Uploaded files are written once to disk under their SHA-256 and records
+# only keep a small handle: {'sha256', 'name', 'size', 'type'}. Identical
+# files share one blob, and nothing but the handle lives in session state.
+
+BLOB_DIR = os.environ.get(
+    'GESTIONUNITE_BLOBS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'blobs')
+)
+CHUNK_SIZE = 1024 * 1024
+
+
+def path(handle_or_digest):
+    digest = handle_or_digest['sha256'] if isinstance(handle_or_digest, dict) else handle_or_digest
+    return os.path.join(BLOB_DIR, digest[:2], digest)
+
+
+def exists(handle):
+    return bool(handle) and os.path.exists(path(handle))
+
+
+def _handle(digest, name, size, mime):
+    return {'sha256': digest, 'name': name, 'size': size, 'type': mime}
+
+
+def put(fileobj, name, mime=None):
+    """Stream a file-like object to the store and return its handle."""
+    tmp_dir = os.path.join(BLOB_DIR, 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    if hasattr(fileobj, 'seek'):
+        fileobj.seek(0)
+    sha = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = fileobj.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        digest = sha.hexdigest()
+        final = path(digest)
+        if os.path.exists(final):
+            # Same content already stored
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(final), exist_ok=True)
+            os.replace(tmp_path, final)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return _handle(digest, name, size, mime)
+
+
+def put_upload(uploaded_file):
+    """Store a Streamlit UploadedFile; None in, None out."""
+    if uploaded_file is None:
+        return None
+    return put(uploaded_file, uploaded_file.name, getattr(uploaded_file, 'type', None))
+
+
+def digest(file_path):
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def put_path(file_path, name, mime=None, sha256=None):
+    """Move a file on the same filesystem into the store (no copy) and
+    return its handle."""
+    sha256 = sha256 or digest(file_path)
+    size = os.path.getsize(file_path)
+    final = path(sha256)
+    if os.path.exists(final):
+        os.remove(file_path)
+    else:
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(file_path, final)
+    return _handle(sha256, name, size, mime)
+
+
+def put_bytes(data, name, mime=None):
+    digest = hashlib.sha256(data).hexdigest()
+    final = path(digest)
+    if not os.path.exists(final):
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(final))
+        with os.fdopen(fd, 'wb') as out:
+            out.write(data)
+        os.replace(tmp_path, final)
+    return _handle(digest, name, len(data), mime)
+
+
+def open_blob(handle):
+    return open(path(handle), 'rb')
+
+
+def stream(handle, start=0, end=None):
+    """Bytes start..end (end excluded, None for the end of the blob) of a
+    blob, read CHUNK_SIZE at a time. Every download goes through here."""
+    with open_blob(handle) as f:
+        if end is None:
+            end = os.fstat(f.fileno()).st_size
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def read(handle, start=0, end=None):
+    return b''.join(stream(handle, start, end))
@@ -0,0 +1,204 @@
+import bisect
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import storage
+
+# --- Certificate expiry ---
+# Calibration certificates are linked to the drone they cover ('drone_id').
+# A storage listener keeps them sorted by expiry date, so "what expires in
+# the next N days" is two binary searches plus the k results, and counting
+# them is just the binary searches.
+#
+# A background thread (one per process) looks at that window periodically and
+# records an alert per certificate when it comes within ALERT_DAYS of its
+# expiry. Alert ids are derived from the certificate and threshold, so
+# several processes or repeated runs record each alert once.
+
+ALERT_DAYS = (30, 7, 0)   # alert this many days before expiry; 0: expired
+CHECK_INTERVAL = 3600     # seconds between alert runs
+
+log = logging.getLogger(__name__)
+
+
+def _iso(day):
+    return day if isinstance(day, str) else day.strftime('%Y-%m-%d')
+
+
+class CertificateIndex:
+    collections = ('certs',)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._certs = {}   # id -> record
+        self._order = []   # sorted (exp, id) of certificates with an expiry date
+
+    @staticmethod
+    def _entry(cert):
+        exp = str(cert.get('exp') or '')[:10]
+        return (exp, cert['id']) if exp else None
+
+    # --- storage listener ---
+    def reset(self, name, records):
+        with self._lock:
+            self._certs = {r['id']: r for r in records}
+            self._order = sorted(e for e in map(self._entry, records) if e is not None)
+
+    def change(self, name, old, new):
+        with self._lock:
+            if old is not None:
+                self._certs.pop(old['id'], None)
+                entry = self._entry(old)
+                if entry is not None:
+                    i = bisect.bisect_left(self._order, entry)
+                    if i < len(self._order) and self._order[i] == entry:
+                        del self._order[i]
+            if new is not None:
+                self._certs[new['id']] = new
+                entry = self._entry(new)
+                if entry is not None:
+                    bisect.insort(self._order, entry)
+
+    # --- queries ---
+    def _bounds(self, start, finish):
+        # Entries with start <= exp <= finish ('' and '~' sort before/after any date)
+        lo = bisect.bisect_left(self._order, (start or '',))
+        hi = bisect.bisect_left(self._order, ((finish or '~') + '\0',))
+        return lo, hi
+
+    def expiring(self, start, finish):
+        """Certificates expiring between start and finish (ISO dates), soonest first."""
+        with self._lock:
+            lo, hi = self._bounds(start, finish)
+            return [dict(self._certs[cert_id]) for _, cert_id in self._order[lo:hi]]
+
+    def count(self, start, finish):
+        with self._lock:
+            lo, hi = self._bounds(start, finish)
+            return hi - lo
+
+    def by_expiry(self):
+        """All certificates, soonest expiry first, then those without a date."""
+        with self._lock:
+            dated = [dict(self._certs[cert_id]) for _, cert_id in self._order]
+            undated = [dict(c) for c in self._certs.values() if self._entry(c) is None]
+            return dated + undated
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = CertificateIndex()
+                storage.add_listener(index)
+                _index = index
+    return _index
+
+
+def _current():
+    index = get_index()
+    # Pick up writes made by other processes
+    storage.refresh(*CertificateIndex.collections)
+    return index
+
+
+def days_left(cert, today=None):
+    exp = str(cert.get('exp') or '')[:10]
+    if not exp:
+        return None
+    try:
+        return (date.fromisoformat(exp) - (today or date.today())).days
+    except ValueError:
+        return None
+
+
+def status(cert, today=None):
+    left = days_left(cert, today)
+    if left is None:
+        return 'No expiry'
+    if left < 0:
+        return 'Expired'
+    if left <= ALERT_DAYS[0]:
+        return 'Expiring'
+    return 'Valid'
+
+
+def expiring(days=ALERT_DAYS[0], today=None, expired_since=None):
+    """Certificates expiring within 'days', soonest first; with expired_since
+    (days), also those that expired that recently."""
+    today = today or date.today()
+    start = today - timedelta(days=expired_since) if expired_since is not None else today
+    return _current().expiring(_iso(start), _iso(today + timedelta(days=days)))
+
+
+def count_expiring(days=ALERT_DAYS[0], today=None):
+    today = today or date.today()
+    return _current().count(_iso(today), _iso(today + timedelta(days=days)))
+
+
+def by_expiry():
+    return _current().by_expiry()
+
+
+# --- Alerts ---
+def check_alerts(today=None):
+    """Record alerts for certificates that crossed an ALERT_DAYS threshold; returns the new ones."""
+    today = today or date.today()
+    created = []
+    # Only the window around today is looked at: soon to expire, or expired
+    # since the previous threshold could have fired
+    for cert in expiring(max(ALERT_DAYS), today, expired_since=max(ALERT_DAYS)):
+        left = days_left(cert, today)
+        threshold = min(t for t in ALERT_DAYS if left <= t) if left > 0 else 0
+        alert_id = f"cert-{cert['id']}-{threshold}"
+        if storage.fetch('alerts', alert_id) is not None:
+            continue
+        drone = f" (drone {cert['drone_id']})" if cert.get('drone_id') else ''
+        when = 'has expired' if left < 0 else 'expires today' if left == 0 else f'expires in {left} day(s)'
+        try:
+            created.append(storage.insert('alerts', {
+                'id': alert_id,
+                'kind': 'cert_expiry',
+                'status': 'Open',
+                'cert_id': cert['id'],
+                'drone_id': cert.get('drone_id'),
+                'message': f"Certificate {cert['name']}{drone} {when} ({cert['exp']})",
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            }))
+        except sqlite3.IntegrityError:
+            # Another process recorded it first
+            pass
+    return created
+
+
+_job = None
+_job_lock = threading.Lock()
+
+
+def _run_alerts(interval):
+    while True:
+        try:
+            check_alerts()
+        except Exception:
+            log.exception('Certificate alert run failed')
+        time.sleep(interval)
+
+
+def start_alert_job(interval=CHECK_INTERVAL):
+    """Check for expiring certificates now and every 'interval' seconds, in a
+    daemon thread started once per process."""
+    global _job
+    if _job is None:
+        with _job_lock:
+            if _job is None:
+                _job = threading.Thread(target=_run_alerts, args=(interval,), name='certificate-alerts', daemon=True)
+                _job.start()
+    return _job
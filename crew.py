@@ -0,0 +1,96 @@
+from datetime import date, timedelta
+
+import schedule
+import storage
+from matching import FORBIDDEN, min_cost_matching
+
+# --- Crew recommendation ---
+# Picks a group chief, pilot and data analyst for missions from the Active
+# users of each role. A person is a candidate only if their calendar (the
+# schedule index) is free over the mission's dates; among candidates the
+# least loaded win, load being the days already booked around the batch.
+# Each role is a min-cost matching of missions to people, solved in rounds
+# (one mission per person per round) so a person can take several missions
+# of a batch as long as their dates don't overlap.
+
+WORKLOAD_DAYS = 30  # days either side of the batch counted as workload
+
+
+def _days(start, finish):
+    return (date.fromisoformat(finish) - date.fromisoformat(start)).days + 1
+
+
+def _overlaps(spans, start, finish):
+    return any(s <= finish and start <= f for s, f in spans)
+
+
+def _crew(role):
+    return [u['username'] for u in storage.find('users_list', role=role, status='Active') if u.get('username')]
+
+
+def recommend(missions, roles=None):
+    """[{field: username}] per mission: crew for the fields each mission leaves empty.
+
+    Fields nobody is free for are left out.
+    """
+    calendar = schedule.get_schedule()
+    storage.refresh('missions', 'users_list')
+    spans = [schedule.mission_span(m) for m in missions]
+    dated = [s for s in spans if s is not None]
+    suggestions = [{} for _ in missions]
+    if not dated:
+        return suggestions
+    window_start = (date.fromisoformat(min(s[0] for s in dated)) - timedelta(days=WORKLOAD_DAYS)).isoformat()
+    window_finish = (date.fromisoformat(max(s[1] for s in dated)) + timedelta(days=WORKLOAD_DAYS)).isoformat()
+    refs = {m.get('ref') for m in missions}
+
+    for field, role in schedule.CREW_FIELDS.items():
+        if roles is not None and field not in roles:
+            continue
+        todo = [i for i, m in enumerate(missions) if spans[i] is not None and not str(m.get(field) or '').strip()]
+        people = _crew(role)
+        if not todo or not people:
+            continue
+        # Each person's bookings around the batch, minus the missions being crewed
+        booked = {}
+        load = {}
+        for person in people:
+            spans_booked = [(s, f) for s, f, ref in calendar.bookings(('person', person.lower()), window_start, window_finish)
+                            if ref not in refs]
+            booked[person] = spans_booked
+            load[person] = sum(_days(max(s, window_start), min(f, window_finish)) for s, f in spans_booked)
+        # Earliest missions first when there are more missions than people
+        todo.sort(key=lambda i: spans[i])
+        while todo:
+            cost = [[FORBIDDEN if _overlaps(booked[person], *spans[i]) else load[person] + rank * 1e-6
+                     for person in people] for rank, i in enumerate(todo)]
+            pairs = min_cost_matching(cost)
+            if not pairs:
+                break
+            for row, col in pairs:
+                i, person = todo[row], people[col]
+                suggestions[i][field] = person
+                booked[person].append(spans[i])
+                load[person] += _days(*spans[i])
+            matched = {row for row, _ in pairs}
+            todo = [i for row, i in enumerate(todo) if row not in matched]
+    return suggestions
+
+
+def recommend_one(start, finish=None):
+    """Crew for a mission planned over start..finish: {field: username}."""
+    start = start.strftime('%Y-%m-%d') if hasattr(start, 'strftime') else start
+    finish = finish.strftime('%Y-%m-%d') if hasattr(finish, 'strftime') else finish
+    return recommend([{'date_start': start, 'date_finish': finish or start}])[0]
+
+
+def pending_missions(start, finish):
+    """New missions overlapping start..finish with some crew role still empty."""
+    pending = []
+    for mission in storage.find('missions', status='New'):
+        span = schedule.mission_span(mission)
+        if span is None or span[0] > finish or span[1] < start:
+            continue
+        if any(not str(mission.get(field) or '').strip() for field in schedule.CREW_FIELDS):
+            pending.append(mission)
+    return sorted(pending, key=lambda m: (m['date_start'], m['ref']))
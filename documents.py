@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import blobstore
+import storage
+
+# --- Document library ---
+# Template documents offered for download. Each document is one record in
+# 'downloads' with a stable id; its category ('type'), name and slug
+# (category plus lower-cased name) are indexed. Uploading a file whose name
+# is already in the category adds a version to that document instead of a
+# second copy; the latest version is the one offered for download. The
+# store's (type, sort key) index lists a category by name a page at a time,
+# and deleting is by id.
+
+# category -> (section title, upload label, accepted file types)
+CATEGORIES = {
+    'Mission': ('Mission Templates & Forms', 'Mission Template', ['pdf', 'doc', 'docx', 'xls', 'xlsx']),
+    'Manual': ('Manuals & Documentation', 'Manual/Guide', ['pdf', 'doc', 'docx']),
+    'Checklist': ('Checklists & Procedures', 'Checklist', ['pdf', 'doc', 'docx', 'xls', 'xlsx']),
+    'General': ('General Documents', 'General Document', ['pdf', 'doc', 'docx', 'xls', 'xlsx', 'jpg', 'jpeg', 'png']),
+}
+
+
+def slug(category, name):
+    return f"{category}:{name.strip().lower()}"
+
+
+def latest(document):
+    return document['versions'][-1]
+
+
+def add(category, uploaded_file, user=''):
+    """Store an uploaded file in a category: a new document, or a new
+    version of the document with the same name. Returns the document."""
+    if category not in CATEGORIES:
+        raise KeyError(f'Unknown document category: {category}')
+    version = {
+        'blob': blobstore.put_upload(uploaded_file),
+        'file': uploaded_file.name,
+        'uploaded': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'user': user,
+    }
+    key = slug(category, uploaded_file.name)
+    with storage.atomic() as tx:
+        found = tx.find('downloads', slug=key)
+        if found:
+            document = found[0]
+            versions = document['versions'] + [dict(version, version=len(document['versions']) + 1)]
+            return tx.update('downloads', document['id'], {'versions': versions})
+        return tx.insert('downloads', {
+            'type': category, 'name': uploaded_file.name, 'slug': key,
+            'versions': [dict(version, version=1)],
+        })
+
+
+def delete(document_id):
+    storage.delete('downloads', document_id)
+
+
+def query(category, search=None):
+    """storage.page() filters for one category listed by name."""
+    where = {'type': category, 'descending': False}
+    if search:
+        where['contains'] = {'name': search}
+    return where
@@ -0,0 +1,128 @@
+import threading
+from datetime import date
+
+import schedule
+import storage
+from intervals import IntervalTree
+
+# --- Drone fleet ---
+# Drones are records of their own; a mission books its drone ('drone_id')
+# over date_start..date_finish. Bookings of the whole fleet are kept in an
+# interval tree maintained by a storage listener, so "where is each drone on
+# day X" and "which drones are free for this window" never scan the mission
+# history. Per-drone calendars live in the schedule index.
+
+
+def booking(mission):
+    """(start, finish, drone_id) booked by a mission, or None."""
+    span = schedule.mission_span(mission)
+    if span is None or not mission.get('drone_id'):
+        return None
+    return span[0], span[1], mission['drone_id']
+
+
+class Fleet:
+    collections = ('drones', 'missions')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._drones = {}
+        self._bookings = IntervalTree()  # mission ref -> interval, value drone_id
+
+    # --- storage listener ---
+    def reset(self, name, records):
+        with self._lock:
+            if name == 'drones':
+                self._drones = {r['drone_id']: r for r in records}
+                return
+            self._bookings = IntervalTree()
+            for mission in records:
+                self._book(mission)
+
+    def change(self, name, old, new):
+        with self._lock:
+            if name == 'drones':
+                if old is not None:
+                    self._drones.pop(old['drone_id'], None)
+                if new is not None:
+                    self._drones[new['drone_id']] = new
+                return
+            if old is not None:
+                self._unbook(old['ref'])
+            if new is not None:
+                self._book(new)
+
+    def _book(self, mission):
+        span = booking(mission)
+        if span is not None:
+            self._bookings.add(span[0], span[1], mission['ref'], span[2])
+
+    def _unbook(self, ref):
+        self._bookings.remove(ref)
+
+    # --- queries ---
+    def drones(self, status=None):
+        with self._lock:
+            return [dict(d) for d in self._drones.values() if status is None or d.get('status') == status]
+
+    def locate(self, on):
+        """{drone_id: mission ref} for drones booked on a day."""
+        with self._lock:
+            located = {}
+            for start, finish, ref, drone_id in self._bookings.at(on):
+                located.setdefault(drone_id, ref)
+            return located
+
+    def free(self, start, finish):
+        """Active drones with no booking overlapping start..finish."""
+        with self._lock:
+            busy = {drone_id for _, _, _, drone_id in self._bookings.overlapping(start, finish)}
+            return [d for d, r in self._drones.items() if r.get('status') == 'Active' and d not in busy]
+
+
+_fleet = None
+_fleet_lock = threading.Lock()
+
+
+def get_fleet():
+    global _fleet
+    if _fleet is None:
+        with _fleet_lock:
+            if _fleet is None:
+                fleet = Fleet()
+                storage.add_listener(fleet)
+                _fleet = fleet
+    return _fleet
+
+
+def _current():
+    fleet = get_fleet()
+    # Pick up writes made by other processes
+    storage.refresh(*Fleet.collections)
+    return fleet
+
+
+def _day(value):
+    if value is None:
+        value = date.today()
+    return value if isinstance(value, str) else value.strftime('%Y-%m-%d')
+
+
+def drones(status=None):
+    return _current().drones(status)
+
+
+def locate(on=None):
+    """Where each drone is on a day (default today): {drone_id: mission ref}."""
+    return _current().locate(_day(on))
+
+
+def free_drones(start, finish=None):
+    """Active drones free for the whole window."""
+    start = _day(start)
+    return _current().free(start, max(start, _day(finish or start)))
+
+
+def drone_schedule(drone_id, start=None, finish=None):
+    """[(start, finish, mission ref)] booked for one drone."""
+    return schedule.bookings(('drone', drone_id), start and _day(start), finish and _day(finish))
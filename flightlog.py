@@ -0,0 +1,231 @@
+import math
+import os
+import re
+import warnings
+
+import numpy as np
+
+import blobstore
+
+# --- Flight logs ---
+# Telemetry uploaded with a mission report is read into numpy arrays (time
+# in seconds, latitude and longitude in degrees, altitude in metres) and
+# summarized in vectorized passes: flight and airborne time, distance flown,
+# altitude and speed envelopes, and how much of the inspected radial or glide
+# path the flight covered. The summary is stored on the report
+# ('flight_stats'), so review pages never re-parse the log.
+#
+# Supported logs:
+# - CSV with a header naming at least time, latitude, longitude and altitude
+#   columns (common aliases accepted); time in seconds or ISO 8601.
+# - GPX track points (lat/lon attributes, <ele>, <time>).
+# - .flog binary logs: the 8-byte BINARY_MAGIC, then little-endian float64
+#   records (time s, lat, lon, alt m), read memory-mapped.
+
+FORMATS = ('csv', 'gpx', 'flog')
+BINARY_MAGIC = b'FLOG\x01\x00\x00\x00'
+COLUMNS = {
+    'time': ('time', 'timestamp', 't', 'datetime', 'time_s', 'seconds'),
+    'lat': ('lat', 'latitude'),
+    'lon': ('lon', 'lng', 'long', 'longitude'),
+    'alt': ('alt', 'altitude', 'ele', 'elevation', 'height', 'alt_m', 'altitude_m'),
+}
+
+EARTH_RADIUS_M = 6371008.8
+METRES_PER_NM = 1852.0
+KNOTS_PER_MS = 3600 / 1852.0
+AIRBORNE_M = 5             # above the lowest altitude logged
+COVERAGE_BIN_NM = 0.5      # path coverage resolution
+LATERAL_TOL_DEG = 2.0      # off the inspected bearing still counted as on path
+VERTICAL_TOL_DEG = 0.5     # off the glide angle still counted as on path
+MAX_GAPS = 10
+
+
+class FlightLogError(ValueError):
+    pass
+
+
+def supported(name):
+    return bool(name) and name.rsplit('.', 1)[-1].lower() in FORMATS
+
+
+# --- Readers ---
+def _seconds(values):
+    # ISO timestamps to epoch seconds; numpy converts zone suffixes to UTC
+    # but warns about them
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        stamps = np.asarray(values).astype('datetime64[ms]')
+    return stamps.astype('int64') / 1000.0
+
+
+def _read_csv(path):
+    with open(path, newline='') as f:
+        header = [c.strip().lower() for c in f.readline().split(',')]
+        usecols = []
+        for field, aliases in COLUMNS.items():
+            col = next((i for i, c in enumerate(header) if c in aliases), None)
+            if col is None:
+                raise FlightLogError(f"CSV flight log has no {field} column (header: {', '.join(header)})")
+            usecols.append(col)
+        start = f.tell()
+        first = f.readline().split(',')
+        f.seek(start)
+        sample = first[usecols[0]].strip() if len(first) > usecols[0] else ''
+        try:
+            float(sample)
+            time_type = 'f8'
+        except ValueError:
+            # Naive ISO times parse straight to datetime64; zoned ones go
+            # through strings
+            time_type = 'U40' if re.search(r'(Z|[+-]\d\d:?\d\d)$', sample) else 'datetime64[ms]'
+        dtype = [('time', time_type), ('lat', 'f8'), ('lon', 'f8'), ('alt', 'f8')]
+        try:
+            rows = np.loadtxt(f, delimiter=',', usecols=usecols, dtype=dtype, ndmin=1)
+        except ValueError as e:
+            raise FlightLogError(f'Unreadable CSV flight log: {e}') from None
+    if time_type == 'f8':
+        time = rows['time']
+    elif time_type == 'U40':
+        time = _seconds(rows['time'])
+    else:
+        time = rows['time'].astype('int64') / 1000.0
+    return time, rows['lat'], rows['lon'], rows['alt']
+
+
+_GPX_FIELDS = {
+    'lat': re.compile(rb'<trkpt[^>]*?\slat\s*=\s*["\']([^"\']*)'),
+    'lon': re.compile(rb'<trkpt[^>]*?\slon\s*=\s*["\']([^"\']*)'),
+    'ele': re.compile(rb'<ele>\s*([^<]*?)\s*</ele>'),
+    # UTC 'Z' is dropped so the common case parses without the zone path
+    'time': re.compile(rb'<time>\s*([^<Z]*?)\s*Z?\s*</time>'),
+}
+
+
+def _read_gpx(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    # Only the track: metadata and waypoints have times and elevations too
+    track = data[data.find(b'<trkpt'):data.rfind(b'</trkpt>')]
+    points = track.count(b'<trkpt')
+    if not points:
+        raise FlightLogError('GPX flight log has no track points')
+    # One regex pass per field over all points; a point missing a field
+    # would shift the columns, so counts must line up
+    fields = {name: pattern.findall(track) for name, pattern in _GPX_FIELDS.items()}
+    if any(len(values) != points for values in fields.values()):
+        raise FlightLogError('GPX track points must all have lat, lon, ele and time')
+    try:
+        return (_seconds(np.array(fields['time'])), np.array(fields['lat']).astype(float),
+                np.array(fields['lon']).astype(float), np.array(fields['ele']).astype(float))
+    except ValueError as e:
+        raise FlightLogError(f'Unreadable GPX flight log: {e}') from None
+
+
+def _read_binary(path):
+    size = os.path.getsize(path) - len(BINARY_MAGIC)
+    with open(path, 'rb') as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise FlightLogError('Not a .flog flight log')
+    if size <= 0 or size % 32:
+        raise FlightLogError('Truncated .flog flight log')
+    records = np.memmap(path, dtype='<f8', mode='r', offset=len(BINARY_MAGIC), shape=(size // 32, 4))
+    return records[:, 0], records[:, 1], records[:, 2], records[:, 3]
+
+
+def read(path, name):
+    """(time, lat, lon, alt) arrays from a log file, in time order."""
+    kind = name.rsplit('.', 1)[-1].lower()
+    reader = {'csv': _read_csv, 'gpx': _read_gpx, 'flog': _read_binary}.get(kind)
+    if reader is None:
+        raise FlightLogError(f'Unsupported flight log format: .{kind}')
+    time, lat, lon, alt = (np.asarray(a, dtype=float) for a in reader(path))
+    keep = np.isfinite(time) & np.isfinite(lat) & np.isfinite(lon) & np.isfinite(alt)
+    if keep.sum() < 2:
+        raise FlightLogError('Flight log has fewer than two valid samples')
+    time, lat, lon, alt = time[keep], lat[keep], lon[keep], alt[keep]
+    if np.any(np.diff(time) < 0):
+        order = np.argsort(time, kind='stable')
+        time, lat, lon, alt = time[order], lat[order], lon[order], alt[order]
+    return time, lat, lon, alt
+
+
+# --- Analysis ---
+def _haversine(lat1, lon1, lat2, lon2):
+    # Great-circle distance in metres, element-wise
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+def _bearing(lat1, lon1, lat2, lon2):
+    # Initial bearing from point 1 to point 2 in degrees true, element-wise
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    y = np.sin(lon2 - lon1) * np.cos(lat2)
+    x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(lon2 - lon1)
+    return np.degrees(np.arctan2(y, x)) % 360
+
+
+def coverage(track, facility):
+    """Coverage of the path inspected from a facility.
+
+    facility: {'lat', 'lon', 'bearing' (degrees true, from the facility along
+    the inspected radial or approach), 'range_nm', optional 'glide' (glide
+    path angle, degrees) and 'elev' (facility elevation, m)}.
+    """
+    time, lat, lon, alt = track
+    f_lat, f_lon = float(facility['lat']), float(facility['lon'])
+    range_nm = float(facility.get('range_nm') or 10)
+    dist = _haversine(f_lat, f_lon, lat, lon)
+    off = (_bearing(f_lat, f_lon, lat, lon) - float(facility['bearing']) + 180) % 360 - 180
+    on_path = (np.abs(off) <= LATERAL_TOL_DEG) & (dist <= range_nm * METRES_PER_NM)
+    if facility.get('glide'):
+        angle = np.degrees(np.arctan2(alt - float(facility.get('elev') or 0), np.maximum(dist, 1)))
+        on_path &= np.abs(angle - float(facility['glide'])) <= VERTICAL_TOL_DEG
+    bins = max(1, int(math.ceil(range_nm / COVERAGE_BIN_NM)))
+    hit = np.zeros(bins, dtype=bool)
+    hit[np.minimum((dist[on_path] / METRES_PER_NM / COVERAGE_BIN_NM).astype(int), bins - 1)] = True
+    # Uncovered stretches: runs of empty bins
+    edges = np.diff(np.concatenate(([0], ~hit, [0])).astype(np.int8))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    gaps = [[round(int(s) * COVERAGE_BIN_NM, 1), round(min(int(e) * COVERAGE_BIN_NM, range_nm), 1)]
+            for s, e in zip(starts, ends)][:MAX_GAPS]
+    return {
+        'coverage_pct': round(100 * float(hit.mean()), 1),
+        'on_path_samples': int(on_path.sum()),
+        'on_path_min': round(float(np.diff(time)[on_path[1:]].sum()) / 60, 1),
+        'range_nm': range_nm,
+        'gaps_nm': gaps,
+    }
+
+
+def summarize(track, facility=None):
+    """Flight statistics of a (time, lat, lon, alt) track, JSON-ready."""
+    time, lat, lon, alt = track
+    dt = np.diff(time)
+    step = _haversine(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    moving = dt > 0
+    speed = step[moving] / dt[moving]
+    climb = np.diff(alt)[moving] / dt[moving]
+    airborne = (alt[1:] > alt.min() + AIRBORNE_M) & moving
+    stats = {
+        'samples': int(len(time)),
+        'duration_min': round(float(time[-1] - time[0]) / 60, 1),
+        'airborne_min': round(float(dt[airborne].sum()) / 60, 1),
+        'distance_nm': round(float(step.sum()) / METRES_PER_NM, 2),
+        'alt_min_m': round(float(alt.min()), 1),
+        'alt_max_m': round(float(alt.max()), 1),
+        'alt_mean_m': round(float(alt.mean()), 1),
+        # 99th percentile: a single GPS jump would otherwise set the maximum
+        'speed_p99_kt': round(float(np.percentile(speed, 99)) * KNOTS_PER_MS, 1) if speed.size else 0.0,
+        'speed_mean_kt': round(float(step[moving].sum() / dt[moving].sum()) * KNOTS_PER_MS, 1) if speed.size else 0.0,
+        'climb_max_ms': round(float(np.abs(climb).max()), 1) if climb.size else 0.0,
+    }
+    if facility:
+        stats['path'] = coverage(track, facility)
+    return stats
+
+
+def analyze(handle, facility=None):
+    """Statistics of a flight log stored in the blob store."""
+    return summarize(read(blobstore.path(handle), handle['name']), facility)
@@ -0,0 +1,296 @@
+import math
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+import storage
+
+# --- Parts consumption forecast ---
+# Weekly demand per part is kept in two numpy matrices (parts x weeks),
+# updated cell by cell by a storage listener: usages booked in the stock
+# ledger, and parts named on maintenance log entries. A week's demand is the
+# ledger usage when there is any, else the maintenance mentions (one unit
+# each), so repairs that also booked their parts are not counted twice.
+#
+# From that history, in one vectorized pass over the parts that changed:
+# an exponentially weighted weekly rate and spread, a monthly seasonal index
+# (once a part has a year of history), the projected depletion date, and a
+# reorder point (lead-time demand plus safety stock, never below the part's
+# minimum stock level) with the quantity to order to cover the lead time and
+# a review period.
+
+LEAD_TIME_DAYS = 14      # from order to delivery
+COVER_DAYS = 30          # stock an order should cover beyond the lead time
+SERVICE_Z = 1.65         # safety stock for ~95% of lead times without a stock-out
+HALF_LIFE_WEEKS = 13     # weight of past demand halves every quarter
+SEASON_MIN_WEEKS = 52    # history needed before seasonality is used
+SEASON_PRIOR_WEEKS = 8   # shrinks the monthly index of rarely seen months toward 1
+
+
+def _week(day):
+    # Weeks since 0001-01-01, a Monday
+    return (day.toordinal() - 1) // 7
+
+
+def _day(value):
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _part_names(text):
+    return [n.strip().lower() for n in str(text or '').split(',') if n.strip()]
+
+
+class Forecaster:
+    collections = ('spare_parts', 'parts_ledger', 'maintenance_log')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._parts = {}      # part_id -> part record
+        self._by_name = {}    # lower-case part name -> part_id
+        self._rows = {}       # part_id -> matrix row
+        self._usage = {}      # ledger op_id -> (part_id, week, units)
+        self._mentions = {}   # maintenance record id -> (week, [part names])
+        self._week0 = None    # week of matrix column 0
+        self._used = np.zeros((0, 0))
+        self._mentioned = np.zeros((0, 0))
+        self._dirty = set()
+        self._results = {}
+        self._computed_week = None
+
+    # --- matrix cells ---
+    def _row(self, part_id):
+        row = self._rows.get(part_id)
+        if row is None:
+            row = self._rows[part_id] = len(self._rows)
+            if row >= self._used.shape[0]:
+                grow = max(16, self._used.shape[0])
+                self._used = np.pad(self._used, ((0, grow), (0, 0)))
+                self._mentioned = np.pad(self._mentioned, ((0, grow), (0, 0)))
+        return row
+
+    def _col(self, week):
+        if self._week0 is None:
+            self._week0 = week
+        if week < self._week0:
+            grow = self._week0 - week
+            self._used = np.pad(self._used, ((0, 0), (grow, 0)))
+            self._mentioned = np.pad(self._mentioned, ((0, 0), (grow, 0)))
+            self._week0 = week
+        col = week - self._week0
+        if col >= self._used.shape[1]:
+            grow = max(col + 1 - self._used.shape[1], 52)
+            self._used = np.pad(self._used, ((0, 0), (0, grow)))
+            self._mentioned = np.pad(self._mentioned, ((0, 0), (0, grow)))
+        return col
+
+    def _usage_entry(self, entry):
+        if entry.get('kind') != 'usage':
+            return None
+        day = _day(entry.get('date'))
+        if day is None:
+            return None
+        return entry['part_id'], _week(day), -float(entry.get('qty') or 0)
+
+    def _add_usage(self, usage, sign):
+        part_id, week, units = usage
+        row, col = self._row(part_id), self._col(week)
+        self._used[row, col] += sign * units
+        self._dirty.add(part_id)
+
+    def _add_mentions(self, mention, sign):
+        week, names = mention
+        for name in names:
+            part_id = self._by_name.get(name)
+            if part_id is not None:
+                row, col = self._row(part_id), self._col(week)
+                self._mentioned[row, col] += sign
+                self._dirty.add(part_id)
+
+    def _scatter(self, matrix_name, cells):
+        # Add many (part_id, week, units) at once: grow the matrix to the
+        # week range first, then a single scatter-add
+        if not cells:
+            return
+        part_ids, weeks, units = zip(*cells)
+        self._col(min(weeks))
+        self._col(max(weeks))
+        rows = np.array([self._row(p) for p in part_ids])
+        cols = np.array(weeks) - self._week0
+        np.add.at(getattr(self, matrix_name), (rows, cols), np.array(units, dtype=float))
+
+    def _rebuild_mentions(self):
+        self._mentioned[:] = 0
+        self._scatter('_mentioned', [
+            (self._by_name[name], week, 1)
+            for week, names in self._mentions.values() for name in names if name in self._by_name
+        ])
+
+    # --- storage listener ---
+    def reset(self, name, records):
+        with self._lock:
+            if name == 'spare_parts':
+                self._parts = {r['part_id']: r for r in records}
+                self._by_name = {str(r.get('name') or '').lower(): r['part_id'] for r in records}
+                for part_id in self._parts:
+                    self._row(part_id)
+                self._rebuild_mentions()
+            elif name == 'parts_ledger':
+                self._usage = {}
+                for entry in records:
+                    usage = self._usage_entry(entry)
+                    if usage is not None:
+                        self._usage[entry['op_id']] = usage
+                self._used[:] = 0
+                self._scatter('_used', list(self._usage.values()))
+            else:
+                self._mentions = {}
+                for record in records:
+                    day = _day(record.get('date'))
+                    names = _part_names(record.get('parts'))
+                    if day is not None and names:
+                        self._mentions[record['id']] = (_week(day), names)
+                self._rebuild_mentions()
+            self._dirty.update(self._rows)
+
+    def change(self, name, old, new):
+        with self._lock:
+            if name == 'spare_parts':
+                if old is not None:
+                    self._parts.pop(old['part_id'], None)
+                    self._by_name.pop(str(old.get('name') or '').lower(), None)
+                    self._dirty.add(old['part_id'])
+                if new is not None:
+                    self._parts[new['part_id']] = new
+                    self._by_name[str(new.get('name') or '').lower()] = new['part_id']
+                    self._row(new['part_id'])
+                    self._dirty.add(new['part_id'])
+                if (old or {}).get('name') != (new or {}).get('name'):
+                    self._rebuild_mentions()
+                    self._dirty.update(self._rows)
+            elif name == 'parts_ledger':
+                if old is not None and old['op_id'] in self._usage:
+                    self._add_usage(self._usage.pop(old['op_id']), -1)
+                usage = self._usage_entry(new) if new is not None else None
+                if usage is not None:
+                    self._usage[new['op_id']] = usage
+                    self._add_usage(usage, 1)
+            else:
+                if old is not None and old['id'] in self._mentions:
+                    self._add_mentions(self._mentions.pop(old['id']), -1)
+                if new is not None:
+                    day = _day(new.get('date'))
+                    names = _part_names(new.get('parts'))
+                    if day is not None and names:
+                        self._mentions[new['id']] = (_week(day), names)
+                        self._add_mentions(self._mentions[new['id']], 1)
+
+    # --- queries ---
+    def forecast(self, today):
+        """Forecast per part, recomputing only parts whose history or stock changed."""
+        with self._lock:
+            week = _week(today)
+            if week != self._computed_week:
+                # Weights and seasons move with the calendar
+                self._dirty.update(self._rows)
+                self._computed_week = week
+            dirty = [p for p in self._dirty if p in self._parts]
+            if dirty:
+                self._compute(dirty, today)
+            self._dirty.clear()
+            return [dict(self._results[p]) for p in self._parts]
+
+    def _compute(self, part_ids, today):
+        rows = np.array([self._rows[p] for p in part_ids])
+        now = self._col(_week(today))
+        used = self._used[rows, :now + 1]
+        demand = np.where(used > 0, used, self._mentioned[rows, :now + 1])
+        weeks = demand.shape[1]
+
+        # Each part's history starts at its first week with demand
+        has = demand > 0
+        first = np.where(has.any(axis=1), has.argmax(axis=1), weeks)
+        mask = np.arange(weeks)[None, :] >= first[:, None]
+        history = mask.sum(axis=1)
+
+        # Exponentially weighted weekly rate and spread
+        weights = 0.5 ** ((weeks - 1 - np.arange(weeks)) / HALF_LIFE_WEEKS)
+        wm = weights[None, :] * mask
+        wsum = np.maximum(wm.sum(axis=1), 1e-12)
+        rate = (wm * demand).sum(axis=1) / wsum
+        sigma = np.sqrt((wm * (demand - rate[:, None]) ** 2).sum(axis=1) / wsum)
+
+        # Monthly seasonal index over the whole history, shrunk toward 1 for
+        # months seen only a few times
+        months = np.array([date.fromordinal((self._week0 + c) * 7 + 4).month - 1 for c in range(weeks)])
+        onehot = np.zeros((weeks, 12))
+        onehot[np.arange(weeks), months] = 1
+        month_weeks = mask.astype(float) @ onehot
+        month_rate = ((demand * mask) @ onehot) / np.maximum(month_weeks, 1)
+        mean_rate = (demand * mask).sum(axis=1) / np.maximum(history, 1)
+        index = np.where(month_weeks > 0, month_rate / np.maximum(mean_rate, 1e-12)[:, None], 1)
+        season = 1 + (index - 1) * month_weeks / (month_weeks + SEASON_PRIOR_WEEKS)
+        season = np.where((history >= SEASON_MIN_WEEKS)[:, None], season, 1)
+        factor = season[:, (today + timedelta(days=LEAD_TIME_DAYS // 2)).month - 1]
+
+        daily = rate / 7 * factor
+        safety = SERVICE_Z * sigma * math.sqrt(LEAD_TIME_DAYS / 7)
+        qty = np.array([float(self._parts[p].get('qty') or 0) for p in part_ids])
+        minimum = np.array([float(self._parts[p].get('min') or 0) for p in part_ids])
+        reorder_point = np.maximum(np.ceil(daily * LEAD_TIME_DAYS + safety), minimum)
+        order_up_to = np.maximum(np.ceil(daily * (LEAD_TIME_DAYS + COVER_DAYS) + safety), reorder_point)
+        reorder_qty = np.maximum(order_up_to - qty, 0)
+        days_left = np.where(daily > 0, qty / np.maximum(daily, 1e-12), np.inf)
+
+        for i, part_id in enumerate(part_ids):
+            part = self._parts[part_id]
+            depletion = today + timedelta(days=int(days_left[i])) if np.isfinite(days_left[i]) and days_left[i] < 36500 else None
+            self._results[part_id] = {
+                'part_id': part_id,
+                'name': part.get('name'),
+                'qty': part.get('qty'),
+                'weekly_rate': round(float(rate[i] * factor[i]), 2),
+                'season': round(float(factor[i]), 2),
+                'safety_stock': int(math.ceil(safety[i])),
+                'reorder_point': int(reorder_point[i]),
+                'reorder_qty': int(reorder_qty[i]) if qty[i] <= reorder_point[i] else 0,
+                'depletion': depletion.strftime('%Y-%m-%d') if depletion else None,
+                'history_weeks': int(history[i]),
+                'reorder': bool(qty[i] <= reorder_point[i]),
+            }
+
+
+_forecaster = None
+_forecaster_lock = threading.Lock()
+
+
+def get_forecaster():
+    global _forecaster
+    if _forecaster is None:
+        with _forecaster_lock:
+            if _forecaster is None:
+                forecaster = Forecaster()
+                storage.add_listener(forecaster)
+                _forecaster = forecaster
+    return _forecaster
+
+
+def _current():
+    forecaster = get_forecaster()
+    # Pick up writes made by other processes
+    storage.refresh(*Forecaster.collections)
+    return forecaster
+
+
+def forecast(today=None):
+    """Consumption forecast and reorder advice for every part."""
+    return _current().forecast(today or date.today())
+
+
+def reorder_list(today=None):
+    """Parts at or below their reorder point, soonest depletion first."""
+    due = [f for f in forecast(today) if f['reorder']]
+    return sorted(due, key=lambda f: (f['depletion'] or '9999-12-31', f['part_id']))
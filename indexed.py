@@ -0,0 +1,98 @@
+# --- Indexed collections ---
+# In-memory collection of dict records keyed by one field, with secondary
+# indexes (field value -> bucket of keys) so that lookups, keyed updates and
+# equality filters never walk the whole collection.
+
+
+def _norm(value):
+    # Index values the same way the SQLite columns store them
+    return None if value is None else str(value)
+
+
+class IndexedCollection:
+    def __init__(self, key, indexes=()):
+        self.key = key
+        self._records = {}
+        # field -> {value: {key: None}}; dicts keep buckets in insertion order
+        self._indexes = {field: {} for field in indexes}
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def __contains__(self, key):
+        return _norm(key) in self._records
+
+    def get(self, key):
+        return self._records.get(_norm(key))
+
+    def add(self, record):
+        """Insert a record, or replace the one with the same key."""
+        k = _norm(record[self.key])
+        old = self._records.get(k)
+        if old is not None:
+            self._unindex(k, old)
+        self._records[k] = record
+        for field, buckets in self._indexes.items():
+            buckets.setdefault(_norm(record.get(field)), {})[k] = None
+        return record
+
+    def remove(self, key):
+        k = _norm(key)
+        record = self._records.pop(k, None)
+        if record is not None:
+            self._unindex(k, record)
+        return record
+
+    def update(self, key, changes):
+        """Apply field changes to one record; the key itself may change."""
+        old = self.get(key)
+        if old is None:
+            raise KeyError(key)
+        record = dict(old, **changes)
+        if _norm(record[self.key]) != _norm(key):
+            self.remove(key)
+        return self.add(record)
+
+    def _unindex(self, k, record):
+        for field, buckets in self._indexes.items():
+            value = _norm(record.get(field))
+            bucket = buckets.get(value)
+            if bucket is not None:
+                bucket.pop(k, None)
+                if not bucket:
+                    del buckets[value]
+
+    def _keys(self, criteria):
+        if not criteria:
+            return self._records.keys()
+        buckets = []
+        for field, value in criteria.items():
+            if field not in self._indexes:
+                raise KeyError(f"'{field}' is not indexed")
+            bucket = self._indexes[field].get(_norm(value))
+            if not bucket:
+                return ()
+            buckets.append(bucket)
+        # Walk the smallest bucket and probe the others
+        buckets.sort(key=len)
+        first, rest = buckets[0], buckets[1:]
+        return [k for k in first if all(k in b for b in rest)]
+
+    def where(self, **criteria):
+        """Records whose indexed fields equal the given values."""
+        return [self._records[k] for k in self._keys(criteria)]
+
+    def count(self, **criteria):
+        if len(criteria) == 1:
+            (field, value), = criteria.items()
+            if field not in self._indexes:
+                raise KeyError(f"'{field}' is not indexed")
+            return len(self._indexes[field].get(_norm(value), ()))
+        return len(self._keys(criteria))
+
+    def values(self, field):
+        """Distinct values of an indexed field."""
+        return list(self._indexes[field])
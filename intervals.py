@@ -0,0 +1,143 @@
+import random
+
+# --- Interval index ---
+# Closed intervals [start, end] over any comparable values (ISO dates here),
+# each with a unique key. They are kept in a treap ordered by (start, key)
+# where every node also holds the largest end in its subtree, so a search
+# can skip subtrees that finish before the window. Insert and remove are
+# O(log n) expected; overlap and point queries are O(log n + k) for k hits.
+
+
+class _Node:
+    __slots__ = ('start', 'end', 'key', 'value', 'priority', 'max_end', 'left', 'right')
+
+    def __init__(self, start, end, key, value, priority):
+        self.start = start
+        self.end = end
+        self.key = key
+        self.value = value
+        self.priority = priority
+        self.max_end = end
+        self.left = None
+        self.right = None
+
+    def update(self):
+        m = self.end
+        if self.left is not None and self.left.max_end > m:
+            m = self.left.max_end
+        if self.right is not None and self.right.max_end > m:
+            m = self.right.max_end
+        self.max_end = m
+
+
+def _split(node, order):
+    # (nodes ordered before 'order', the rest)
+    if node is None:
+        return None, None
+    if (node.start, node.key) < order:
+        node.right, right = _split(node.right, order)
+        node.update()
+        return node, right
+    left, node.left = _split(node.left, order)
+    node.update()
+    return left, node
+
+
+def _merge(left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.update()
+        return left
+    right.left = _merge(left, right.left)
+    right.update()
+    return right
+
+
+def _remove(node, order):
+    if node is None:
+        return None
+    here = (node.start, node.key)
+    if order == here:
+        return _merge(node.left, node.right)
+    if order < here:
+        node.left = _remove(node.left, order)
+    else:
+        node.right = _remove(node.right, order)
+    node.update()
+    return node
+
+
+class IntervalTree:
+    def __init__(self):
+        self._root = None
+        self._spans = {}  # key -> (start, end, value)
+        self._random = random.Random()
+
+    def __len__(self):
+        return len(self._spans)
+
+    def __contains__(self, key):
+        return key in self._spans
+
+    def get(self, key):
+        """(start, end, value) for a key, or None."""
+        return self._spans.get(key)
+
+    def add(self, start, end, key, value=None):
+        """Insert an interval, or replace the one with the same key."""
+        if end < start:
+            raise ValueError(f'Interval ends before it starts: {start!r} > {end!r}')
+        if key in self._spans:
+            self.remove(key)
+        node = _Node(start, end, key, value, self._random.random())
+        left, right = _split(self._root, (start, key))
+        self._root = _merge(_merge(left, node), right)
+        self._spans[key] = (start, end, value)
+
+    def remove(self, key):
+        span = self._spans.pop(key, None)
+        if span is not None:
+            self._root = _remove(self._root, (span[0], key))
+        return span
+
+    def overlapping(self, start, end):
+        """[(start, end, key, value)] of intervals meeting [start, end], by start."""
+        found = []
+        stack, node = [], self._root
+        # In-order walk, pruned by max_end (nothing below ends late enough)
+        # and by start (nothing to the right starts early enough)
+        while stack or node is not None:
+            while node is not None and node.max_end >= start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.start > end:
+                break
+            if node.end >= start:
+                found.append((node.start, node.end, node.key, node.value))
+            node = node.right
+        return found
+
+    def at(self, point):
+        """Intervals containing a point."""
+        return self.overlapping(point, point)
+
+    def intervals(self):
+        """All intervals, by start."""
+        return [(s, e, k, v) for s, e, k, v in self._walk()]
+
+    def _walk(self):
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.start, node.end, node.key, node.value
+            node = node.right
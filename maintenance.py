@@ -0,0 +1,342 @@
+import bisect
+import heapq
+import threading
+from datetime import date, datetime, timedelta
+
+import schedule
+import storage
+
+# --- Maintenance log ---
+# One log for all maintenance work, on drones and on other equipment. The
+# table is indexed on (equipment, sort key) and an entry's sort key starts
+# with its date, so "all work on D002 in 2025, newest first" is one index
+# range scan that SQLite returns already in order, a page at a time; nothing
+# is sorted on render.
+
+TYPES = ['Routine', 'Inspection', 'Calibration', 'Repair', 'Preventive', 'Corrective', 'Upgrade']
+STATUSES = ['Completed', 'In Progress', 'Scheduled', 'Postponed']
+
+
+def _day(value):
+    return value if isinstance(value, str) else value.strftime('%Y-%m-%d')
+
+
+def query(equipment=None, start=None, finish=None, **where):
+    """storage.page() filters for the work on one equipment (or all) dated
+    start..finish, both inclusive and optional."""
+    if equipment:
+        where['equipment'] = equipment
+    if start or finish:
+        # Sort keys are 'date timestamp'; U+FFFF sorts after any timestamp
+        where['between'] = {'sort_key': (start and _day(start), finish and f'{_day(finish)} \uffff')}
+    return where
+
+
+def history(equipment=None, start=None, finish=None, limit=20, cursor=None, descending=True):
+    """One page of log entries, newest first by default: (entries, next_cursor)."""
+    return storage.page('maintenance_log', limit=limit, cursor=cursor, descending=descending,
+                        **query(equipment, start, finish))
+
+
+def entries(equipment=None, start=None, finish=None, batch=500):
+    """Every entry in the range, oldest first, read a batch at a time."""
+    cursor = None
+    while True:
+        records, cursor = history(equipment, start, finish, limit=batch, cursor=cursor, descending=False)
+        yield from records
+        if cursor is None:
+            return
+
+
+def equipment():
+    """Equipment IDs with logged work."""
+    return sorted(e for e in storage.values('maintenance_log', 'equipment') if e)
+
+
+def log(entry):
+    """Add work to the log, filling in the fields an entry may leave out."""
+    record = {
+        'equipment': '', 'date': datetime.now().strftime('%Y-%m-%d'), 'type': '', 'status': 'Completed',
+        'technician': '', 'description': '', 'parts': '', 'findings': '', 'actions': '', 'next_date': None,
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    record.update(entry)
+    return storage.insert('maintenance_log', record)
+
+
+# --- Maintenance due queue ---
+# Each piece of equipment is due for its next maintenance at the earliest of:
+# the next_date set by its latest logged work, the date of its earliest open
+# (not Completed) work, the day its flights since the last completed service
+# reached MISSIONS_PER_SERVICE missions or FLIGHT_DAYS_PER_SERVICE days on
+# mission, and DEFAULT_INTERVAL_DAYS after that service when nothing else is
+# planned. Ties go to the more urgent maintenance type.
+#
+# A storage listener keeps, per equipment, its completed services, open work
+# and (for drones) Done missions in sorted lists, and recomputes only the
+# equipment a write touches. Due items sit in a heap keyed by due date, so
+# the dashboards' "top N due" pops N items instead of ranking the fleet;
+# superseded heap entries are skipped when they surface.
+
+MISSIONS_PER_SERVICE = 10     # Done missions between services
+FLIGHT_DAYS_PER_SERVICE = 20  # days on mission between services
+DEFAULT_INTERVAL_DAYS = 90    # routine service when nothing else is due
+TYPE_PRIORITY = {'Repair': 3, 'Corrective': 3, 'Calibration': 2, 'Inspection': 2,
+                 'Preventive': 1, 'Routine': 1, 'Upgrade': 0}
+OPEN_STATUSES = ('In Progress', 'Scheduled', 'Postponed')
+
+
+def _shift(day, days):
+    return (date.fromisoformat(day) + timedelta(days=days)).isoformat()
+
+
+def _flight(mission):
+    # (finish, start, ref) of a flown mission, or None
+    span = schedule.mission_span(mission)
+    if span is None or not mission.get('drone_id') or mission.get('status') != 'Done':
+        return None
+    return span[1], span[0], mission['ref']
+
+
+class DueQueue:
+    collections = ('drones', 'missions', 'maintenance_log')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._drones = {}    # drone_id -> record
+        self._entries = {}   # log id -> entry
+        self._services = {}  # equipment -> sorted (date, id) of completed work
+        self._open = {}      # equipment -> sorted (date, id) of open work
+        self._planned = {}   # equipment -> sorted (sort key, id) of work with a next_date
+        self._flights = {}   # drone_id -> sorted (finish, start, ref) of Done missions
+        self._flown = {}     # mission ref -> (drone_id, flight)
+        self._items = {}     # equipment -> (heap key, version, due item)
+        self._heap = []      # (heap key, version, equipment); stale unless the version is current
+        self._version = 0    # numbers heap pushes
+
+    # --- sorted lists ---
+    @staticmethod
+    def _add(index, owner, entry):
+        bisect.insort(index.setdefault(owner, []), entry)
+
+    @staticmethod
+    def _discard(index, owner, entry):
+        entries = index.get(owner, [])
+        i = bisect.bisect_left(entries, entry)
+        if i < len(entries) and entries[i] == entry:
+            del entries[i]
+        if not entries:
+            index.pop(owner, None)
+
+    def _log(self, entry, add):
+        equipment = entry.get('equipment')
+        if not equipment or not entry.get('date'):
+            return None
+        change = self._add if add else self._discard
+        day = str(entry['date'])[:10]
+        if entry.get('status') == 'Completed':
+            change(self._services, equipment, (day, entry['id']))
+        elif entry.get('status') in OPEN_STATUSES:
+            change(self._open, equipment, (day, entry['id']))
+        if entry.get('next_date'):
+            change(self._planned, equipment, (f"{day} {entry.get('timestamp') or ''}", entry['id']))
+        return equipment
+
+    def _fly(self, mission, add):
+        flight = _flight(mission)
+        if flight is None:
+            return None
+        if add:
+            self._flown[mission['ref']] = (mission['drone_id'], flight)
+            self._add(self._flights, mission['drone_id'], flight)
+        else:
+            self._flown.pop(mission['ref'], None)
+            self._discard(self._flights, mission['drone_id'], flight)
+        return mission['drone_id']
+
+    # --- due items ---
+    def _usage_due(self, drone_id, since):
+        # Day the flights after 'since' reached a service limit, and the
+        # missions / days flown since then
+        flights = self._flights.get(drone_id, [])
+        first = bisect.bisect_right(flights, (since, '\uffff')) if since else 0
+        missions = len(flights) - first
+        days = 0
+        due = None
+        for n, (finish, start, _) in enumerate(flights[first:first + MISSIONS_PER_SERVICE], 1):
+            days += (date.fromisoformat(finish) - date.fromisoformat(start)).days + 1
+            if n == MISSIONS_PER_SERVICE or days >= FLIGHT_DAYS_PER_SERVICE:
+                due = finish
+                break
+        return due, missions
+
+    def _done_since(self, services, entry):
+        # Whether work of the entry's type was completed after it
+        for day, entry_id in reversed(services):
+            if day <= entry['date'][:10]:
+                return False
+            if self._entries[entry_id].get('type') == entry.get('type'):
+                return True
+        return False
+
+    def _item(self, equipment):
+        services = self._services.get(equipment, [])
+        since = services[-1][0] if services else None
+        candidates = []
+        planned = self._planned.get(equipment)
+        if planned:
+            entry = self._entries[planned[-1][1]]
+            if not self._done_since(services, entry):
+                candidates.append((str(entry['next_date'])[:10], entry.get('type') or 'Routine', 'Next maintenance date'))
+        opened = self._open.get(equipment)
+        if opened:
+            entry = self._entries[opened[0][1]]
+            candidates.append((opened[0][0], entry.get('type') or 'Routine', f"{entry.get('status')} work"))
+        missions = 0
+        if equipment in self._drones:
+            usage_due, missions = self._usage_due(equipment, since)
+            if usage_due:
+                candidates.append((usage_due, 'Inspection', 'Flight usage'))
+        if not candidates and since:
+            candidates.append((_shift(since, DEFAULT_INTERVAL_DAYS), 'Routine', 'Service interval'))
+        if not candidates:
+            return None
+        due, kind, reason = min(candidates, key=lambda c: (c[0], -TYPE_PRIORITY.get(c[1], 0)))
+        return {
+            'equipment': equipment,
+            'due': due,
+            'type': kind,
+            'reason': reason,
+            'last_service': since,
+            'missions_since': missions,
+        }
+
+    def _refresh_item(self, equipment):
+        drone = self._drones.get(equipment)
+        item = None if drone is not None and drone.get('status') != 'Active' else self._item(equipment)
+        if item is None:
+            self._items.pop(equipment, None)
+            return
+        key = (item['due'], -TYPE_PRIORITY.get(item['type'], 0), equipment)
+        current = self._items.get(equipment)
+        if current is not None and current[0] == key:
+            self._items[equipment] = (key, current[1], item)
+        else:
+            # A fresh version: entries pushed before, even with an equal key,
+            # are superseded
+            self._version += 1
+            self._items[equipment] = (key, self._version, item)
+            heapq.heappush(self._heap, (key, self._version, equipment))
+        # Drop superseded entries once they outnumber the live ones
+        if len(self._heap) > 2 * len(self._items) + 64:
+            self._heap = [(key, version, e) for e, (key, version, _) in self._items.items()]
+            heapq.heapify(self._heap)
+
+    def _rebuild(self):
+        self._items = {}
+        self._heap = []
+        for equipment in set(self._services) | set(self._open) | set(self._planned) | set(self._drones):
+            self._refresh_item(equipment)
+
+    # --- storage listener ---
+    def reset(self, name, records):
+        with self._lock:
+            if name == 'drones':
+                self._drones = {r['drone_id']: r for r in records}
+            elif name == 'missions':
+                self._flights = {}
+                self._flown = {}
+                for mission in records:
+                    self._fly(mission, True)
+            else:
+                self._entries = {r['id']: r for r in records}
+                self._services, self._open, self._planned = {}, {}, {}
+                for entry in records:
+                    self._log(entry, True)
+            self._rebuild()
+
+    def change(self, name, old, new):
+        with self._lock:
+            touched = set()
+            if name == 'drones':
+                if old is not None:
+                    self._drones.pop(old['drone_id'], None)
+                    touched.add(old['drone_id'])
+                if new is not None:
+                    self._drones[new['drone_id']] = new
+                    touched.add(new['drone_id'])
+            elif name == 'missions':
+                if old is not None and old['ref'] in self._flown:
+                    drone_id, flight = self._flown.pop(old['ref'])
+                    self._discard(self._flights, drone_id, flight)
+                    touched.add(drone_id)
+                if new is not None:
+                    touched.add(self._fly(new, True))
+            else:
+                if old is not None:
+                    self._entries.pop(old['id'], None)
+                    touched.add(self._log(old, False))
+                if new is not None:
+                    self._entries[new['id']] = new
+                    touched.add(self._log(new, True))
+            for equipment in touched - {None}:
+                self._refresh_item(equipment)
+
+    # --- queries ---
+    def top(self, n):
+        """The n most urgent due items, soonest first."""
+        with self._lock:
+            found, popped = [], []
+            while self._heap and len(found) < n:
+                entry = heapq.heappop(self._heap)
+                current = self._items.get(entry[2])
+                if current is None or current[1] != entry[1]:
+                    continue  # superseded
+                popped.append(entry)
+                found.append(dict(current[2]))
+            for entry in popped:
+                heapq.heappush(self._heap, entry)
+            return found
+
+    def get(self, equipment):
+        with self._lock:
+            current = self._items.get(equipment)
+            return dict(current[2]) if current else None
+
+    def __len__(self):
+        return len(self._items)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_due_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                queue = DueQueue()
+                storage.add_listener(queue)
+                _queue = queue
+    return _queue
+
+
+def _current():
+    queue = get_due_queue()
+    # Pick up writes made by other processes
+    storage.refresh(*DueQueue.collections)
+    return queue
+
+
+def due(n=5, today=None):
+    """The n most urgent maintenance items with their days left (negative: overdue)."""
+    today = today or date.today()
+    items = _current().top(n)
+    for item in items:
+        item['days_left'] = (date.fromisoformat(item['due']) - today).days
+    return items
+
+
+def due_for(equipment):
+    return _current().get(equipment)
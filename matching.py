@@ -0,0 +1,56 @@
+import numpy as np
+
+# --- Min-cost matching ---
+# Hungarian algorithm (shortest augmenting paths with potentials) on a
+# rectangular cost matrix, O(n^2 m) with the inner loop vectorized by numpy.
+# Pairs whose cost is FORBIDDEN or more are never returned.
+
+FORBIDDEN = 1e9
+
+
+def min_cost_matching(cost):
+    """[(row, col)] matching every row or every column (whichever is fewer) at least total cost."""
+    cost = np.asarray(cost, dtype=float)
+    if cost.size == 0:
+        return []
+    if cost.shape[0] > cost.shape[1]:
+        return sorted((r, c) for c, r in min_cost_matching(cost.T))
+    # Forbidden pairs keep a large finite cost so potentials stay finite
+    work = np.minimum(np.nan_to_num(cost, nan=FORBIDDEN, posinf=FORBIDDEN), FORBIDDEN)
+    n, m = work.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=int)  # column -> row (1-based, 0: free)
+    way = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = ~used[1:]
+            reduced = work[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            visited = np.flatnonzero(used)
+            u[owner[visited]] += delta
+            v[visited] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    return sorted(
+        (int(owner[j]) - 1, j - 1) for j in range(1, m + 1)
+        if owner[j] and work[owner[j] - 1, j - 1] < FORBIDDEN
+    )
@@ -0,0 +1,170 @@
+import mmap
+import os
+import sqlite3
+import struct
+
+import numpy as np
+
+import blobstore
+import storage
+
+# --- Navaid measurement files ---
+# ILS/VOR recordings uploaded by the data analyst stay in the blob store and
+# are analyzed straight from disk: the file is memory-mapped and walked a
+# chunk at a time, each chunk's pages dropped once processed, so memory use
+# does not depend on the file size. Per chunk, in vectorized passes: running
+# sums for mean/RMS, extremes, a histogram of the absolute error (for its
+# 95th percentile) and the out-of-tolerance runs, carried across chunk
+# boundaries.
+#
+# Results are kept in the 'measurement_analyses' collection under the file's
+# SHA-256 (plus the tolerance used), so a file is analyzed once however many
+# reports or pages show it.
+#
+# File format (.nav): a 16-byte header - b'NAVM', version (uint8), kind
+# (uint8, see KINDS), 2 reserved bytes, sample rate in Hz (float64) - then
+# one little-endian float32 per sample: DDM in uA for ILS, bearing error in
+# degrees for VOR.
+
+MAGIC = b'NAVM'
+HEADER = struct.Struct('<4sBBxxd')
+KINDS = {0: 'ILS LOC', 1: 'ILS GP', 2: 'VOR'}
+UNITS = {'ILS LOC': 'uA', 'ILS GP': 'uA', 'VOR': 'deg'}
+# Default limits, overridable per analysis: localizer course structure and
+# glide path structure (DDM) and VOR bearing alignment
+TOLERANCE = {'ILS LOC': 15.0, 'ILS GP': 30.0, 'VOR': 2.0}
+
+CHUNK_SAMPLES = 1 << 20           # 4 MiB of float32 per step
+HISTOGRAM_BINS = 4000             # over 0..4x the tolerance, then overflow
+MAX_SEGMENTS = 50                 # out-of-tolerance runs kept, in time order
+ANALYSIS_VERSION = 1              # bump when results change meaning
+
+
+class MeasurementError(ValueError):
+    pass
+
+
+def supported(name):
+    return bool(name) and name.lower().endswith('.nav')
+
+
+def read_header(path):
+    """(kind, sample_rate, samples) of a measurement file."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(HEADER.size)
+    if len(head) < HEADER.size:
+        raise MeasurementError('Measurement file is too short')
+    magic, version, kind, rate = HEADER.unpack(head)
+    if magic != MAGIC or version != 1:
+        raise MeasurementError('Not a .nav measurement file')
+    if kind not in KINDS or not rate > 0:
+        raise MeasurementError('Measurement file header is invalid')
+    if (size - HEADER.size) % 4:
+        raise MeasurementError('Truncated measurement file')
+    return KINDS[kind], rate, (size - HEADER.size) // 4
+
+
+def analyze_file(path, tolerance=None):
+    """Error statistics and out-of-tolerance segments of a measurement file,
+    read in fixed memory."""
+    kind, rate, samples = read_header(path)
+    if not samples:
+        raise MeasurementError('Measurement file has no samples')
+    tolerance = float(tolerance or TOLERANCE[kind])
+    width = 4 * tolerance / HISTOGRAM_BINS
+    histogram = np.zeros(HISTOGRAM_BINS + 1, dtype=np.int64)
+    total = total_sq = 0.0
+    low, high = np.inf, -np.inf
+    out_samples = 0
+    segments = []         # [start, end) sample ranges with their peak error
+    segment_count = 0
+    pending = None        # run still open at the end of the previous chunk
+    page = mmap.PAGESIZE
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for first in range(0, samples, CHUNK_SAMPLES):
+            count = min(CHUNK_SAMPLES, samples - first)
+            offset = HEADER.size + 4 * first
+            values = np.frombuffer(mm, dtype='<f4', count=count, offset=offset).astype(np.float64)
+            total += values.sum()
+            total_sq += np.dot(values, values)
+            low, high = min(low, values.min()), max(high, values.max())
+            errors = np.abs(values)
+            del values
+            histogram += np.bincount(np.minimum((errors / width).astype(np.int64), HISTOGRAM_BINS),
+                                     minlength=HISTOGRAM_BINS + 1)
+
+            # Out-of-tolerance runs in this chunk, as local [start, end)
+            out = errors > tolerance
+            out_samples += int(out.sum())
+            edges = np.diff(np.concatenate(([pending is not None], out, [False])).astype(np.int8))
+            starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+            if pending is not None:
+                starts = np.concatenate(([0], starts))
+            if len(starts):
+                bounds = np.column_stack((starts, ends)).ravel()
+                peaks = np.maximum.reduceat(np.append(errors, 0), bounds)[::2]
+                starts = starts + first
+                if pending is not None:
+                    # The first run continues the carried one (it may be empty)
+                    starts[0] = pending[0]
+                    peaks[0] = max(pending[1], peaks[0] if ends[0] > 0 else 0)
+                    pending = None
+                if ends[-1] == count:
+                    # The last run continues into the next chunk
+                    pending = (int(starts[-1]), float(peaks[-1]))
+                    starts, ends, peaks = starts[:-1], ends[:-1], peaks[:-1]
+                segment_count += len(starts)
+                room = MAX_SEGMENTS - len(segments)
+                segments.extend((int(s), first + int(e), float(p))
+                                for s, e, p in zip(starts[:room], ends[:room], peaks[:room]))
+            del errors, out
+
+            # Done with these pages; let the kernel drop them
+            if hasattr(mm, 'madvise'):
+                aligned = offset // page * page
+                mm.madvise(mmap.MADV_DONTNEED, aligned, offset + 4 * count - aligned)
+
+    if pending is not None:
+        segment_count += 1
+        if len(segments) < MAX_SEGMENTS:
+            segments.append((pending[0], samples, pending[1]))
+
+    mean = total / samples
+    cumulative = np.cumsum(histogram)
+    p95_bin = int(np.searchsorted(cumulative, 0.95 * samples))
+    p95 = (p95_bin + 1) * width if p95_bin < HISTOGRAM_BINS else max(abs(low), abs(high))
+    return {
+        'kind': kind,
+        'unit': UNITS[kind],
+        'sample_rate': rate,
+        'samples': int(samples),
+        'duration_s': round(samples / rate, 1),
+        'tolerance': tolerance,
+        'mean': round(float(mean), 3),
+        'std': round(float(np.sqrt(max(total_sq / samples - mean * mean, 0))), 3),
+        'rms': round(float(np.sqrt(total_sq / samples)), 3),
+        'min': round(float(low), 3),
+        'max': round(float(high), 3),
+        'p95_abs': round(float(p95), 3),
+        'out_of_tolerance_pct': round(100 * out_samples / samples, 2),
+        'segments_total': segment_count,
+        'segments': [{'start_s': round(s / rate, 2), 'end_s': round(e / rate, 2), 'peak': round(p, 3)}
+                     for s, e, p in segments],
+    }
+
+
+def analyze(handle, tolerance=None):
+    """Analysis of a stored measurement file, computed once per file and tolerance."""
+    cache_id = f"{handle['sha256']}:{ANALYSIS_VERSION}:{tolerance or ''}"
+    cached = storage.fetch('measurement_analyses', cache_id)
+    if cached is not None:
+        return cached
+    result = dict(analyze_file(blobstore.path(handle), tolerance),
+                  id=cache_id, sha256=handle['sha256'], name=handle['name'])
+    try:
+        return storage.insert('measurement_analyses', result)
+    except sqlite3.IntegrityError:
+        # Another session analyzed it meanwhile
+        return storage.fetch('measurement_analyses', cache_id)
@@ -0,0 +1,359 @@
+import os
+import struct
+import zlib
+
+# --- PDF writer ---
+# Just enough PDF for generated documents: A4 pages of wrapped text in the
+# standard Helvetica fonts (nothing to embed), lines and polylines, JPEG and
+# plain PNG images, and files attached to the document (the viewer's
+# attachments panel). Objects are written to the output as soon as they are
+# complete and attached files are copied a chunk at a time, so memory use
+# does not grow with the size of what is packed.
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842    # A4, in points
+MARGIN = 50
+CHUNK_SIZE = 1024 * 1024
+
+# Helvetica advance widths (1/1000 em) for ' '..'~'; other characters use
+# DEFAULT_WIDTH. Bold text is measured with BOLD_FACTOR on top.
+_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+DEFAULT_WIDTH = 556
+BOLD_FACTOR = 1.08
+
+
+class PdfError(ValueError):
+    pass
+
+
+def text_width(text, size, bold=False):
+    units = sum(_WIDTHS[ord(c) - 32] if 32 <= ord(c) <= 126 else DEFAULT_WIDTH for c in text)
+    return units * size / 1000 * (BOLD_FACTOR if bold else 1)
+
+
+def wrap(text, size, width, bold=False):
+    """Lines of text no wider than 'width' points, breaking at spaces (and
+    inside words that do not fit on a line of their own)."""
+    lines = []
+    for paragraph in str(text).replace('\r\n', '\n').split('\n'):
+        line = ''
+        for word in paragraph.split(' '):
+            candidate = f'{line} {word}' if line else word
+            if text_width(candidate, size, bold) <= width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            while text_width(word, size, bold) > width:
+                cut = max(1, int(len(word) * width / text_width(word, size, bold)))
+                lines.append(word[:cut])
+                word = word[cut:]
+            line = word
+        lines.append(line)
+    return lines
+
+
+def _literal(text):
+    # PDF string in WinAnsi encoding; unmapped characters become '?'
+    data = str(text).encode('cp1252', 'replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)').replace(b'\r', b'\\r') + b')'
+
+
+def _unicode(text):
+    return b'<FEFF' + str(text).encode('utf-16-be').hex().upper().encode('ascii') + b'>'
+
+
+def _number(value):
+    return (f'{value:.2f}'.rstrip('0').rstrip('.') or '0').encode('ascii')
+
+
+# --- Images ---
+def _jpeg_info(path):
+    # (width, height, components) from the first start-of-frame marker
+    with open(path, 'rb') as f:
+        if f.read(2) != b'\xff\xd8':
+            raise PdfError('Not a JPEG image')
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                raise PdfError('Unreadable JPEG image')
+            if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+                continue
+            length = struct.unpack('>H', f.read(2))[0]
+            if marker[1] in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                _, height, width, components = struct.unpack('>BHHB', f.read(6))
+                return width, height, components
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def _png_info(path):
+    # (width, height, colour type, palette, IDAT (offset, length) list) of
+    # a PNG whose data PDF can take as is: 8 bits per sample, no
+    # interlacing, no alpha channel
+    chunks, palette = [], b''
+    with open(path, 'rb') as f:
+        if f.read(8) != b'\x89PNG\r\n\x1a\n':
+            raise PdfError('Not a PNG image')
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                raise PdfError('Truncated PNG image')
+            length, kind = struct.unpack('>I4s', head)
+            if kind == b'IHDR':
+                width, height, depth, colour, _, _, interlace = struct.unpack('>IIBBBBB', f.read(13))
+                if depth != 8 or interlace or colour not in (0, 2, 3):
+                    raise PdfError('only 8-bit PNG without alpha or interlacing is shown')
+                f.seek(4, os.SEEK_CUR)
+                continue
+            if kind == b'PLTE':
+                palette = f.read(length)
+            elif kind == b'IDAT':
+                chunks.append((f.tell(), length))
+                f.seek(length, os.SEEK_CUR)
+            elif kind == b'IEND':
+                return width, height, colour, palette, chunks
+            else:
+                f.seek(length, os.SEEK_CUR)
+            f.seek(4, os.SEEK_CUR)  # CRC
+
+
+def image_kind(name):
+    ext = os.path.splitext(name or '')[1].lower()
+    return {'.jpg': 'jpeg', '.jpeg': 'jpeg', '.png': 'png'}.get(ext)
+
+
+def check_image(path, name):
+    """Raise PdfError unless Document.image() can place the file."""
+    kind = image_kind(name)
+    if kind == 'jpeg':
+        if _jpeg_info(path)[2] not in (1, 3, 4):
+            raise PdfError('unsupported JPEG colour space')
+    elif kind == 'png':
+        _png_info(path)
+    else:
+        raise PdfError(f'{name} is not a JPEG or PNG image')
+
+
+class Document:
+    """A PDF written top to bottom onto a binary file object.
+
+        doc = Document(f, title='...')
+        doc.heading('Findings')
+        doc.text(report['findings'])
+        doc.close()
+    """
+
+    def __init__(self, out, title='', author=''):
+        self._out = out
+        self._offsets = {}
+        self._next = 5            # 1 catalog, 2 page tree, 3-4 fonts
+        self._pages = []
+        self._files = []          # (name, filespec object)
+        self._images = {}         # page resource name -> object
+        self._ops = []
+        self.y = None
+        self.title, self.author = title, author
+        self._write(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+        self._object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+        self._object(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+
+    # --- low level ---
+    def _write(self, data):
+        self._out.write(data)
+
+    def _tell(self):
+        return self._out.tell()
+
+    def _reserve(self):
+        number = self._next
+        self._next += 1
+        return number
+
+    def _object(self, number, body):
+        self._offsets[number] = self._tell()
+        self._write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+
+    def _stream(self, number, dictionary, data):
+        self._object(number, b'<< ' + dictionary + b' /Length %d >>\nstream\n' % len(data) + data + b'\nendstream')
+
+    def _stream_from_file(self, number, dictionary, path, spans):
+        # Stream copied from (offset, length) spans of a file
+        length = sum(n for _, n in spans)
+        self._offsets[number] = self._tell()
+        self._write(b'%d 0 obj\n<< ' % number + dictionary + b' /Length %d >>\nstream\n' % length)
+        with open(path, 'rb') as f:
+            for offset, n in spans:
+                f.seek(offset)
+                while n:
+                    data = f.read(min(n, CHUNK_SIZE))
+                    if not data:
+                        raise PdfError(f'{os.path.basename(path)} changed while it was being written')
+                    self._write(data)
+                    n -= len(data)
+        self._write(b'\nendstream\nendobj\n')
+
+    # --- pages ---
+    def new_page(self):
+        self._end_page()
+        self._ops = []
+        self._images = {}
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def _end_page(self):
+        if self.y is None:
+            return
+        content = self._reserve()
+        self._stream(content, b'/Filter /FlateDecode', zlib.compress(b'\n'.join(self._ops)))
+        images = b''.join(b'/%s %d 0 R ' % (name.encode('ascii'), number) for name, number in self._images.items())
+        page = self._reserve()
+        self._object(page, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R '
+                           b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> /XObject << %s>> >> >>'
+                     % (PAGE_WIDTH, PAGE_HEIGHT, content, images))
+        self._pages.append(page)
+        self.y = None
+
+    def space(self, height):
+        """Move down 'height' points, starting a new page when they do not fit."""
+        if self.y is None or self.y - height < MARGIN:
+            self.new_page()
+        self.y -= height
+
+    @property
+    def width(self):
+        return PAGE_WIDTH - 2 * MARGIN
+
+    # --- content ---
+    def line_of_text(self, text, size=10, bold=False, x=MARGIN, y=None):
+        y = self.y if y is None else y
+        self._ops.append(b'BT /%s %s Tf %s %s Td %s Tj ET' % (
+            b'F2' if bold else b'F1', _number(size), _number(x), _number(y), _literal(text)))
+
+    def text(self, text, size=10, bold=False, indent=0, leading=1.35):
+        """A paragraph, wrapped to the page width."""
+        for line in wrap(text, size, self.width - indent, bold):
+            self.space(size * leading)
+            self.line_of_text(line, size, bold, MARGIN + indent)
+
+    def heading(self, text, size=13):
+        self.space(size * 0.6)
+        self.text(text, size, bold=True)
+        self.space(2)
+        self.rule()
+
+    def rule(self, gray=0.7):
+        self._ops.append(b'%s G 0.5 w %d %s m %d %s l S 0 G' % (
+            _number(gray), MARGIN, _number(self.y), PAGE_WIDTH - MARGIN, _number(self.y)))
+
+    def table(self, rows, widths=None, size=9, header=True):
+        """Rows of cells, wrapped within their column; the first row is bold
+        when 'header'."""
+        if not rows:
+            return
+        columns = len(rows[0])
+        widths = widths or [self.width / columns] * columns
+        for i, row in enumerate(rows):
+            bold = header and i == 0
+            cells = [wrap(cell, size, width - 6, bold) for cell, width in zip(row, widths)]
+            for n in range(max(len(lines) for lines in cells)):
+                self.space(size * (1.5 if n == 0 else 1.25))
+                x = MARGIN
+                for lines, width in zip(cells, widths):
+                    if n < len(lines):
+                        self.line_of_text(lines[n], size, bold, x)
+                    x += width
+            if bold:
+                self._ops.append(b'0.8 G 0.5 w %d %s m %d %s l S 0 G' % (
+                    MARGIN, _number(self.y - 3), MARGIN + sum(widths), _number(self.y - 3)))
+
+    def polyline(self, points, height, labels=None):
+        """A box 'height' points tall with the (x, y) points scaled to fit it."""
+        self.space(height)
+        if len(points) < 2:
+            return
+        xs, ys = [p[0] for p in points], [p[1] for p in points]
+        x0, y0 = min(xs), min(ys)
+        scale = min(self.width / ((max(xs) - x0) or 1), (height - 10) / ((max(ys) - y0) or 1))
+        bottom = self.y + 5
+        path = [b'%s %s %s' % (_number(MARGIN + (x - x0) * scale), _number(bottom + (y - y0) * scale), op)
+                for (x, y), op in zip(points, [b'm'] + [b'l'] * (len(points) - 1))]
+        self._ops.append(b'0.8 G %d %s %s %s re S 0 G' % (MARGIN, _number(self.y), _number(self.width), _number(height)))
+        self._ops.append(b'0 0 0.6 RG 0.8 w ' + b' '.join(path) + b' S 0 G')
+        for (x, y), label in (labels or {}).items():
+            self.line_of_text(label, 7, x=MARGIN + (x - x0) * scale + 2, y=bottom + (y - y0) * scale + 2)
+
+    def image(self, path, name, max_height=None):
+        """Place a JPEG or PNG image scaled to the page width; raises
+        PdfError for images PDF cannot take without re-encoding."""
+        kind = image_kind(name)
+        if kind == 'jpeg':
+            width, height, components = _jpeg_info(path)
+            space = {1: b'/DeviceGray', 3: b'/DeviceRGB', 4: b'/DeviceCMYK'}.get(components)
+            if space is None:
+                raise PdfError('unsupported JPEG colour space')
+            number = self._reserve()
+            self._stream_from_file(number, b'/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s '
+                                           b'/BitsPerComponent 8 /Filter /DCTDecode' % (width, height, space),
+                                   path, [(0, os.path.getsize(path))])
+        elif kind == 'png':
+            width, height, colour, palette, chunks = _png_info(path)
+            colours = {0: 1, 2: 3, 3: 1}[colour]
+            space = {0: b'/DeviceGray', 2: b'/DeviceRGB'}.get(colour) or (
+                b'[/Indexed /DeviceRGB %d <%s>]' % (len(palette) // 3 - 1, palette.hex().encode('ascii')))
+            number = self._reserve()
+            self._stream_from_file(number, b'/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s '
+                                           b'/BitsPerComponent 8 /Filter /FlateDecode /DecodeParms '
+                                           b'<< /Predictor 15 /Colors %d /BitsPerComponent 8 /Columns %d >>'
+                                           % (width, height, space, colours, width), path, chunks)
+        else:
+            raise PdfError(f'{name} is not a JPEG or PNG image')
+        scale = min(self.width / width, (max_height or PAGE_HEIGHT - 2 * MARGIN - 40) / height, 1)
+        shown_w, shown_h = width * scale, height * scale
+        self.space(shown_h)
+        resource = f'Im{number}'
+        self._images[resource] = number
+        self._ops.append(b'q %s 0 0 %s %d %s cm /%s Do Q' % (
+            _number(shown_w), _number(shown_h), MARGIN, _number(self.y), resource.encode('ascii')))
+
+    def attach(self, path, name, mime=None):
+        """Attach a file to the document, copied from disk a chunk at a time."""
+        stream = self._reserve()
+        size = os.path.getsize(path)
+        subtype = b' /Subtype /' + mime.replace('/', '#2F').encode('ascii') if mime else b''
+        self._stream_from_file(stream, b'/Type /EmbeddedFile%s /Params << /Size %d >>' % (subtype, size),
+                               path, [(0, size)])
+        spec = self._reserve()
+        self._object(spec, b'<< /Type /Filespec /F %s /UF %s /EF << /F %d 0 R >> >>'
+                     % (_literal(name), _unicode(name), stream))
+        self._files.append((name, spec))
+
+    def close(self):
+        """Write the page tree, catalog and cross-reference table."""
+        if self.y is None and not self._pages:
+            self.new_page()
+        self._end_page()
+        self._object(2, b'<< /Type /Pages /Kids [%s] /Count %d >>'
+                     % (b' '.join(b'%d 0 R' % p for p in self._pages), len(self._pages)))
+        names = b''
+        if self._files:
+            # Name tree keys must be unique and sorted
+            entries = b' '.join(_literal(f'{i:04d} {name}') + b' %d 0 R' % spec
+                                for i, (name, spec) in enumerate(self._files))
+            names = b' /Names << /EmbeddedFiles << /Names [%s] >> >> /PageMode /UseAttachments' % entries
+        self._object(1, b'<< /Type /Catalog /Pages 2 0 R%s >>' % names)
+        info = self._reserve()
+        self._object(info, b'<< /Title %s /Author %s /Producer (gestionunite) >>'
+                     % (_unicode(self.title), _unicode(self.author)))
+        xref = self._tell()
+        self._write(b'xref\n0 %d\n0000000000 65535 f \n' % self._next)
+        for number in range(1, self._next):
+            # Objects reserved but never written (a failed image) are free
+            offset = self._offsets.get(number)
+            self._write(b'%010d 00000 n \n' % offset if offset is not None else b'0000000000 65535 f \n')
+        self._write(b'trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                    % (self._next, info, xref))
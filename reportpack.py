@@ -0,0 +1,414 @@
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+import numpy as np
+
+import blobstore
+import flightlog
+import measurements
+import pdf
+import storage
+
+# --- Mission report packs ---
+# A report pack is one PDF with everything reviewers need for a mission: the
+# report and its team, the flight log statistics and track, the measurement
+# analyses, image attachments shown inline, and the submitted files and
+# mission attachments attached to the PDF itself.
+#
+# Packs are rendered on a process pool, so generating a month of them
+# neither blocks the UI nor competes with it for the GIL. Each job is a
+# 'report_packs' record, queued by the page and updated by its worker with
+# its progress; any session (or process) sees it through the store. A pack
+# is identified by the mission and a hash of what goes into it (the report
+# version), so an unchanged report is rendered once and a revised one gets a
+# fresh pack.
+
+PACK_FORMAT = 1                     # bump when the layout changes
+WORKERS = int(os.environ.get('GESTIONUNITE_PACK_WORKERS', 2))
+STALE_AFTER = 600                   # seconds without progress before a job is restarted
+POLL_INTERVAL = 1                   # seconds between looks for queued jobs
+PROGRESS_INTERVAL = 2               # seconds between progress writes of a job
+MAX_ATTACHED_BYTES = 200 * 1048576  # files attached to one pack, in total
+MAX_IMAGE_BYTES = 20 * 1048576      # larger images are attached, not shown
+TRACK_POINTS = 2000                 # flight track plot resolution
+ACTIVE = ('queued', 'running')
+
+log = logging.getLogger(__name__)
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _files(report, mission):
+    # (label, handle) of the files that go into a pack
+    files = []
+    for field, label in (('report', 'Mission report'), ('flight_profile', 'Flight profile')):
+        holder = report.get(field) or {}
+        if holder.get('blob'):
+            files.append((label, holder['blob']))
+    for handle in report.get('measurements') or []:
+        files.append(('Measurement', handle))
+    for handle in (mission or {}).get('attachments') or []:
+        files.append(('Attachment', handle))
+    return files
+
+
+def version(report, mission=None):
+    """Hash of everything a pack shows; the review status is left out, so
+    reviewing a report does not invalidate its pack."""
+    content = {
+        'format': PACK_FORMAT,
+        'report': {k: v for k, v in report.items() if k != 'status'},
+        'mission': {k: (mission or {}).get(k) for k in ('groupchief', 'drone_id', 'attachments')},
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def pack_id(ref, report_version):
+    return f'{ref}:{report_version}'
+
+
+# --- Rendering ---
+def _track(handle):
+    # Decimated (x, y) of a flight log in metres east/north of its start
+    track = flightlog.read(blobstore.path(handle), handle['name'])
+    step = max(1, len(track[0]) // TRACK_POINTS)
+    lat, lon = track[1][::step], track[2][::step]
+    x = np.radians(lon - lon[0]) * np.cos(np.radians(lat[0])) * flightlog.EARTH_RADIUS_M
+    y = np.radians(lat - lat[0]) * flightlog.EARTH_RADIUS_M
+    return list(zip(x.tolist(), y.tolist()))
+
+
+def _size(handle):
+    return f"{(handle.get('size') or 0) / 1048576:,.1f} MiB"
+
+
+def render(report, mission, out, progress=None):
+    """Write the pack of a report to a binary file object. progress(fraction,
+    stage) is called as sections are done."""
+    progress = progress or (lambda fraction, stage: None)
+    ref = report['ref']
+    doc = pdf.Document(out, title=f'Mission {ref} report pack', author=report.get('data_analyst') or '')
+
+    progress(0.05, 'Report')
+    doc.text(f"Mission {ref} - {report.get('airport', '')}", size=18, bold=True)
+    doc.text(f'Report pack generated {_now()}', size=9)
+    doc.heading('Mission Details')
+    doc.table([
+        ['Airport', report.get('airport', '')],
+        ['Start Date', report.get('date_start', '')],
+        ['Completion Date', report.get('date_finish', '')],
+        ['Mission Status', report.get('mission_status', '')],
+        ['Drone', (mission or {}).get('drone_id') or '-'],
+        ['Submitted', report.get('timestamp', '')],
+    ], widths=[150, doc.width - 150], header=False)
+    doc.heading('Team')
+    doc.table([
+        ['Group Chief', (mission or {}).get('groupchief') or '-'],
+        ['Pilot', report.get('pilote', '')],
+        ['Data Analyst', report.get('data_analyst', '')],
+    ], widths=[150, doc.width - 150], header=False)
+    for field, title in (('findings', 'Findings'), ('actions', 'Actions Taken'), ('recommendations', 'Recommendations')):
+        doc.heading(title)
+        doc.text(report.get(field) or '-')
+
+    progress(0.15, 'Flight log')
+    stats = report.get('flight_stats')
+    if stats:
+        doc.heading('Flight Log')
+        doc.table([
+            ['Flight Time', f"{stats['duration_min']} min (airborne {stats['airborne_min']} min)"],
+            ['Distance', f"{stats['distance_nm']} NM"],
+            ['Altitude', f"{stats['alt_min_m']:.0f}-{stats['alt_max_m']:.0f} m (mean {stats['alt_mean_m']} m)"],
+            ['Speed', f"{stats['speed_mean_kt']} kt mean, {stats['speed_p99_kt']} kt 99th percentile"],
+            ['Max Vertical Speed', f"{stats['climb_max_ms']} m/s"],
+            ['Samples', f"{stats['samples']:,}"],
+        ], widths=[150, doc.width - 150], header=False)
+        path = stats.get('path')
+        if path:
+            gaps = ', '.join(f'{start}-{end} NM' for start, end in path['gaps_nm']) or 'none'
+            doc.text(f"Path coverage {path['coverage_pct']}% of {path['range_nm']} NM, "
+                     f"{path['on_path_min']} min on path; gaps: {gaps}", size=9)
+        handle = (report.get('flight_profile') or {}).get('blob')
+        if handle and flightlog.supported(handle.get('name')) and blobstore.exists(handle):
+            try:
+                points = _track(handle)
+            except flightlog.FlightLogError as e:
+                doc.text(f'Flight track not drawn: {e}', size=9)
+            else:
+                doc.space(6)
+                doc.text('Flight track (north up)', size=9, bold=True)
+                doc.polyline(points, 220, labels={points[0]: 'start', points[-1]: 'end'})
+
+    progress(0.3, 'Measurements')
+    rows = []
+    for handle in report.get('measurements') or []:
+        if not measurements.supported(handle.get('name')) or not blobstore.exists(handle):
+            continue
+        try:
+            result = measurements.analyze(handle)
+        except measurements.MeasurementError as e:
+            rows.append([handle['name'], str(e), '', '', '', ''])
+            continue
+        unit = result['unit']
+        rows.append([handle['name'], result['kind'], f"{result['duration_s']} s", f"{result['p95_abs']} {unit}",
+                     f"±{result['tolerance']} {unit}", f"{result['out_of_tolerance_pct']}%"])
+    if rows:
+        doc.heading('Measurements')
+        doc.table([['File', 'Kind', 'Duration', '95% |error|', 'Tolerance', 'Out of Tol.']] + rows,
+                  widths=[155, 60, 60, 80, 75, 65])
+
+    # Files: images shown on their own pages, everything attached while the
+    # attached total stays under MAX_ATTACHED_BYTES
+    files = _files(report, mission)
+    total = sum(handle.get('size') or 0 for _, handle in files) or 1
+    done = attached = 0
+    listing, images = [], []
+    for label, handle in files:
+        if not blobstore.exists(handle):
+            listing.append([label, handle['name'], _size(handle), 'missing from the store'])
+            continue
+        size = handle.get('size') or 0
+        if attached + size <= MAX_ATTACHED_BYTES:
+            progress(0.4 + 0.55 * done / total, f"Attaching {handle['name']}")
+            doc.attach(blobstore.path(handle), handle['name'], handle.get('type'))
+            attached += size
+            note = 'attached'
+        else:
+            note = 'not attached (pack size limit), download it from the app'
+        if pdf.image_kind(handle['name']) and size <= MAX_IMAGE_BYTES:
+            try:
+                pdf.check_image(blobstore.path(handle), handle['name'])
+                images.append(handle)
+                note += ', shown below'
+            except pdf.PdfError as e:
+                note += f', not shown: {e}'
+        listing.append([label, handle['name'], _size(handle), note])
+        done += size
+    if listing:
+        doc.heading('Files')
+        doc.table([['Kind', 'Name', 'Size', '']] + listing, widths=[85, 160, 55, 195])
+    progress(0.95, 'Images')
+    for handle in images:
+        doc.new_page()
+        doc.text(handle['name'], size=11, bold=True)
+        doc.image(blobstore.path(handle), handle['name'])
+    doc.close()
+
+
+# --- Jobs ---
+# Jobs are rendered by a dispatcher process ('python -m reportpack'), started
+# on the first request, that claims queued jobs from the store and runs them
+# on its process pool. The pool is not started from the server process
+# itself: Streamlit installs each page script as __main__, and spawned
+# workers would import (and so run) it again.
+def _progress(job_id):
+    # Each write invalidates every process's cached jobs: keep them sparse
+    last = [0]
+
+    def report(fraction, stage):
+        if time.monotonic() - last[0] >= PROGRESS_INTERVAL:
+            storage.update('report_packs', job_id, {'progress': round(fraction, 3), 'stage': stage, 'updated': _now()})
+            last[0] = time.monotonic()
+    return report
+
+
+def _run(job_id):
+    # Runs in a pool process
+    storage.init()
+    job = storage.fetch('report_packs', job_id)
+    if job is None:
+        return
+    try:
+        report = storage.fetch('submitted_reports', job['ref'])
+        if report is None:
+            raise LookupError(f"No report for mission {job['ref']}")
+        mission = storage.fetch('missions', job['ref'])
+        os.makedirs(blobstore.BLOB_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=blobstore.BLOB_DIR, suffix='.pdf')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                render(report, mission, out, _progress(job_id))
+            handle = blobstore.put_path(tmp_path, f"mission_{job['ref']}_pack.pdf", 'application/pdf')
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    except Exception as e:
+        log.exception('Report pack %s failed', job_id)
+        storage.update('report_packs', job_id, {'status': 'failed', 'error': str(e), 'updated': _now()})
+        return
+    storage.update('report_packs', job_id, {'status': 'done', 'progress': 1.0, 'stage': 'Done',
+                                            'blob': handle, 'updated': _now()})
+    # Packs of earlier versions of the report are superseded
+    for old in storage.find('report_packs', ref=job['ref']):
+        if old['id'] != job_id and old['status'] not in ACTIVE:
+            storage.delete('report_packs', old['id'])
+
+
+def _stale(job):
+    try:
+        idle = datetime.now() - datetime.strptime(job.get('updated') or '', '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return True
+    return idle.total_seconds() > STALE_AFTER
+
+
+def _claim(limit):
+    # Queued jobs, oldest first, and running ones nobody has updated for
+    # STALE_AFTER (their dispatcher died), marked running in one transaction
+    # so that two dispatchers never take the same job
+    with storage.atomic() as tx:
+        candidates = tx.find('report_packs', status='queued') + [
+            job for job in tx.find('report_packs', status='running') if _stale(job)]
+        candidates.sort(key=lambda j: j.get('requested') or '')
+        return [tx.update('report_packs', job['id'], {'status': 'running', 'stage': 'Starting', 'updated': _now()})
+                for job in candidates[:limit]]
+
+
+def _new_pool():
+    return ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context('spawn'))
+
+
+def dispatch(parent=None):
+    """Render queued jobs until the parent process exits (forever without one)."""
+    storage.init()
+    pool = _new_pool()
+    running = {}    # future -> job id
+    while parent is None or os.getppid() == parent:
+        if len(running) < WORKERS:
+            for job in _claim(WORKERS - len(running)):
+                running[pool.submit(_run, job['id'])] = job['id']
+        if not running:
+            time.sleep(POLL_INTERVAL)
+            continue
+        done, _ = wait(running, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+        for future in done:
+            job_id = running.pop(future, None)
+            error = future.exception()
+            if job_id is None or error is None:
+                continue
+            # The worker died (killed, out of memory...): record it, and
+            # replace the pool if that broke it
+            log.error('Report pack %s: %s', job_id, error)
+            storage.update('report_packs', job_id, {'status': 'failed', 'error': str(error) or type(error).__name__,
+                                                    'updated': _now()})
+            if isinstance(error, BrokenProcessPool):
+                for other, other_id in running.items():
+                    storage.update('report_packs', other_id, {'status': 'queued', 'stage': 'Queued', 'updated': _now()})
+                running = {}
+                pool = _new_pool()
+    # Jobs still running are picked up again once they go stale
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def start_dispatcher():
+    """Start this process's dispatcher unless it is running; it exits with
+    the process."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None or _dispatcher.poll() is not None:
+            _dispatcher = subprocess.Popen([sys.executable, '-m', 'reportpack', '--parent', str(os.getpid())],
+                                           cwd=os.path.dirname(os.path.abspath(__file__)))
+    return _dispatcher
+
+
+def request(ref):
+    """The pack job of a report's current version, queued for rendering
+    unless it is already done or under way. None if there is no report."""
+    report = storage.fetch('submitted_reports', ref)
+    if report is None:
+        return None
+    job_id = pack_id(ref, version(report, storage.fetch('missions', ref)))
+    with storage.atomic() as tx:
+        job = tx.fetch('report_packs', job_id)
+        if job is not None and (job['status'] == 'done' and blobstore.exists(job.get('blob'))
+                                or job['status'] in ACTIVE and not _stale(job)):
+            return job
+        fields = {'status': 'queued', 'progress': 0.0, 'stage': 'Queued', 'error': None, 'blob': None,
+                  'requested': _now(), 'updated': _now()}
+        if job is None:
+            job = tx.insert('report_packs', dict(fields, id=job_id, ref=ref))
+        else:
+            job = tx.update('report_packs', job_id, fields)
+    start_dispatcher()
+    return job
+
+
+def request_many(refs):
+    return [job for job in map(request, refs) if job is not None]
+
+
+def current(ref):
+    """The pack job of a report's current version, or None if none was requested."""
+    report = storage.fetch('submitted_reports', ref)
+    if report is None:
+        return None
+    return storage.fetch('report_packs', pack_id(ref, version(report, storage.fetch('missions', ref))))
+
+
+def months():
+    """'YYYY-MM' months from the latest report submission back to the first."""
+    first, last = storage.span('submitted_reports', 'timestamp')
+    if first is None:
+        return []
+    year, month = int(last[:4]), int(last[5:7])
+    result = []
+    while f'{year:04d}-{month:02d}' >= first[:7]:
+        result.append(f'{year:04d}-{month:02d}')
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return result
+
+
+def submitted_in(month, batch=500):
+    """Refs of the reports submitted in a month ('YYYY-MM'), oldest first."""
+    refs, cursor = [], None
+    while True:
+        records, cursor = storage.page('submitted_reports', limit=batch, cursor=cursor, descending=False,
+                                       between={'timestamp': (f'{month}-01', f'{month}-31 \uffff')})
+        refs.extend(r['ref'] for r in records)
+        if cursor is None:
+            return refs
+
+
+def active(batch=500):
+    """Jobs queued or rendering, oldest request first."""
+    # Read from the status index rather than the cache, which every progress
+    # write of a worker invalidates
+    jobs = []
+    for status in ACTIVE:
+        cursor = None
+        while True:
+            records, cursor = storage.page('report_packs', limit=batch, cursor=cursor, status=status)
+            jobs.extend(records)
+            if cursor is None:
+                break
+    return sorted(jobs, key=lambda j: j.get('requested') or '')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render queued mission report packs.')
+    parser.add_argument('--parent', type=int, help='exit when this process does')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    dispatch(args.parent)
+
+
+if __name__ == '__main__':
+    main()
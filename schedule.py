@@ -0,0 +1,193 @@
+import heapq
+import threading
+
+import storage
+from intervals import IntervalTree
+
+# --- Scheduling ---
+# Every person (group chief, pilot, data analyst) and drone named on a
+# mission is booked over the mission's dates. A storage listener keeps one
+# interval tree per person/drone, so checking a mission against the whole
+# calendar costs a handful of O(log n + k) lookups, and re-validating the
+# calendar is one sweep per resource.
+
+CREW_FIELDS = {'groupchief': 'Group Chief', 'pilote': 'Pilot', 'data_analyst': 'Data Analyst'}
+
+
+def mission_span(mission):
+    """(start, finish) a mission occupies its crew and drone, or None."""
+    start = mission.get('date_start')
+    if not start or mission.get('assignment') == 'Rejected':
+        return None
+    finish = mission.get('date_finish') or start
+    return str(start), max(str(start), str(finish))
+
+
+def resources(mission):
+    """[(resource, label)] booked by a mission; people match case-insensitively."""
+    booked = []
+    for field, role in CREW_FIELDS.items():
+        name = str(mission.get(field) or '').strip()
+        if name:
+            booked.append((('person', name.lower()), f'{role} {name}'))
+    drone_id = mission.get('drone_id')
+    if drone_id:
+        booked.append((('drone', drone_id), f'Drone {drone_id}'))
+    # A person holding two roles on one mission is booked once
+    return list({resource: (resource, label) for resource, label in booked}.values())
+
+
+def _conflict(label, ref, other, start, finish, other_start, other_finish):
+    return {
+        'resource': label,
+        'mission': ref,
+        'conflicts_with': other,
+        'from': max(start, other_start),
+        'to': min(finish, other_finish),
+    }
+
+
+class Schedule:
+    collections = ('missions',)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trees = {}     # resource -> IntervalTree of mission refs (value: label)
+        self._booked = {}    # mission ref -> [resource]
+
+    # --- storage listener ---
+    def reset(self, name, records):
+        with self._lock:
+            self._trees = {}
+            self._booked = {}
+            for mission in records:
+                self._book(mission)
+
+    def change(self, name, old, new):
+        with self._lock:
+            if old is not None:
+                self._unbook(old['ref'])
+            if new is not None:
+                self._book(new)
+
+    def _book(self, mission):
+        span = mission_span(mission)
+        if span is None:
+            return
+        ref = mission['ref']
+        booked = []
+        for resource, label in resources(mission):
+            self._trees.setdefault(resource, IntervalTree()).add(span[0], span[1], ref, label)
+            booked.append(resource)
+        self._booked[ref] = booked
+
+    def _unbook(self, ref):
+        for resource in self._booked.pop(ref, ()):
+            tree = self._trees[resource]
+            tree.remove(ref)
+            if not len(tree):
+                del self._trees[resource]
+
+    # --- queries ---
+    def conflicts(self, mission, ignore=()):
+        """Bookings of the mission's crew and drone that overlap its dates."""
+        span = mission_span(mission)
+        if span is None:
+            return []
+        ref = mission.get('ref')
+        found = []
+        with self._lock:
+            for resource, label in resources(mission):
+                tree = self._trees.get(resource)
+                if tree is None:
+                    continue
+                for start, finish, other, _ in tree.overlapping(*span):
+                    if other != ref and other not in ignore:
+                        found.append(_conflict(label, ref, other, *span, start, finish))
+        return found
+
+    def check_batch(self, missions):
+        """Conflicts of a set of new/edited missions, with the calendar and each other."""
+        refs = {m.get('ref') for m in missions}
+        found = []
+        by_resource = {}
+        for mission in missions:
+            found += self.conflicts(mission, ignore=refs)
+            span = mission_span(mission)
+            if span is not None:
+                for resource, label in resources(mission):
+                    by_resource.setdefault(resource, []).append((span[0], span[1], mission.get('ref'), label))
+        for spans in by_resource.values():
+            found += _sweep(spans)
+        return found
+
+    def validate_all(self):
+        """Every double booking in the calendar, each pair once."""
+        with self._lock:
+            trees = list(self._trees.values())
+            return [c for tree in trees for c in _sweep(tree.intervals())]
+
+    def bookings(self, resource, start=None, finish=None):
+        """[(start, finish, mission ref)] of one resource, optionally within a window."""
+        with self._lock:
+            tree = self._trees.get(resource)
+            if tree is None:
+                return []
+            if start is None and finish is None:
+                spans = tree.intervals()
+            else:
+                spans = tree.overlapping(start or '', finish or '9999-12-31')
+            return [(s, f, ref) for s, f, ref, _ in spans]
+
+
+def _sweep(spans):
+    # Overlapping pairs among [(start, finish, ref, label)]: walk by start,
+    # keeping the spans still open in a heap by finish
+    found = []
+    open_spans = []
+    ordered = sorted(spans, key=lambda s: (s[0], str(s[2])))
+    for i, (start, finish, ref, label) in enumerate(ordered):
+        while open_spans and open_spans[0][0] < start:
+            heapq.heappop(open_spans)
+        for other_finish, _, other_start, other in open_spans:
+            found.append(_conflict(label, ref, other, start, finish, other_start, other_finish))
+        heapq.heappush(open_spans, (finish, i, start, ref))
+    return found
+
+
+_schedule = None
+_schedule_lock = threading.Lock()
+
+
+def get_schedule():
+    global _schedule
+    if _schedule is None:
+        with _schedule_lock:
+            if _schedule is None:
+                schedule = Schedule()
+                storage.add_listener(schedule)
+                _schedule = schedule
+    return _schedule
+
+
+def _current():
+    schedule = get_schedule()
+    # Pick up writes made by other processes
+    storage.refresh(*Schedule.collections)
+    return schedule
+
+
+def conflicts(mission):
+    return _current().conflicts(mission)
+
+
+def check_batch(missions):
+    return _current().check_batch(missions)
+
+
+def validate_all():
+    return _current().validate_all()
+
+
+def bookings(resource, start=None, finish=None):
+    return _current().bookings(resource, start, finish)
@@ -0,0 +1,280 @@
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+
+import storage
+
+# --- Global search ---
+# Inverted index over the searchable text of missions, problem reports,
+# mission reports, maintenance records and drones. It is registered as a storage
+# listener, so every insert/edit/delete updates only the postings of the
+# record that changed; nothing is rebuilt on rerun.
+#
+# A query token matches index terms exactly, by prefix (bisect over the
+# sorted vocabulary) or, failing both, by trigram overlap (typos, inner
+# substrings). Results are ranked by match quality x field weight x idf.
+
+# collection -> (title builder, {field: weight})
+SEARCH_FIELDS = {
+    'missions': (
+        lambda r: f"Mission {r['ref']} - {r.get('airport', '')}",
+        {'ref': 3.0, 'airport': 2.0, 'drone_id': 2.0, 'problem': 1.0, 'groupchief': 1.0, 'pilote': 1.0,
+         'data_analyst': 1.0},
+    ),
+    'problem_reports': (
+        lambda r: f"Problem #{r['id']} - {r.get('airport', '')} {r.get('system', '')}",
+        {'id': 3.0, 'airport': 2.0, 'system': 1.5, 'description': 1.0, 'impact': 0.5},
+    ),
+    'submitted_reports': (
+        lambda r: f"Mission report {r['ref']} - {r.get('airport', '')}",
+        {'ref': 3.0, 'airport': 2.0, 'findings': 1.0, 'actions': 0.8, 'recommendations': 0.8},
+    ),
+    'maintenance_log': (
+        lambda r: f"Maintenance {r.get('equipment', '')} - {r.get('type', '')} ({r.get('date', '')})",
+        {'equipment': 3.0, 'type': 1.5, 'description': 1.0, 'parts': 1.0, 'findings': 1.0, 'actions': 0.8},
+    ),
+    'drones': (
+        lambda r: f"Drone {r['drone_id']} - {r.get('model', '')}",
+        {'drone_id': 3.0, 'model': 1.5, 'home_base': 1.0},
+    ),
+}
+
+EXACT, PREFIX, FUZZY = 1.0, 0.7, 0.4
+MAX_PREFIX_TERMS = 64
+MIN_TRIGRAM_SIMILARITY = 0.4
+
+_TOKEN_RE = re.compile(r'[0-9a-zà-ÿ]+')
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def trigrams(term):
+    padded = f'  {term} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SortedTerms:
+    """Sorted vocabulary kept in buckets of up to 2 * BUCKET terms, so that
+    adding or removing a term shifts one bucket rather than every term."""
+    BUCKET = 512
+
+    def __init__(self):
+        self._buckets = []
+        self._maxes = []         # last term of each bucket
+
+    def add(self, term):
+        if not self._buckets:
+            self._buckets.append([term])
+            self._maxes.append(term)
+            return
+        i = min(bisect_left(self._maxes, term), len(self._buckets) - 1)
+        bucket = self._buckets[i]
+        insort(bucket, term)
+        self._maxes[i] = bucket[-1]
+        if len(bucket) > 2 * self.BUCKET:
+            self._buckets[i:i + 1] = [bucket[:self.BUCKET], bucket[self.BUCKET:]]
+            self._maxes[i:i + 1] = [bucket[self.BUCKET - 1], bucket[-1]]
+
+    def remove(self, term):
+        i = bisect_left(self._maxes, term)
+        bucket = self._buckets[i]
+        del bucket[bisect_left(bucket, term)]
+        if bucket:
+            self._maxes[i] = bucket[-1]
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+
+    def starting_at(self, term):
+        """Terms from 'term' on, in order."""
+        i = bisect_left(self._maxes, term)
+        for j in range(i, len(self._buckets)):
+            bucket = self._buckets[j]
+            yield from bucket[bisect_left(bucket, term) if j == i else 0:]
+
+
+class SearchIndex:
+    collections = tuple(SEARCH_FIELDS)
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = {}      # term -> {doc: weight}
+        self._by_weight = {}     # term -> {weight: {doc: None}}, for top-k cut-off
+        self._doc_terms = {}     # doc -> {term: weight}, to unindex on edit
+        self._titles = {}        # doc -> display title
+        self._vocab = SortedTerms()  # for prefix lookups
+        self._trigrams = {}      # trigram -> {term}
+
+    # --- storage listener ---
+    def reset(self, name, records):
+        with self._lock:
+            for doc in [d for d in self._doc_terms if d[0] == name]:
+                self._remove(doc)
+            for record in records:
+                self._add(name, record)
+
+    def change(self, name, old, new):
+        with self._lock:
+            key_field = storage.COLLECTIONS[name]['key']
+            if old is not None:
+                self._remove((name, str(old[key_field])))
+            if new is not None:
+                self._add(name, new)
+
+    # --- maintenance ---
+    def _add(self, name, record):
+        title, fields = SEARCH_FIELDS[name]
+        doc = (name, str(record[storage.COLLECTIONS[name]['key']]))
+        terms = {}
+        for field, weight in fields.items():
+            value = record.get(field)
+            if value in (None, ''):
+                continue
+            for term in tokenize(value):
+                terms[term] = max(terms.get(term, 0), weight)
+        self._doc_terms[doc] = terms
+        self._titles[doc] = title(record)
+        for term, weight in terms.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = {}
+                self._by_weight[term] = {}
+                self._vocab.add(term)
+                for tri in trigrams(term):
+                    self._trigrams.setdefault(tri, set()).add(term)
+            posting[doc] = weight
+            self._by_weight[term].setdefault(weight, {})[doc] = None
+
+    def _remove(self, doc):
+        terms = self._doc_terms.pop(doc, None)
+        self._titles.pop(doc, None)
+        for term, weight in (terms or {}).items():
+            posting = self._postings[term]
+            posting.pop(doc, None)
+            bucket = self._by_weight[term][weight]
+            bucket.pop(doc, None)
+            if not bucket:
+                del self._by_weight[term][weight]
+            if not posting:
+                del self._postings[term]
+                del self._by_weight[term]
+                self._vocab.remove(term)
+                for tri in trigrams(term):
+                    bucket = self._trigrams[tri]
+                    bucket.discard(term)
+                    if not bucket:
+                        del self._trigrams[tri]
+
+    # --- querying ---
+    def _matches(self, token):
+        # term -> match quality
+        found = {}
+        if token in self._postings:
+            found[token] = EXACT
+        for term in self._vocab.starting_at(token):
+            if len(found) >= MAX_PREFIX_TERMS or not term.startswith(token):
+                break
+            found.setdefault(term, PREFIX)
+        if not found and len(token) >= 3:
+            grams = trigrams(token)
+            shared = {}
+            for tri in grams:
+                for term in self._trigrams.get(tri, ()):
+                    shared[term] = shared.get(term, 0) + 1
+            for term, n in shared.items():
+                similarity = n / len(grams | trigrams(term))
+                if similarity >= MIN_TRIGRAM_SIMILARITY:
+                    found[term] = FUZZY * similarity
+        return found
+
+    def search(self, query, limit=20):
+        """Ranked [(score, collection, key, title)]; every query token must match."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            total = max(len(self._doc_terms), 1)
+            # (term, quality, idf) per token, rarest token first so the
+            # candidate set starts small and later tokens only probe it
+            per_token = []
+            for token in tokens:
+                matched = [
+                    (term, quality, math.log(1 + total / len(self._postings[term])))
+                    for term, quality in self._matches(token).items()
+                ]
+                if not matched:
+                    return []
+                per_token.append(matched)
+            if len(per_token) == 1:
+                return self._top_single(per_token[0], limit)
+            per_token.sort(key=lambda matched: sum(len(self._postings[t]) for t, _, _ in matched))
+
+            scores = {}
+            for term, quality, idf in per_token[0]:
+                for doc, weight in self._postings[term].items():
+                    score = quality * weight * idf
+                    if score > scores.get(doc, 0):
+                        scores[doc] = score
+            for matched in per_token[1:]:
+                next_scores = {}
+                for doc, total_score in scores.items():
+                    best = 0
+                    for term, quality, idf in matched:
+                        weight = self._postings[term].get(doc)
+                        if weight is not None and quality * weight * idf > best:
+                            best = quality * weight * idf
+                    if best:
+                        next_scores[doc] = total_score + best
+                scores = next_scores
+                if not scores:
+                    return []
+            ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [(score, doc[0], doc[1], self._titles[doc]) for doc, score in ranked]
+
+    def _top_single(self, matched, limit):
+        # One query token: walk (term, weight) buckets from the best score
+        # down; the first time a doc is seen is its best score, so we can
+        # stop as soon as 'limit' docs are collected.
+        buckets = sorted(
+            ((quality * weight * idf, docs)
+             for term, quality, idf in matched
+             for weight, docs in self._by_weight[term].items()),
+            key=lambda item: item[0], reverse=True
+        )
+        results = {}
+        for score, docs in buckets:
+            for doc in docs:
+                if doc not in results:
+                    results[doc] = score
+                    if len(results) >= limit:
+                        break
+            if len(results) >= limit:
+                break
+        return [(score, doc[0], doc[1], self._titles[doc]) for doc, score in results.items()]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """The process-wide index, built once on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = SearchIndex()
+                storage.add_listener(index)
+                _index = index
+    return _index
+
+
+def search(query, limit=20):
+    index = get_index()
+    # Pick up writes made by other processes before answering
+    storage.refresh(*SearchIndex.collections)
+    return index.search(query, limit)
@@ -0,0 +1,151 @@
+import uuid
+from datetime import datetime
+
+import storage
+
+# --- Spare parts stock ---
+# Every stock movement is an entry appended to the 'parts_ledger' collection:
+# the opening balance, receipts, usages and count corrections, each with the
+# signed quantity it moved and the balance it left. The part's 'qty' field is
+# the materialized current balance; it is changed in the same transaction as
+# the ledger entry is written, so the two never disagree.
+#
+# Every movement carries an operation id. Replaying an operation (a form
+# submitted twice, a retried request) finds the entry already written and
+# returns it instead of moving stock again. Usages are checked against the
+# balance inside the write lock, so concurrent technicians cannot take more
+# than is on the shelf.
+
+KINDS = ('opening', 'receipt', 'usage', 'adjustment')
+
+
+class InsufficientStock(Exception):
+    def __init__(self, part, requested):
+        super().__init__(f"Only {part['qty']} {part['name']}(s) available, {requested} requested")
+        self.part = part
+        self.requested = requested
+
+
+class StockChanged(Exception):
+    def __init__(self, part, expected):
+        super().__init__(f"{part['name']} stock changed from {expected} to {part['qty']} meanwhile")
+        self.part = part
+        self.expected = expected
+
+
+def new_op_id():
+    return uuid.uuid4().hex
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _move(tx, op_id, part, kind, qty, user, note):
+    balance = int(part.get('qty') or 0) + qty
+    tx.update('spare_parts', part['part_id'], {'qty': balance})
+    return tx.insert('parts_ledger', {
+        'op_id': op_id or new_op_id(),
+        'part_id': part['part_id'],
+        'name': part.get('name'),
+        'kind': kind,
+        'qty': qty,
+        'balance': balance,
+        'date': _now(),
+        'user': user,
+        'note': note,
+    })
+
+
+def _part(tx, part_id):
+    part = tx.fetch('spare_parts', part_id)
+    if part is None:
+        raise KeyError(f'spare_parts: no record with key {part_id!r}')
+    return part
+
+
+def add_part(part, user='', op_id=None):
+    """Create a part; its starting quantity is booked as the opening entry."""
+    qty = int(part.get('qty') or 0)
+    with storage.atomic() as tx:
+        if op_id and tx.fetch('parts_ledger', op_id):
+            return tx.fetch('spare_parts', part['part_id'])
+        part = tx.insert('spare_parts', dict(part, qty=0))
+        _move(tx, op_id, part, 'opening', qty, user, 'New part')
+        return tx.fetch('spare_parts', part['part_id'])
+
+
+def receive(part_id, qty, user='', note='', op_id=None):
+    """Add received stock; returns the ledger entry."""
+    if qty <= 0:
+        raise ValueError('Received quantity must be positive')
+    with storage.atomic() as tx:
+        done = op_id and tx.fetch('parts_ledger', op_id)
+        if done:
+            return done
+        return _move(tx, op_id, _part(tx, part_id), 'receipt', qty, user, note)
+
+
+def use(part_id, qty, user='', note='', op_id=None):
+    """Take stock out; raises InsufficientStock rather than going below zero."""
+    if qty <= 0:
+        raise ValueError('Used quantity must be positive')
+    with storage.atomic() as tx:
+        done = op_id and tx.fetch('parts_ledger', op_id)
+        if done:
+            return done
+        part = _part(tx, part_id)
+        # Compare and decrement under the write lock
+        if int(part.get('qty') or 0) < qty:
+            raise InsufficientStock(part, qty)
+        return _move(tx, op_id, part, 'usage', -qty, user, note)
+
+
+def count(part_id, qty, expected=None, user='', note='', op_id=None):
+    """Correct the balance to a physical count; returns the entry, or None if
+    nothing changed. With 'expected' (the balance the count was made against),
+    raises StockChanged if stock moved in the meantime."""
+    if qty < 0:
+        raise ValueError('Stock cannot be negative')
+    with storage.atomic() as tx:
+        done = op_id and tx.fetch('parts_ledger', op_id)
+        if done:
+            return done
+        part = _part(tx, part_id)
+        current = int(part.get('qty') or 0)
+        if expected is not None and current != expected:
+            raise StockChanged(part, expected)
+        if qty == current:
+            return None
+        return _move(tx, op_id, part, 'adjustment', qty - current, user, note or 'Stock count')
+
+
+def history(part_id=None, limit=20, cursor=None):
+    """Ledger entries, newest first, as one page: (entries, next_cursor)."""
+    where = {'part_id': part_id} if part_id else {}
+    return storage.page('parts_ledger', limit=limit, cursor=cursor, **where)
+
+
+def balances():
+    """{part_id: quantity} summed from the ledger."""
+    totals = {}
+    for entry in storage.fetch_all('parts_ledger'):
+        totals[entry['part_id']] = totals.get(entry['part_id'], 0) + int(entry['qty'])
+    return totals
+
+
+def rebuild():
+    """Reset the materialized quantities to the ledger sums; returns the
+    {part_id: (was, now)} that differed."""
+    fixed = {}
+    with storage.atomic() as tx:
+        totals = balances()
+        for part in storage.fetch_all('spare_parts'):
+            part = tx.fetch('spare_parts', part['part_id'])
+            if part is None:
+                continue
+            total = totals.get(part['part_id'], 0)
+            if int(part.get('qty') or 0) != total:
+                fixed[part['part_id']] = (part.get('qty'), total)
+                tx.update('spare_parts', part['part_id'], {'qty': total})
+    return fixed
@@ -0,0 +1,793 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import blobstore
+from indexed import IndexedCollection
+
+# --- Shared data store ---
+# Every collection used by the app lives in one SQLite database shared by all
+# sessions of the process (and by every process pointing at the same file).
+# Each collection is a table holding the record as JSON plus a few indexed
+# columns copied out of it so that lookups and filters never scan the JSON.
+# Reads are served from an IndexedCollection cache per collection, kept in
+# step with the database through a generation counter bumped on every write.
+# Each write also logs the keys it touched under its generation ('changes'),
+# so a cache that missed writes (made by another process, or by another
+# session in between) re-reads only those records; listeners are told of
+# each change as for local writes. Bulk writes, and caches older than the
+# pruned log, reload the collection.
+# Each table also has a 'sort_key' column (the collection's default order,
+# see 'sort' below) so that paged listings are answered by SQLite directly.
+
+DB_PATH = os.environ.get(
+    'GESTIONUNITE_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gestionunite.db')
+)
+
+COLLECTIONS = {
+    'missions': {'key': 'ref', 'columns': ['status', 'assignment', 'airport', 'date_start', 'drone_id',
+                                           'groupchief', 'pilote', 'data_analyst'],
+                 'sort': lambda r: r.get('date_start') or ''},
+    # High priority first, then most recent
+    'problem_reports': {'key': 'id', 'columns': ['status', 'airport', 'reporter', 'date'],
+                        'sort': lambda r: f"{1 if r.get('priority') == 'High' else 0} {r.get('date') or ''}"},
+    'submitted_reports': {'key': 'ref', 'columns': ['status', 'airport', 'timestamp'],
+                          'sort': lambda r: r.get('timestamp') or ''},
+    # All maintenance work, by date (see maintenance.py)
+    'maintenance_log': {'key': 'id', 'columns': ['equipment', 'date', 'status'],
+                        'sort': lambda r: f"{r.get('date') or ''} {r.get('timestamp') or ''}"},
+    'spare_parts': {'key': 'part_id', 'columns': ['name']},
+    'parts_usage_history': {'key': 'id', 'columns': ['part_id', 'date'],
+                            'sort': lambda r: r.get('date') or ''},
+    # Append-only stock movements, see stock.py
+    'parts_ledger': {'key': 'op_id', 'columns': ['part_id', 'kind', 'date'],
+                     'sort': lambda r: r.get('date') or ''},
+    'certs': {'key': 'id', 'columns': ['exp', 'drone_id']},
+    # Document library: one record per document, its uploads as versions
+    # (see documents.py); listed by name within each category
+    'downloads': {'key': 'id', 'columns': ['type', 'slug', 'name'],
+                  'sort': lambda r: (r.get('name') or '').lower()},
+    'users_list': {'key': 'username', 'columns': ['role', 'status']},
+    'atsep_notifications': {'key': 'id', 'columns': ['type', 'mission_ref']},
+    'drones': {'key': 'drone_id', 'columns': ['status']},
+    # Resumable uploads in progress or done, see uploads.py
+    'uploads': {'key': 'id', 'columns': ['status', 'mission_ref']},
+    # Cached measurement file analyses, see measurements.py
+    'measurement_analyses': {'key': 'id', 'columns': ['sha256']},
+    # Mission report pack jobs and their PDFs, see reportpack.py
+    'report_packs': {'key': 'id', 'columns': ['ref', 'status'],
+                     'sort': lambda r: r.get('requested') or ''},
+    # Raised by background checks (certificate expiry...), newest first
+    'alerts': {'key': 'id', 'columns': ['kind', 'status'],
+               'sort': lambda r: r.get('timestamp') or ''},
+}
+
+# Seed data, written once when the database is created
+SEED_DATA = {
+    'missions': [
+        {'ref': 'M001', 'airport': 'JFK', 'date_start': '2025-05-01', 'date_finish': '2025-05-03',
+         'duration': '2d', 'problem': 'Radar issue', 'status': 'En cours', 'assignment': 'New',
+         'groupchief': 'houcine', 'pilote': 'ahmed', 'data_analyst': 'sara', 'drone_id': 'D001'},
+        {'ref': 'M002', 'airport': 'LAX', 'date_start': '2025-04-20', 'date_finish': '2025-04-22',
+         'duration': '2d', 'problem': 'Comms check', 'status': 'Done', 'assignment': 'Accepted',
+         'groupchief': 'hassan', 'pilote': 'jamal', 'data_analyst': 'salma', 'drone_id': 'D002'},
+    ],
+    'maintenance_log': [
+        {'equipment': 'D002', 'date': '2025-04-15', 'type': 'Repair', 'status': 'Completed', 'technician': 'houcine',
+         'description': 'Motor replaced', 'parts': 'Motor', 'findings': '', 'actions': '', 'next_date': None,
+         'timestamp': '2025-04-15 14:30:00'},
+        {'equipment': 'D001', 'date': '2025-05-10', 'type': 'Calibration', 'status': 'Completed', 'technician': 'houcine',
+         'description': 'Annual calibration', 'parts': '', 'findings': '', 'actions': '', 'next_date': None,
+         'timestamp': '2025-05-10 10:00:00'},
+    ],
+    'spare_parts': [
+        {'part_id': 'P001', 'name': 'Propeller', 'desc': 'Main propeller', 'qty': 10, 'min': 5},
+        {'part_id': 'P002', 'name': 'Battery', 'desc': 'LiPo battery', 'qty': 3, 'min': 5},
+    ],
+    'certs': [
+        {'name': 'Calib2025', 'validation': '1 year', 'acq': '2025-01-01', 'exp': '2026-01-01', 'file': 'calib2025.pdf', 'filedata': b'Sample certificate 2025', 'drone_id': 'D001'},
+        {'name': 'Calib2024', 'validation': '1 year', 'acq': '2024-01-01', 'exp': '2025-01-01', 'file': 'calib2024.pdf', 'filedata': b'Sample certificate 2024', 'drone_id': 'D002'},
+    ],
+    'drones': [
+        {'drone_id': 'D001', 'model': 'Flight inspection UAV', 'home_base': 'Local Home', 'status': 'Active'},
+        {'drone_id': 'D002', 'model': 'Flight inspection UAV', 'home_base': 'Local Home', 'status': 'Active'},
+        {'drone_id': 'D003', 'model': 'Flight inspection UAV', 'home_base': 'Local Home', 'status': 'Active'},
+    ],
+    'users_list': [
+        {'name': 'houcine fath', 'role': 'Group Chief', 'email': 'houcine@example.com', 'status': 'Active', 'username': 'houcine', 'password': 'chief123'},
+        {'name': 'jamal Jon', 'role': 'Pilot', 'email': 'jam@example.com', 'status': 'Active', 'username': 'jamal', 'password': 'pilot123'},
+        {'name': 'sara walo', 'role': 'Data Analyst', 'email': 'sara@example.com', 'status': 'Inactive', 'username': 'sara', 'password': 'analyst123'},
+    ],
+}
+
+class Conflict(Exception):
+    """A record no longer holds the values a write was based on."""
+
+    def __init__(self, name, key, changed):
+        super().__init__(f"{name} {key!r} was changed meanwhile ({', '.join(changed)})")
+        self.key = key
+        self.changed = changed
+
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
+_sql = {}
+_cache_lock = threading.RLock()
+_cache = {}
+_cache_gen = {}
+CHANGES_KEEP = 50000      # generations of change log kept per collection
+CHANGES_PRUNE_EVERY = 1000
+_listeners = []
+
+
+# --- Record encoding ---
+def _default(value):
+    # Only databases created before the blob store hold inline bytes;
+    # _migrate_inline_files() moves them out on startup
+    if isinstance(value, (bytes, bytearray)):
+        return {'__bytes__': base64.b64encode(bytes(value)).decode('ascii')}
+    raise TypeError(f'Cannot store value of type {type(value).__name__}')
+
+
+def _object_hook(obj):
+    if len(obj) == 1 and '__bytes__' in obj:
+        return base64.b64decode(obj['__bytes__'])
+    return obj
+
+
+def _encode(record):
+    return json.dumps(record, default=_default, ensure_ascii=False)
+
+
+def _decode(data):
+    return json.loads(data, object_hook=_object_hook)
+
+
+# --- Connection handling ---
+def _connect():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(DB_PATH) or '.', exist_ok=True)
+        # Autocommit mode: transactions are opened explicitly in _transaction()
+        conn = sqlite3.connect(DB_PATH, isolation_level=None, timeout=30, cached_statements=256)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        _local.conn = conn
+    return conn
+
+
+@contextmanager
+def _transaction():
+    conn = _connect()
+    # IMMEDIATE takes the write lock up front so read-modify-write cycles
+    # from concurrent sessions are serialized instead of failing at commit
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    else:
+        conn.execute('COMMIT')
+
+
+def _table_columns(name):
+    return COLLECTIONS[name]['columns'] + ['sort_key']
+
+
+def _prepare(name):
+    cols = _table_columns(name)
+    col_list = ''.join(f', {c}' for c in cols)
+    placeholders = ''.join(', ?' for _ in cols)
+    updates = ''.join(f', {c} = ?' for c in cols)
+    _sql[name] = {
+        'create': (
+            f'CREATE TABLE IF NOT EXISTS {name} ('
+            'seq INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'key TEXT NOT NULL UNIQUE'
+            + ''.join(f', {c} TEXT' for c in cols)
+            + ', data TEXT NOT NULL)'
+        ),
+        # (column, sort_key) so that filtered pages are read in order from the index
+        'indexes': [f'CREATE INDEX IF NOT EXISTS idx_{name}_sort ON {name} (sort_key)'] + [
+            f'CREATE INDEX IF NOT EXISTS idx_{name}_{c}_sort ON {name} ({c}, sort_key)'
+            for c in COLLECTIONS[name]['columns']
+        ],
+        'insert': f'INSERT INTO {name} (key{col_list}, data) VALUES (?{placeholders}, ?)',
+        'update': f'UPDATE {name} SET key = ?{updates}, data = ? WHERE key = ?',
+        'delete': f'DELETE FROM {name} WHERE key = ?',
+        'get': f'SELECT data FROM {name} WHERE key = ?',
+        'all': f'SELECT data FROM {name} ORDER BY seq',
+        'count': f'SELECT COUNT(*) FROM {name}',
+        'next_id': f"SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = '{name}'), 0) + 1",
+        'gen_key': f'gen:{name}',
+    }
+
+
+def init():
+    """Create the tables and seed data. Safe to call on every rerun."""
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        for name in COLLECTIONS:
+            _prepare(name)
+        with _transaction() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            conn.execute('CREATE TABLE IF NOT EXISTS changes ('
+                         'seq INTEGER PRIMARY KEY AUTOINCREMENT, collection TEXT NOT NULL, '
+                         'gen INTEGER NOT NULL, key TEXT NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_changes_gen ON changes (collection, gen)')
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for name in COLLECTIONS:
+                conn.execute(_sql[name]['create'])
+                _upgrade_table(conn, name)
+                for stmt in _sql[name]['indexes']:
+                    conn.execute(stmt)
+                conn.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, 0)', (_sql[name]['gen_key'],))
+            seeded = conn.execute("SELECT value FROM meta WHERE key = 'seeded'").fetchone()
+            # Collections that replace older tables are filled from them
+            # instead of seeded
+            replaced = set()
+            for name, (migrate, legacy) in MIGRATIONS.items():
+                if name not in existing and existing & set(legacy):
+                    migrate(conn, existing)
+                    replaced.add(name)
+            for name, records in SEED_DATA.items():
+                # New databases get every seed; older ones only the seeds of
+                # collections added since they were created
+                if name not in replaced and (not seeded or name not in existing):
+                    for record in records:
+                        _insert(conn, name, dict(record))
+            if not seeded:
+                conn.execute("INSERT INTO meta (key, value) VALUES ('seeded', '1')")
+            migrated = conn.execute("SELECT value FROM meta WHERE key = 'blobs_migrated'").fetchone()
+            if not migrated:
+                _migrate_inline_files(conn)
+                conn.execute("INSERT INTO meta (key, value) VALUES ('blobs_migrated', '1')")
+            migrated = conn.execute("SELECT value FROM meta WHERE key = 'downloads_versioned'").fetchone()
+            if not migrated:
+                _migrate_downloads(conn)
+                conn.execute("INSERT INTO meta (key, value) VALUES ('downloads_versioned', '1')")
+            migrated = conn.execute("SELECT value FROM meta WHERE key = 'parts_ledger_migrated'").fetchone()
+            if not migrated:
+                _migrate_parts_ledger(conn)
+                conn.execute("INSERT INTO meta (key, value) VALUES ('parts_ledger_migrated', '1')")
+        _initialized = True
+
+
+def _upgrade_table(conn, name):
+    # Add columns introduced after the table was created and fill them in
+    existing = {row[1] for row in conn.execute(f'PRAGMA table_info({name})')}
+    missing = [c for c in _table_columns(name) if c not in existing]
+    if not missing:
+        return
+    for c in missing:
+        conn.execute(f'ALTER TABLE {name} ADD COLUMN {c} TEXT')
+    for c in COLLECTIONS[name]['columns']:
+        # Superseded by the (column, sort_key) indexes
+        conn.execute(f'DROP INDEX IF EXISTS idx_{name}_{c}')
+    for key, data in conn.execute(f'SELECT key, data FROM {name}').fetchall():
+        conn.execute(_sql[name]['update'], _row_values(name, _decode(data)) + [key])
+
+
+def _migrate_inline_files(conn):
+    # Replace file bytes kept inside records with blob store handles.
+    # collection -> record -> [(dict holding the bytes, bytes field, file name field)]
+    holders = {
+        'certs': lambda r: [(r, 'filedata', 'file')],
+        'downloads': lambda r: [(r, 'content', 'file')],
+        'submitted_reports': lambda r: [
+            (r[f], 'data', 'name') for f in ('flight_profile', 'report') if isinstance(r.get(f), dict)
+        ],
+    }
+    for name, get_holders in holders.items():
+        for key, data in conn.execute(f'SELECT key, data FROM {name}').fetchall():
+            record = _decode(data)
+            for holder, data_field, name_field in get_holders(record):
+                content = holder.pop(data_field, None)
+                holder['blob'] = blobstore.put_bytes(bytes(content), holder.get(name_field)) if content else None
+            conn.execute(_sql[name]['update'], _row_values(name, record) + [key])
+
+
+def _migrate_parts_ledger(conn):
+    # Start the stock ledger from what the store already knows: the usage
+    # history, plus an opening balance per part so that the ledger sums to
+    # the current quantities
+    used = {}
+    for key, data in conn.execute('SELECT key, data FROM parts_usage_history ORDER BY seq').fetchall():
+        usage = _decode(data)
+        qty = int(usage.get('qty_used') or 0)
+        used.setdefault(usage.get('part_id'), []).append((key, usage, qty))
+    for _, data in conn.execute('SELECT key, data FROM spare_parts ORDER BY seq').fetchall():
+        part = _decode(data)
+        part_id = part['part_id']
+        usages = used.get(part_id, [])
+        balance = int(part.get('qty') or 0) + sum(qty for _, _, qty in usages)
+        first = min([u.get('date') or '' for _, u, _ in usages], default='') or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        _insert(conn, 'parts_ledger', {
+            'op_id': f'opening-{part_id}', 'part_id': part_id, 'name': part.get('name'),
+            'kind': 'opening', 'qty': balance, 'balance': balance,
+            'date': first, 'user': '', 'note': 'Stock before the ledger',
+        })
+        for key, usage, qty in sorted(usages, key=lambda u: u[1].get('date') or ''):
+            balance -= qty
+            _insert(conn, 'parts_ledger', {
+                'op_id': f'usage-{key}', 'part_id': part_id, 'name': usage.get('name'),
+                'kind': 'usage', 'qty': -qty, 'balance': balance,
+                'date': usage.get('date') or '', 'user': usage.get('user', ''), 'note': usage.get('note', ''),
+            })
+    _bump(conn, 'parts_ledger')
+
+
+def _migrate_downloads(conn):
+    # Each upload used to be a document of its own; uploads sharing a
+    # category and name become the versions of one document, oldest first
+    documents = {}
+    for key, data in conn.execute('SELECT key, data FROM downloads ORDER BY seq').fetchall():
+        record = _decode(data)
+        if 'versions' in record:
+            continue
+        version = {'blob': record.get('blob'), 'file': record.get('file') or record.get('name'), 'uploaded': '', 'user': ''}
+        slug = f"{record.get('type')}:{str(record.get('name') or '').strip().lower()}"
+        document = documents.get(slug)
+        if document is None:
+            documents[slug] = document = {
+                'id': record['id'], 'type': record.get('type'), 'name': record.get('name'), 'slug': slug, 'versions': [],
+            }
+        else:
+            conn.execute(_sql['downloads']['delete'], (key,))
+        document['versions'].append(dict(version, version=len(document['versions']) + 1))
+    for document in documents.values():
+        conn.execute(_sql['downloads']['update'], _row_values('downloads', document) + [str(document['id'])])
+    _bump(conn, 'downloads')
+
+
+def _migrate_maintenance_log(conn, tables):
+    # The ATSEP drone log and the detailed maintenance records become one
+    # log. The old tables are left in the database, unused.
+    entries = []
+    if 'shared_maintenance_records' in tables:
+        for (data,) in conn.execute('SELECT data FROM shared_maintenance_records ORDER BY seq'):
+            r = _decode(data)
+            entries.append({
+                'equipment': r.get('drone_id'), 'date': r.get('date'), 'type': r.get('type'),
+                'status': 'Completed', 'technician': r.get('tech'), 'description': r.get('desc'),
+                'parts': r.get('parts') or '', 'findings': '', 'actions': '', 'next_date': None,
+                'timestamp': r.get('timestamp'),
+            })
+    if 'maintenance_records' in tables:
+        for (data,) in conn.execute('SELECT data FROM maintenance_records ORDER BY seq'):
+            r = _decode(data)
+            entries.append({
+                'equipment': r.get('equipment'), 'date': r.get('date'), 'type': r.get('type'),
+                'status': r.get('status'), 'technician': r.get('technician'), 'description': r.get('description'),
+                'parts': '', 'findings': r.get('findings') or '', 'actions': r.get('actions') or '',
+                'next_date': r.get('next_date'), 'timestamp': r.get('timestamp'),
+            })
+    for entry in sorted(entries, key=COLLECTIONS['maintenance_log']['sort']):
+        _insert(conn, 'maintenance_log', entry)
+    _bump(conn, 'maintenance_log')
+
+
+# new collection -> (migration, tables it replaces)
+MIGRATIONS = {
+    'maintenance_log': (_migrate_maintenance_log, ('shared_maintenance_records', 'maintenance_records')),
+}
+
+
+def _row_values(name, record):
+    spec = COLLECTIONS[name]
+    values = [str(record[spec['key']])]
+    for c in spec['columns']:
+        v = record.get(c)
+        values.append(None if v is None else str(v))
+    values.append(spec['sort'](record) if 'sort' in spec else '')
+    values.append(_encode(record))
+    return values
+
+
+def _insert(conn, name, record):
+    key = COLLECTIONS[name]['key']
+    if record.get(key) in (None, ''):
+        if key != 'id':
+            raise ValueError(f"{name}: '{key}' is required")
+        record[key] = conn.execute(_sql[name]['next_id']).fetchone()[0]
+    conn.execute(_sql[name]['insert'], _row_values(name, record))
+    return record
+
+
+def _check_column(name, column):
+    if column not in COLLECTIONS[name]['columns']:
+        raise KeyError(f"'{column}' is not an indexed column of {name}")
+
+
+# --- Cache ---
+def _generation(conn, name):
+    return int(conn.execute('SELECT value FROM meta WHERE key = ?', (_sql[name]['gen_key'],)).fetchone()[0])
+
+
+def _floor(conn, name):
+    # Caches older than this generation cannot be brought up to date from
+    # the change log
+    row = conn.execute('SELECT value FROM meta WHERE key = ?', (f'floor:{name}',)).fetchone()
+    return int(row[0]) if row else 0
+
+
+def _set_floor(conn, name, gen):
+    conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (f'floor:{name}', gen))
+
+
+def _bump(conn, name, keys=None):
+    # Called inside the write transaction; returns (before, after). keys are
+    # the records written; None for a bulk change, which every cache reloads.
+    before = _generation(conn, name)
+    after = before + 1
+    conn.execute('UPDATE meta SET value = ? WHERE key = ?', (after, _sql[name]['gen_key']))
+    if keys is None:
+        _set_floor(conn, name, after)
+    else:
+        conn.executemany('INSERT INTO changes (collection, gen, key) VALUES (?, ?, ?)',
+                         [(name, after, str(k)) for k in set(keys)])
+    if after % CHANGES_PRUNE_EVERY == 0 and after > CHANGES_KEEP:
+        conn.execute('DELETE FROM changes WHERE collection = ? AND gen <= ?', (name, after - CHANGES_KEEP))
+        _set_floor(conn, name, max(_floor(conn, name), after - CHANGES_KEEP))
+    return before, after
+
+
+def _catch_up(conn, name, coll, gen):
+    # Re-read the records written since the cached generation; False when
+    # the collection has to be reloaded instead. Caller holds _cache_lock.
+    cached = _cache_gen[name]
+    if cached > gen or cached < _floor(conn, name):
+        return False
+    keys = [row[0] for row in conn.execute(
+        'SELECT DISTINCT key FROM changes WHERE collection = ? AND gen > ? AND gen <= ?', (name, cached, gen))]
+    if len(keys) > max(1000, len(coll) // 4):
+        return False
+    for key in keys:
+        row = conn.execute(_sql[name]['get'], (key,)).fetchone()
+        old = coll.remove(key)
+        new = coll.add(_decode(row[0])) if row is not None else None
+        if old is not None or new is not None:
+            for listener in _listeners:
+                if name in listener.collections:
+                    listener.change(name, old, new)
+    # Records read here may be newer than 'gen'; the next catch-up reads
+    # them again
+    _cache_gen[name] = gen
+    return True
+
+
+def _collection(name):
+    # Caller must hold _cache_lock
+    conn = _connect()
+    gen = _generation(conn, name)
+    coll = _cache.get(name)
+    if coll is not None and _cache_gen.get(name) != gen and not _catch_up(conn, name, coll, gen):
+        coll = None
+    if coll is None:
+        spec = COLLECTIONS[name]
+        coll = IndexedCollection(spec['key'], spec['columns'])
+        for row in conn.execute(_sql[name]['all']):
+            coll.add(_decode(row[0]))
+        _cache[name] = coll
+        _cache_gen[name] = gen
+        for listener in _listeners:
+            if name in listener.collections:
+                listener.reset(name, coll)
+    return coll
+
+
+def _apply(name, gens, old_key, record):
+    # Apply a committed write to the cache. If another writer got in
+    # between, the cache is left behind and the next read catches up from
+    # the change log. old_key is the key being replaced or deleted, record
+    # the new version.
+    before, after = gens
+    with _cache_lock:
+        coll = _cache.get(name)
+        if coll is not None and _cache_gen.get(name) == before:
+            old = coll.remove(old_key) if old_key is not None else None
+            if record is not None:
+                record = coll.add(dict(record))
+            _cache_gen[name] = after
+            for listener in _listeners:
+                if name in listener.collections:
+                    listener.change(name, old, record)
+
+
+def add_listener(listener):
+    """Keep a derived structure (search index, counters...) in step with the cache.
+
+    The listener has a 'collections' attribute and two methods:
+    reset(name, records) when a collection is (re)loaded, and
+    change(name, old, new) after each write (old or new is None on
+    insert/delete). Both run under the cache lock.
+    """
+    with _cache_lock:
+        _listeners.append(listener)
+        for name in listener.collections:
+            listener.reset(name, _collection(name))
+
+
+def refresh(*names):
+    """Reload the given collections if another process has written to them."""
+    with _cache_lock:
+        for name in names:
+            _collection(name)
+
+
+# --- Public API ---
+def fetch_all(name):
+    with _cache_lock:
+        return [dict(r) for r in _collection(name)]
+
+
+def fetch(name, key):
+    with _cache_lock:
+        record = _collection(name).get(key)
+        return dict(record) if record is not None else None
+
+
+def find(name, **where):
+    """Records whose indexed columns equal the given values."""
+    for column in where:
+        _check_column(name, column)
+    with _cache_lock:
+        return [dict(r) for r in _collection(name).where(**where)]
+
+
+def count(name, contains=None, **where):
+    """Number of records matching where; with contains (as in page()) the
+    count is made by SQLite instead of the cache."""
+    if contains:
+        clauses, params = _filter_sql(name, where, contains=contains)
+        return _connect().execute(f"SELECT COUNT(*) FROM {name} WHERE {' AND '.join(clauses)}", params).fetchone()[0]
+    for column in where:
+        _check_column(name, column)
+    with _cache_lock:
+        return _collection(name).count(**where)
+
+
+def values(name, column):
+    """Distinct values of an indexed column."""
+    _check_column(name, column)
+    with _cache_lock:
+        return _collection(name).values(column)
+
+
+class _Writer:
+    # Writes made inside atomic(); applied to the cache once committed
+    def __init__(self, conn):
+        self.conn = conn
+        self.applied = []
+
+    def fetch(self, name, key):
+        """The record as stored right now (not the cache), or None."""
+        row = self.conn.execute(_sql[name]['get'], (str(key),)).fetchone()
+        return _decode(row[0]) if row is not None else None
+
+    def find(self, name, **where):
+        """Records as stored right now whose indexed columns equal the given values."""
+        for column in where:
+            _check_column(name, column)
+        clause = ' AND '.join(f'{c} = ?' for c in where) or '1'
+        rows = self.conn.execute(f'SELECT data FROM {name} WHERE {clause} ORDER BY seq',
+                                 [str(v) for v in where.values()]).fetchall()
+        return [_decode(row[0]) for row in rows]
+
+    def insert(self, name, record):
+        _insert(self.conn, name, record)
+        key = record[COLLECTIONS[name]['key']]
+        self.applied.append((name, _bump(self.conn, name, [key]), None, record))
+        return record
+
+    def update(self, name, key, changes, expected=None):
+        key_field = COLLECTIONS[name]['key']
+        record = self.fetch(name, key)
+        if record is None:
+            raise KeyError(f'{name}: no record with key {key!r}')
+        if expected:
+            changed = [f for f, v in expected.items() if record.get(f) != v]
+            if changed:
+                raise Conflict(name, key, changed)
+        record.update(changes)
+        if record.get(key_field) in (None, ''):
+            record[key_field] = key
+        self.conn.execute(_sql[name]['update'], _row_values(name, record) + [str(key)])
+        self.applied.append((name, _bump(self.conn, name, [key, record[key_field]]), key, record))
+        return record
+
+    def delete(self, name, key):
+        cur = self.conn.execute(_sql[name]['delete'], (str(key),))
+        self.applied.append((name, _bump(self.conn, name, [key]), key, None))
+        return cur.rowcount > 0
+
+
+@contextmanager
+def atomic():
+    """Group reads and writes into one transaction: other sessions and
+    processes see all of the writes or none of them.
+
+        with storage.atomic() as tx:
+            part = tx.fetch('spare_parts', 'P001')
+            tx.update('spare_parts', 'P001', {'qty': part['qty'] - 1})
+            tx.insert('parts_ledger', {...})
+
+    Reads through tx see the database, not the cache; the write lock is held
+    from the start, so check-then-write sequences cannot interleave.
+    An exception rolls everything back.
+    """
+    with _transaction() as conn:
+        writer = _Writer(conn)
+        yield writer
+    for name, gens, old_key, record in writer.applied:
+        _apply(name, gens, old_key, record)
+
+
+def insert(name, record):
+    """Insert a record. Collections keyed by 'id' get the next id when none is set.
+
+    Raises sqlite3.IntegrityError if a record with the same key already exists
+    and ValueError if the key is missing.
+    """
+    with atomic() as tx:
+        return tx.insert(name, record)
+
+
+def insert_many(name, records):
+    """Insert many records in one transaction (bulk loads, imports)."""
+    with _transaction() as conn:
+        for record in records:
+            _insert(conn, name, record)
+        _bump(conn, name)
+    # Bulk change: let the next read reload the collection
+    with _cache_lock:
+        _cache.pop(name, None)
+    return records
+
+
+def update(name, key, changes, expected=None):
+    """Apply a dict of field changes to one record and return the new record.
+
+    expected: {field: value} the record must still hold, typically the values
+    the user saw before editing them; raises Conflict otherwise.
+    """
+    with atomic() as tx:
+        return tx.update(name, key, changes, expected)
+
+
+def delete(name, key):
+    with _transaction() as conn:
+        cur = conn.execute(_sql[name]['delete'], (str(key),))
+        gens = _bump(conn, name, [key])
+    _apply(name, gens, key, None)
+    return cur.rowcount > 0
+
+
+def replace_all(name, records):
+    """Make the collection hold exactly the given records (used by table editors)."""
+    key_field = COLLECTIONS[name]['key']
+    with _transaction() as conn:
+        existing = {r[0] for r in conn.execute(f'SELECT key FROM {name}')}
+        keep = set()
+        for record in records:
+            record = dict(record)
+            key = record.get(key_field)
+            if key in (None, '') and key_field != 'id':
+                # Row still being filled in by the user
+                continue
+            if key in (None, '') or str(key) not in existing:
+                _insert(conn, name, record)
+            else:
+                conn.execute(_sql[name]['update'], _row_values(name, record) + [str(key)])
+            keep.add(str(record[key_field]))
+        for key in existing - keep:
+            conn.execute(_sql[name]['delete'], (key,))
+        _bump(conn, name)
+    # Bulk change: let the next read reload the collection
+    with _cache_lock:
+        _cache.pop(name, None)
+
+
+def _encode_cursor(value, seq):
+    return base64.urlsafe_b64encode(json.dumps([value, seq]).encode()).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    value, seq = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return value, seq
+
+
+def _filter_sql(name, where, exclude=None, contains=None, between=None):
+    # SQL conditions shared by page() and filtered counts
+    exclude = exclude or {}
+    contains = contains or {}
+    between = between or {}
+    for column in list(where) + list(exclude):
+        _check_column(name, column)
+    for columns in contains:
+        for column in (columns if isinstance(columns, tuple) else (columns,)):
+            _check_column(name, column)
+    for column in between:
+        if column not in _table_columns(name):
+            raise KeyError(f"'{column}' is not an indexed column of {name}")
+
+    clauses, params = [], []
+    for column, value in where.items():
+        clauses.append(f'{column} = ?')
+        params.append(str(value))
+    for column, value in exclude.items():
+        clauses.append(f'{column} IS NOT ?')
+        params.append(str(value))
+    for columns, value in contains.items():
+        columns = columns if isinstance(columns, tuple) else (columns,)
+        escaped = str(value).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        clauses.append('(' + ' OR '.join(f"{c} LIKE ? ESCAPE '\\'" for c in columns) + ')')
+        params.extend([f'%{escaped}%'] * len(columns))
+    for column, (low, high) in between.items():
+        if low is not None:
+            clauses.append(f'{column} >= ?')
+            params.append(str(low))
+        if high is not None:
+            clauses.append(f'{column} <= ?')
+            params.append(str(high))
+    return clauses, params
+
+
+def page(name, limit=20, cursor=None, order_by='sort_key', descending=True,
+         exclude=None, contains=None, between=None, **where):
+    """One page of records, filtered and sorted by SQLite (keyset pagination).
+
+    where: column = value, exclude: column != value, contains: case-insensitive
+    substring match (a tuple of columns matches if any of them contains the
+    text), between: column -> (low, high) inclusive, either bound may be None
+    (the column may also be 'sort_key'). order_by is 'sort_key' (the
+    collection's default order), an indexed column or 'seq' (insertion
+    order). Returns (records, next_cursor); pass next_cursor back to get the
+    following page, it is None on the last one.
+    """
+    if order_by not in _table_columns(name) and order_by != 'seq':
+        raise KeyError(f"Cannot order {name} by '{order_by}'")
+    clauses, params = _filter_sql(name, where, exclude, contains, between)
+
+    op, direction = ('<', 'DESC') if descending else ('>', 'ASC')
+    if order_by == 'seq':
+        sort_expr, order = 'NULL', f'seq {direction}'
+    else:
+        sort_expr, order = order_by, f'{order_by} {direction}, seq {direction}'
+    if cursor:
+        value, seq = _decode_cursor(cursor)
+        if order_by == 'seq':
+            clauses.append(f'seq {op} ?')
+            params.append(seq)
+        else:
+            clauses.append(f'({order_by}, seq) {op} (?, ?)')
+            params.extend([value, seq])
+
+    where_sql = ' AND '.join(clauses) or '1'
+    rows = _connect().execute(
+        f'SELECT {sort_expr}, seq, data FROM {name} WHERE {where_sql} ORDER BY {order} LIMIT ?',
+        params + [limit + 1]
+    ).fetchall()
+    next_cursor = _encode_cursor(rows[limit - 1][0], rows[limit - 1][1]) if len(rows) > limit else None
+    return [_decode(r[2]) for r in rows[:limit]], next_cursor
+
+
+def span(name, column):
+    """(smallest, largest) non-empty value of an indexed column, read from its
+    SQLite index; (None, None) when there is none."""
+    if column not in _table_columns(name):
+        raise KeyError(f"'{column}' is not an indexed column of {name}")
+    low, high = _connect().execute(f"SELECT MIN({column}), MAX({column}) FROM {name} WHERE {column} > ''").fetchone()
+    return low, high
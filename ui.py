@@ -0,0 +1,403 @@
+import json
+import sqlite3
+import streamlit as st
+
+import blobstore
+import storage
+
+# Every page imports this module, so the modules behind one widget (numpy
+# and the PDF code in reportpack, the upload endpoint...) are imported by
+# that widget when it is first shown, not here
+
+# --- Session State & Authentication ---
+def login_form():
+    st.title("Aviation Maintenance Management Login")
+    with st.form('login_form', clear_on_submit=False):
+        role = st.selectbox('Select Role', ['Chief of Unit', 'ATSEP', 'Client'], key='login_role')
+        username = st.text_input('Username', key='login_username')
+        password = st.text_input('Password', type='password', key='login_password')
+        submitted = st.form_submit_button('Login')
+        if submitted:
+            # Map role to username suffix for lookup
+            role_suffix = {'Chief of Unit': '-CHIEF', 'ATSEP': '-ATSEP', 'Client': '-CLIENT'}
+            user_key = username.strip() + role_suffix[role]
+            users = {
+                'chief-CHIEF': {'password': 'chief123', 'role': 'Chief of Unit', 'avatar': 'https://i.imgur.com/1Q9Z1Zm.png'},
+                'houcine-ATSEP': {'password': 'atsep123', 'role': 'ATSEP', 'avatar': 'https://i.imgur.com/2z6b7Yk.png'},
+                'airport1-CLIENT': {'password': 'client123', 'role': 'Client', 'avatar': 'https://i.imgur.com/3y6b7Yk.png'},
+            }
+            user = users.get(user_key)
+            if user and password == user['password'] and user['role'] == role:
+                st.session_state['authenticated'] = True
+                st.session_state['role'] = user['role']
+                st.session_state['username'] = user_key
+                st.session_state['avatar'] = user['avatar']
+                st.rerun()
+            else:
+                st.error('Invalid username, password, or role.')
+    #st.info("Demo accounts:\nChief: chief / chief123\nATSEP: houcine / atsep123\nClient: airport1 / client123\nSelect the correct role for your username.")
+
+def logout():
+    if st.button('Logout', key='logout_btn'):
+        for k in ['authenticated', 'role', 'username', 'avatar']:
+            if k in st.session_state:
+                del st.session_state[k]
+        st.rerun()
+
+# --- File Downloads ---
+# Streamlit keeps a served download in memory, so only small blobs go
+# through st.download_button; larger ones are links to the upload
+# endpoint, which streams them from disk (uploads.blob_url)
+INLINE_DOWNLOAD_MAX = 32 * 1024 * 1024
+
+def blob_download_button(label, handle, file_name, key):
+    # Nothing is read or sent with the page: Streamlit calls the data
+    # callable only when the button is clicked and serves the result from
+    # its media endpoint. on_click='ignore' skips the rerun a click would
+    # otherwise trigger.
+    if not blobstore.exists(handle):
+        # Rather than an empty file
+        return st.download_button(label, data=b'', file_name=file_name, key=key, disabled=True,
+                                  help='This file is missing from the store.')
+    if (handle.get('size') or 0) > INLINE_DOWNLOAD_MAX:
+        import uploads
+        return st.link_button(label, uploads.blob_url(handle, file_name), key=key)
+    return st.download_button(
+        label,
+        data=lambda: blobstore.read(handle),
+        file_name=file_name,
+        mime=(handle or {}).get('type') or None,
+        key=key,
+        on_click='ignore'
+    )
+
+# --- Pagination ---
+PAGE_SIZES = [10, 25, 50]
+
+def paged_records(name, state_key, **query):
+    # Only the visible page is read from the store and rendered. The stack
+    # of page cursors lives in session state and restarts at page 1 when
+    # the query (filters, sort) changes.
+    signature = repr(sorted(query.items()))
+    state = st.session_state.get(state_key)
+    if state is None or state['signature'] != signature:
+        state = st.session_state[state_key] = {'signature': signature, 'cursors': [None]}
+    page_size = st.session_state.get(f'{state_key}_size', PAGE_SIZES[0])
+    records, next_cursor = storage.page(name, limit=page_size, cursor=state['cursors'][-1], **query)
+
+    def previous_page():
+        state['cursors'].pop()
+
+    def next_page():
+        state['cursors'].append(next_cursor)
+
+    def first_page():
+        state['cursors'] = [None]
+
+    if next_cursor is not None or len(state['cursors']) > 1:
+        col1, col2, col3, col4 = st.columns([1, 2, 1, 1])
+        with col1:
+            st.button('◀ Previous', key=f'{state_key}_prev', on_click=previous_page, disabled=len(state['cursors']) == 1)
+        with col2:
+            st.caption(f"Page {len(state['cursors'])}")
+        with col3:
+            st.button('Next ▶', key=f'{state_key}_next', on_click=next_page, disabled=next_cursor is None)
+        with col4:
+            st.selectbox('Per page', PAGE_SIZES, key=f'{state_key}_size', on_change=first_page, label_visibility='collapsed')
+    return records
+
+# --- Editable Tables ---
+def editable_table(name, records, key, insert=None, readonly=(), dependents=(), **editor_args):
+    # Saves what the data editor reports as changed (edited, added and
+    # deleted rows, by position in 'records') instead of comparing and
+    # rewriting the whole table, so an edit costs O(changes). An edited field
+    # is only written if the record still holds the value the user saw;
+    # otherwise the edit is reported as a conflict and left out. The key of
+    # an existing record is never changed (other records and ledgers refer to
+    # it); it is only entered for added rows.
+    # insert(record) replaces storage.insert for added rows. dependents are
+    # (collection, column) pairs whose records referring to a deleted row
+    # are deleted with it. Returns the records saved by the last edit.
+    key_field = storage.COLLECTIONS[name]['key']
+    version = st.session_state.get(f'{key}_version', 0)
+    widget_key = f'{key}_{version}'
+
+    def save_edits():
+        delta = st.session_state[widget_key]
+        rows = st.session_state[f'{key}_rows']
+        saved, problems = [], []
+        for index, changes in delta['edited_rows'].items():
+            index = int(index)
+            changes = {f: v for f, v in changes.items() if f not in readonly}
+            if index >= len(rows):
+                continue
+            row = rows[index]
+            if key_field in changes and changes.pop(key_field) != row[key_field]:
+                problems.append(f'{key_field} of {row[key_field]!r} cannot be changed; add a new row instead.')
+            if not changes:
+                continue
+            try:
+                saved.append(storage.update(name, row[key_field], changes, expected={f: row.get(f) for f in changes}))
+            except storage.Conflict as e:
+                problems.append(f'{e}; not saved.')
+            except KeyError:
+                problems.append(f'{row[key_field]!r} was deleted meanwhile; not saved.')
+            except (sqlite3.IntegrityError, ValueError):
+                problems.append(f'{key_field} must be unique and not empty; {row[key_field]!r} not saved.')
+        for index in delta['deleted_rows']:
+            # The delta can outlive the rows it was made on (another rerun
+            # or user got in first)
+            if index >= len(rows):
+                continue
+            row_key = rows[index][key_field]
+            with storage.atomic() as tx:
+                if tx.fetch(name, row_key) is None:
+                    problems.append(f'{row_key!r} was deleted meanwhile.')
+                    continue
+                for collection, column in dependents:
+                    for record in tx.find(collection, **{column: row_key}):
+                        tx.delete(collection, record[storage.COLLECTIONS[collection]['key']])
+                tx.delete(name, row_key)
+        columns = dict.fromkeys(rows[0]) if rows else {}
+        for row in delta['added_rows']:
+            record = dict(columns, **{f: v for f, v in row.items() if f not in readonly})
+            try:
+                saved.append((insert or (lambda r: storage.insert(name, r)))(record))
+            except (sqlite3.IntegrityError, ValueError):
+                problems.append(f'New row needs a unique {key_field}; not saved.')
+        st.session_state[f'{key}_result'] = saved, problems
+        # A fresh editor over the saved data, without the applied edits
+        st.session_state[f'{key}_version'] = version + 1
+
+    st.data_editor(records, key=widget_key, on_change=save_edits, disabled=list(readonly), **editor_args)
+    # The rows as shown, for mapping the next edit back to records
+    st.session_state[f'{key}_rows'] = records
+    saved, problems = st.session_state.pop(f'{key}_result', ([], []))
+    if problems:
+        st.warning('\n\n'.join(problems))
+    return saved
+
+# --- Resumable uploads ---
+# The browser sends the file straight to the upload endpoint (uploads.py) in
+# checksummed chunks, retrying and resuming on its own; nothing passes
+# through the Streamlit session
+_UPLOADER_HTML = '''
+<div style="font-family: sans-serif; font-size: 14px">
+  <input type="file" id="file"> <button id="go">Upload</button>
+  <div><progress id="bar" max="100" value="0" style="width: 100%"></progress></div>
+  <div id="status"></div>
+</div>
+<script>
+const URL_BASE = __URL__, TICKET = __TICKET__;
+const status = (text) => document.getElementById('status').textContent = text;
+const hex = (buf) => Array.from(new Uint8Array(buf)).map(b => b.toString(16).padStart(2, '0')).join('');
+async function call(method, path, body, headers) {
+  const r = await fetch(URL_BASE + path, {method, body,
+    headers: Object.assign({'Authorization': 'Bearer ' + TICKET}, headers)});
+  return [r.status, await r.json()];
+}
+async function send(file) {
+  let upload = null, failures = 0;
+  while (true) {
+    try {
+      if (!upload) {
+        const [code, reply] = await call('POST', '/uploads',
+          JSON.stringify({name: file.name, size: file.size, modified: file.lastModified}),
+          {'Content-Type': 'application/json'});
+        if (code !== 200) { status(reply.error); return; }
+        upload = reply;
+      }
+      document.getElementById('bar').value = 100 * upload.offset / file.size;
+      if (upload.status === 'complete') { status(file.name + ' uploaded'); return; }
+      if (upload.status === 'completing') {
+        // Being moved into place by another request: ask again shortly
+        status('Finishing ' + file.name + '...');
+        upload = null;
+        await new Promise(r => setTimeout(r, 2000));
+        continue;
+      }
+      status(`${(upload.offset / 1048576).toFixed(0)} of ${(file.size / 1048576).toFixed(0)} MiB`);
+      const chunk = await file.slice(upload.offset, upload.offset + upload.chunk_size).arrayBuffer();
+      const headers = {'Upload-Offset': String(upload.offset), 'Content-Type': 'application/offset+octet-stream'};
+      if (crypto.subtle) headers['Upload-Checksum'] = 'sha256 ' + hex(await crypto.subtle.digest('SHA-256', chunk));
+      const [code, reply] = await call('PATCH', '/uploads/' + upload.id, chunk, headers);
+      if (code === 200) { Object.assign(upload, reply); failures = 0; continue; }
+      if (!('offset' in reply)) { status(reply.error); return; }
+      upload.offset = reply.offset;
+      failures++;
+    } catch (e) {
+      // Link dropped: ask the server where it stands and carry on
+      upload = null;
+      failures++;
+      status('Connection lost, retrying...');
+    }
+    if (failures > 30) { status('Upload failed, start it again to resume'); return; }
+    await new Promise(r => setTimeout(r, Math.min(1000 * 2 ** failures, 60000)));
+  }
+}
+document.getElementById('go').onclick = () => {
+  const file = document.getElementById('file').files[0];
+  if (file) send(file);
+};
+</script>
+'''
+
+def chunked_uploader(mission_ref):
+    import uploads
+    ticket = uploads.ticket(st.session_state.get('username', ''), mission_ref)
+    html = _UPLOADER_HTML.replace('__URL__', json.dumps(uploads.UPLOAD_URL)).replace('__TICKET__', json.dumps(ticket))
+    st.iframe(html, height=110)
+    with st.popover('Upload from a terminal'):
+        st.caption('Resumes by itself on poor links; run it again after a disconnect.')
+        st.code(f'python -m uploads FILE --ticket {ticket} --url {uploads.UPLOAD_URL}', language='bash')
+
+def mission_attachments(mission_ref, key_prefix):
+    # Large files registered against the mission by the upload endpoint
+    import uploads
+    for i, handle in enumerate(uploads.attachments(mission_ref)):
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write(f"📎 {handle['name']} ({handle['size'] / 1048576:,.1f} MiB, {handle.get('user', '')}, {handle.get('added', '')})")
+        with col2:
+            blob_download_button('Download', handle, file_name=handle['name'],
+                                 key=f"{key_prefix}_{mission_ref}_{handle['sha256'][:12]}")
+
+# --- Flight log stats ---
+def flight_stats_summary(stats):
+    # Computed once when the report was submitted (flightlog.analyze)
+    if not stats:
+        return
+    st.write("**Flight Log**")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric('Flight Time', f"{stats['duration_min']} min", help=f"Airborne {stats['airborne_min']} min")
+    col2.metric('Distance', f"{stats['distance_nm']} NM")
+    col3.metric('Altitude', f"{stats['alt_min_m']:.0f}-{stats['alt_max_m']:.0f} m", help=f"Mean {stats['alt_mean_m']} m")
+    col4.metric('Speed', f"{stats['speed_mean_kt']} kt", help=f"99th percentile {stats['speed_p99_kt']} kt")
+    path = stats.get('path')
+    if path:
+        gaps = ', '.join(f'{start}-{end} NM' for start, end in path['gaps_nm'])
+        st.caption(f"Path coverage {path['coverage_pct']}% of {path['range_nm']} NM, "
+                   f"{path['on_path_min']} min on path" + (f"; gaps: {gaps}" if gaps else ''))
+    st.caption(f"{stats['samples']:,} samples, max vertical speed {stats['climb_max_ms']} m/s")
+
+# --- Measurement analyses ---
+def measurement_summary(handles):
+    # Cached per file hash (measurements.analyze), so reopening is instant
+    import measurements
+    rows = []
+    for handle in handles or []:
+        if not measurements.supported(handle.get('name')) or not blobstore.exists(handle):
+            continue
+        try:
+            with st.spinner(f"Analyzing {handle['name']}..."):
+                result = measurements.analyze(handle)
+        except measurements.MeasurementError as e:
+            st.caption(f"{handle['name']}: {e}")
+            continue
+        unit = result['unit']
+        rows.append({
+            'File': handle['name'],
+            'Kind': result['kind'],
+            'Duration (s)': result['duration_s'],
+            'Mean': f"{result['mean']} {unit}",
+            'Std': f"{result['std']} {unit}",
+            '95% |error|': f"{result['p95_abs']} {unit}",
+            'Tolerance': f"±{result['tolerance']} {unit}",
+            'Out of Tolerance': f"{result['out_of_tolerance_pct']}%",
+            'Segments': result['segments_total'],
+            'Max |error|': f"{max(abs(result['min']), abs(result['max']))} {unit}",
+        })
+    if rows:
+        st.write("**Measurements**")
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
+# --- Report packs ---
+def report_pack_button(ref, key_prefix):
+    # Packs render on a process pool (reportpack.py); this shows the state of
+    # the current report version's pack as of this run
+    import reportpack
+    job = reportpack.current(ref)
+    if job and job['status'] == 'done' and blobstore.exists(job.get('blob')):
+        blob_download_button('📦 Download Report Pack (PDF)', job['blob'], file_name=job['blob']['name'],
+                             key=f'{key_prefix}_pack_{ref}')
+    elif job and job['status'] in reportpack.ACTIVE:
+        st.progress(job.get('progress') or 0.0, text=f"Report pack: {job.get('stage') or 'Queued'}")
+    else:
+        if job and job['status'] == 'failed':
+            st.caption(f"Report pack failed: {job.get('error')}")
+        st.button('📦 Generate Report Pack', key=f'{key_prefix}_pack_{ref}', on_click=reportpack.request, args=(ref,))
+
+# --- Maintenance due ---
+def maintenance_due_table(limit=5):
+    # Top of the maintained due queue; nothing is ranked here
+    import maintenance
+    items = maintenance.due(limit)
+    if not items:
+        st.info('No maintenance due.')
+        return
+    st.dataframe(
+        [{
+            'Equipment': item['equipment'],
+            'Due': item['due'],
+            'Days Left': item['days_left'],
+            'Type': item['type'],
+            'Reason': item['reason'],
+            'Last Service': item['last_service'] or '-',
+            'Missions Since': item['missions_since'],
+        } for item in items],
+        use_container_width=True,
+        hide_index=True,
+    )
+
+# --- Header Layout ---
+# The badge reruns on its own timer, so changes made inside other fragments
+# show up without rerunning the whole page
+NOTIFICATION_REFRESH = '15s'
+
+@st.fragment(run_every=NOTIFICATION_REFRESH)
+def notification_badge():
+    # New problem reports, mission reports waiting for review and open alerts
+    import aggregates
+    import certificates
+    notifications = (
+        aggregates.count('problem_reports', status='New')
+        + aggregates.count('submitted_reports', status='Submitted')
+        + aggregates.count('alerts', status='Open')
+    )
+    if notifications > 0:
+        st.markdown(f'<div style="background-color: red; color: white; border-radius: 50%; width: 25px; height: 25px; text-align: center; line-height: 25px; margin-top: 10px;">{notifications}</div>', unsafe_allow_html=True)
+    expiring = certificates.count_expiring()
+    if expiring:
+        st.caption(f'🪪 {expiring} cert(s) expiring')
+
+def app_header():
+    col1, col2, col3 = st.columns([2,6,2])
+    with col1:
+        st.image('logo.png', width=80)
+    with col2:
+        st.title("Aviation Maintenance Management")
+        # Global Search Bar
+        search_query = st.text_input('Search (Airport, Mission, Drone, Problem Ref)', key='global_search', label_visibility='collapsed', placeholder='Search...')
+        if search_query:
+            from search import search as global_search
+            results = global_search(search_query, limit=10)
+            if results:
+                with st.container(border=True):
+                    st.caption(f"{len(results)} result(s) for: {search_query}")
+                    for score, collection, key, title in results:
+                        st.write(f"- {title}")
+            else:
+                st.info(f"No results for: {search_query}")
+    with col3:
+        role = st.session_state.get('role')
+        
+        if role == 'Chief of Unit':
+            col3_left, col3_right = st.columns([1,2])
+            with col3_left:
+                notification_badge()
+            with col3_right:
+                st.image(st.session_state.get('avatar', 'https://www.gravatar.com/avatar/00000000000000000000000000000000?d=mp&f=y'), width=40)
+        else:
+            st.image(st.session_state.get('avatar', 'https://www.gravatar.com/avatar/00000000000000000000000000000000?d=mp&f=y'), width=40)
+        st.text(st.session_state.get('username','Account'))
+        logout()
@@ -0,0 +1,561 @@
+import argparse
+import base64
+import fcntl
+import hashlib
+import hmac
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import blobstore
+import storage
+
+# --- Resumable uploads ---
+# Large mission attachments (multi-GB flight logs...) bypass st.file_uploader,
+# which holds the whole file in memory and is capped by the server upload
+# size. A small HTTP endpoint, started once per host next to the app, takes
+# them in chunks:
+#
+#   POST  /uploads       {name, size, modified, sha256?} -> {id, offset}
+#   PATCH /uploads/<id>  Upload-Offset + chunk (+ Upload-Checksum: sha256 <hex>)
+#   GET   /uploads/<id>  -> {offset, status}
+#   GET   /blobs/<sha256>?ticket=T  the blob, streamed (Range requests too)
+#
+# Each request carries a ticket (Authorization: Bearer ...) issued by the app
+# to a logged-in user for one mission. An upload's id is derived from the
+# ticket's user and mission and the file's name, size and modification time,
+# so starting the same file again (after a dropped link or a page reload)
+# resumes at the offset already stored.
+#
+# Chunks are checked against their checksum before being written at the
+# recorded offset of a part file; the offset is only moved once the chunk is
+# on disk. When the last chunk lands the part file is hashed (streamed),
+# checked against the declared SHA-256, moved into the blob store without a
+# copy and appended to the mission's 'attachments'. Memory use is bounded by
+# MAX_CHUNK whatever the file size.
+#
+# Writers of one upload are kept apart by a lock on its part file, not by the
+# store's write lock, which is only taken to move the offset from the value
+# the chunk was written at. Completing is claimed in the store first
+# ('completing'); a request that loses the claim gets that state back and
+# the client asks again until the upload is complete.
+#
+# Large blobs are downloaded from the same endpoint rather than through
+# Streamlit, which would hold the whole file in memory: a link carries a
+# ticket for one blob and the file is sent CHUNK_SIZE at a time from the
+# blob store, resuming from a byte range if the browser asks for one.
+#
+# Run a client from the command line with: python -m uploads FILE --ticket T
+
+UPLOAD_DIR = os.path.join(blobstore.BLOB_DIR, 'uploads')
+# Local connections only; set to '0.0.0.0' (or an interface address) to
+# take uploads from other machines
+UPLOAD_HOST = os.environ.get('GESTIONUNITE_UPLOAD_HOST', '127.0.0.1')
+UPLOAD_PORT = int(os.environ.get('GESTIONUNITE_UPLOAD_PORT', '8502'))
+# Where browsers and clients reach the endpoint
+UPLOAD_URL = os.environ.get('GESTIONUNITE_UPLOAD_URL', f'http://localhost:{UPLOAD_PORT}')
+# Origins of the app pages allowed to call the endpoint from a browser
+# (comma separated); the first one is answered to any other origin
+APP_ORIGINS = [o.strip().rstrip('/') for o in
+               os.environ.get('GESTIONUNITE_APP_URL', 'http://localhost:8501').split(',') if o.strip()]
+
+CHUNK_SIZE = 8 * 1024 * 1024     # suggested to clients
+MAX_CHUNK = 16 * 1024 * 1024     # largest chunk accepted
+TICKET_HOURS = 24
+STALE_DAYS = 7                   # unfinished uploads are dropped after this
+COMPLETING_MINUTES = 10          # a completion claim older than this was abandoned
+
+log = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+    def __init__(self, status, message, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+# --- Tickets ---
+_secret_key = None
+
+
+def _secret():
+    # Per-installation signing key, created once and shared by all
+    # processes. It is written in full to a temporary file and linked into
+    # place, so no process ever reads a partly written key.
+    global _secret_key
+    if _secret_key is None:
+        path = os.path.join(UPLOAD_DIR, '.secret')
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        if not os.path.exists(path):
+            fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(os.urandom(32))
+                    f.flush()
+                    os.fsync(f.fileno())
+                try:
+                    os.link(tmp_path, path)
+                except FileExistsError:
+                    # Another process got there first; use its key
+                    pass
+            finally:
+                os.remove(tmp_path)
+        with open(path, 'rb') as f:
+            _secret_key = f.read()
+    return _secret_key
+
+
+def _sign(payload):
+    return hmac.new(_secret(), payload, hashlib.sha256).hexdigest()
+
+
+def _token(claims, hours):
+    payload = base64.urlsafe_b64encode(json.dumps(dict(claims, exp=int(time.time() + hours * 3600))).encode())
+    return f'{payload.decode()}.{_sign(payload)}'
+
+
+def _claims(token):
+    try:
+        payload, signature = token.encode().rsplit(b'.', 1)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (ValueError, AttributeError):
+        raise UploadError(401, 'Invalid ticket') from None
+    if not hmac.compare_digest(signature.decode(), _sign(payload)):
+        raise UploadError(401, 'Invalid ticket')
+    if claims['exp'] < time.time():
+        raise UploadError(401, 'Ticket expired')
+    return claims
+
+
+def ticket(user, mission_ref, hours=TICKET_HOURS):
+    """A token letting 'user' upload attachments for one mission."""
+    return _token({'user': user, 'mission': mission_ref}, hours)
+
+
+def check_ticket(token):
+    """(user, mission_ref) of a valid upload ticket; raises UploadError otherwise."""
+    claims = _claims(token)
+    if 'mission' not in claims:
+        raise UploadError(401, 'Not an upload ticket')
+    return claims['user'], claims['mission']
+
+
+def blob_url(handle, file_name, hours=TICKET_HOURS):
+    """A link that downloads one blob from the endpoint as 'file_name'."""
+    token = _token({'blob': handle['sha256'], 'name': file_name, 'type': handle.get('type')}, hours)
+    return f"{UPLOAD_URL}/blobs/{handle['sha256']}?{urllib.parse.urlencode({'ticket': token})}"
+
+
+def _byte_range(header, size):
+    # (start, end) of a single 'bytes=' range, end excluded; None for the
+    # whole file. Raises UploadError 416 when it lies outside the file.
+    unit, _, spec = (header or '').partition('=')
+    if unit.strip() != 'bytes' or ',' in spec:
+        return None
+    first, _, last = spec.strip().partition('-')
+    try:
+        if not first:
+            start, end = max(0, size - int(last)), size
+        else:
+            start, end = int(first), min(size, int(last) + 1) if last else size
+    except ValueError:
+        return None
+    if start >= end:
+        raise UploadError(416, 'Range not satisfiable')
+    return start, end
+
+
+# --- Uploads ---
+def _part_path(upload_id):
+    return os.path.join(UPLOAD_DIR, f'{upload_id}.part')
+
+
+def _now(seconds_ago=0):
+    return datetime.fromtimestamp(time.time() - seconds_ago).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def start(user, mission_ref, name, size, modified='', sha256=None):
+    """Create an upload, or find the one already started for the same file."""
+    if storage.fetch('missions', mission_ref) is None:
+        raise UploadError(404, f'No mission {mission_ref}')
+    name = os.path.basename(str(name or '')).strip()
+    if not name or not isinstance(size, int) or size <= 0:
+        raise UploadError(400, 'An upload needs a file name and a positive size')
+    key = json.dumps([user, mission_ref, name, size, str(modified or '')])
+    upload_id = hashlib.sha256(key.encode()).hexdigest()[:32]
+    upload = storage.fetch('uploads', upload_id)
+    if upload is not None and upload['status'] != 'complete' and upload['offset'] == upload['size']:
+        # All chunks arrived: complete, or see how completing is going
+        return _complete(upload)
+    if upload is not None and upload['status'] == 'open':
+        return upload
+    record = {
+        'id': upload_id,
+        'mission_ref': mission_ref,
+        'user': user,
+        'name': name,
+        'size': size,
+        'modified': str(modified or ''),
+        'sha256': sha256,
+        'offset': 0,
+        'status': 'open',
+        'blob': None,
+        'created': _now(),
+        'updated': _now(),
+    }
+    if upload is not None and blobstore.exists(upload['blob']):
+        # Already here, e.g. the reply to the last chunk was lost
+        return upload
+    if upload is not None:
+        return storage.update('uploads', upload_id, dict(record, created=upload['created']))
+    return storage.insert('uploads', record)
+
+
+def _get(upload_id, user, mission_ref):
+    upload = storage.fetch('uploads', upload_id)
+    if upload is None or upload['user'] != user or upload['mission_ref'] != mission_ref:
+        raise UploadError(404, 'No such upload')
+    return upload
+
+
+def write_chunk(upload_id, user, mission_ref, offset, stream, length, checksum=None):
+    """Append 'length' bytes read from 'stream' at 'offset'; returns the upload.
+
+    Raises UploadError 409 (with the current offset) when the offset is not
+    where the upload stands, so the client can resume from there.
+    """
+    if length <= 0 or length > MAX_CHUNK:
+        raise UploadError(413, f'Chunks must be 1..{MAX_CHUNK} bytes')
+    upload = _get(upload_id, user, mission_ref)
+    _check_offset(upload, offset, length)
+    # Read off the (slow) link before taking any lock
+    chunk = stream.read(length)
+    if len(chunk) != length:
+        raise UploadError(400, 'Chunk shorter than announced', offset=offset)
+    if checksum and hashlib.sha256(chunk).hexdigest() != checksum.lower():
+        raise UploadError(460, 'Chunk checksum mismatch', offset=offset)
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    with open(_part_path(upload_id), 'ab') as f:
+        # Serializes writers of the same upload across threads and processes
+        fcntl.flock(f, fcntl.LOCK_EX)
+        _check_offset(storage.fetch('uploads', upload_id), offset, length)
+        if os.fstat(f.fileno()).st_size < offset:
+            # Part file gone: start over
+            _move_offset(upload_id, offset, 0)
+            raise UploadError(409, 'Upload data lost; restarting', offset=0)
+        # Drop anything written past the last acknowledged offset
+        f.truncate(offset)
+        f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+        upload = _move_offset(upload_id, offset, offset + length)
+    if upload['offset'] == upload['size']:
+        upload = _complete(upload)
+    return upload
+
+
+def _move_offset(upload_id, offset, new_offset):
+    # Only from where the chunk was written: anything else moved it meanwhile
+    try:
+        return storage.update('uploads', upload_id, {'offset': new_offset, 'updated': _now()},
+                              expected={'offset': offset, 'status': 'open'})
+    except (storage.Conflict, KeyError):
+        upload = storage.fetch('uploads', upload_id)
+        raise UploadError(409, 'Offset mismatch', offset=upload['offset'] if upload else 0) from None
+
+
+def _check_offset(upload, offset, length):
+    if upload is None:
+        raise UploadError(404, 'No such upload')
+    if upload['status'] != 'open':
+        raise UploadError(409, 'Upload already complete', offset=upload['offset'])
+    if offset != upload['offset']:
+        raise UploadError(409, 'Offset mismatch', offset=upload['offset'])
+    if offset + length > upload['size']:
+        raise UploadError(400, 'Chunk goes past the declared size')
+
+
+def _complete(upload):
+    """Move a fully received upload into the blob store; returns the upload,
+    'completing' while another request is at it."""
+    with storage.atomic() as tx:
+        upload = tx.fetch('uploads', upload['id'])
+        if upload is None:
+            raise UploadError(404, 'No such upload')
+        if upload['status'] == 'complete' or upload['offset'] != upload['size']:
+            return upload
+        if upload['status'] == 'completing' and upload['updated'] > _now(COMPLETING_MINUTES * 60):
+            return upload
+        upload = tx.update('uploads', upload['id'], {'status': 'completing', 'updated': _now()})
+    path = _part_path(upload['id'])
+    try:
+        digest = blobstore.digest(path)
+        if upload.get('sha256') and digest != upload['sha256'].lower():
+            # Not the file the client meant to send; start over
+            storage.update('uploads', upload['id'], {'status': 'open', 'offset': 0, 'updated': _now()})
+            raise UploadError(460, 'File checksum mismatch; upload restarted', offset=0)
+        handle = blobstore.put_path(path, upload['name'], sha256=digest)
+    except FileNotFoundError:
+        storage.update('uploads', upload['id'], {'status': 'open', 'offset': 0, 'updated': _now()})
+        raise UploadError(409, 'Upload data lost; restarting', offset=0) from None
+    except UploadError:
+        raise
+    except Exception:
+        # Release the claim; the next request for the upload tries again
+        storage.update('uploads', upload['id'], {'status': 'open', 'updated': _now()})
+        raise
+    with storage.atomic() as tx:
+        mission = tx.fetch('missions', upload['mission_ref'])
+        if mission is not None:
+            attachments = [a for a in mission.get('attachments') or [] if a['sha256'] != handle['sha256']]
+            attachments.append(dict(handle, user=upload['user'], added=_now()))
+            tx.update('missions', upload['mission_ref'], {'attachments': attachments})
+        return tx.update('uploads', upload['id'], {'status': 'complete', 'blob': handle, 'updated': _now()})
+
+
+def expire(days=STALE_DAYS):
+    """Remove unfinished uploads untouched for 'days'; returns how many."""
+    cutoff = _now(days * 86400)
+    removed = 0
+    for upload in storage.find('uploads', status='open'):
+        if upload['updated'] < cutoff:
+            if os.path.exists(_part_path(upload['id'])):
+                os.remove(_part_path(upload['id']))
+            storage.delete('uploads', upload['id'])
+            removed += 1
+    return removed
+
+
+def _public(upload):
+    return {k: upload.get(k) for k in ('id', 'name', 'size', 'offset', 'status')} | {'chunk_size': CHUNK_SIZE}
+
+
+# --- HTTP endpoint ---
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        log.debug(format, *args)
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self._cors()
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _cors(self):
+        origin = (self.headers.get('Origin') or '').rstrip('/')
+        self.send_header('Access-Control-Allow-Origin', origin if origin in APP_ORIGINS else APP_ORIGINS[0])
+        self.send_header('Vary', 'Origin')
+        self.send_header('Access-Control-Allow-Headers',
+                         'Authorization, Content-Type, Upload-Offset, Upload-Checksum')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PATCH, OPTIONS')
+
+    def _handle(self, action):
+        try:
+            user, mission_ref = check_ticket(self.headers.get('Authorization', '').removeprefix('Bearer ').strip())
+            self._reply(200, _public(action(user, mission_ref)))
+        except UploadError as e:
+            # Unread request bodies would be taken for the next request
+            self.close_connection = True
+            self._reply(e.status, {'error': str(e)} | e.extra)
+        except Exception:
+            log.exception('Upload request failed')
+            self.close_connection = True
+            self._reply(500, {'error': 'Upload failed'})
+
+    def _upload_id(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'uploads':
+            raise UploadError(404, 'Not found')
+        return parts[1]
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self._cors()
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        def action(user, mission_ref):
+            if self.path.rstrip('/') != '/uploads':
+                raise UploadError(404, 'Not found')
+            length = int(self.headers.get('Content-Length') or 0)
+            if not 0 < length <= 64 * 1024:
+                raise UploadError(400, 'Expected a JSON file description')
+            try:
+                info = json.loads(self.rfile.read(length))
+            except ValueError:
+                raise UploadError(400, 'Expected a JSON file description') from None
+            return start(user, mission_ref, info.get('name'), info.get('size'),
+                         info.get('modified'), info.get('sha256'))
+        self._handle(action)
+
+    def do_PATCH(self):
+        def action(user, mission_ref):
+            checksum = self.headers.get('Upload-Checksum', '')
+            return write_chunk(self._upload_id(), user, mission_ref, int(self.headers.get('Upload-Offset', -1)),
+                               self.rfile, int(self.headers.get('Content-Length') or 0),
+                               checksum.removeprefix('sha256 ').strip() or None)
+        self._handle(action)
+
+    def do_GET(self):
+        if self.path.startswith('/blobs/'):
+            return self._send_blob()
+        self._handle(lambda user, mission_ref: _get(self._upload_id(), user, mission_ref))
+
+    def _send_blob(self):
+        url = urllib.parse.urlsplit(self.path)
+        try:
+            claims = _claims(urllib.parse.parse_qs(url.query).get('ticket', [''])[0])
+            handle = {'sha256': url.path.removeprefix('/blobs/')}
+            if claims.get('blob') != handle['sha256']:
+                raise UploadError(403, 'The ticket is for another file')
+            if not blobstore.exists(handle):
+                raise UploadError(404, 'No such file')
+            size = os.path.getsize(blobstore.path(handle))
+            byte_range = _byte_range(self.headers.get('Range'), size)
+        except UploadError as e:
+            self.close_connection = True
+            headers = {'Content-Range': f'bytes */{size}'} if e.status == 416 else {}
+            return self._reply(e.status, {'error': str(e)}, headers)
+        start, end = byte_range or (0, size)
+        self.send_response(206 if byte_range else 200)
+        self.send_header('Content-Type', claims.get('type') or 'application/octet-stream')
+        self.send_header('Content-Length', str(end - start))
+        self.send_header('Accept-Ranges', 'bytes')
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end - 1}/{size}')
+        self.send_header('Content-Disposition',
+                         f"attachment; filename*=UTF-8''{urllib.parse.quote(claims.get('name') or handle['sha256'])}")
+        self.end_headers()
+        try:
+            for chunk in blobstore.stream(handle, start, end):
+                self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            # The browser stopped the download; it resumes with a range
+            self.close_connection = True
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_server(host=UPLOAD_HOST, port=UPLOAD_PORT):
+    """Serve uploads from a daemon thread, once per host: when another
+    process already holds the port, it serves them."""
+    global _server
+    if _server is None:
+        with _server_lock:
+            if _server is None:
+                try:
+                    server = ThreadingHTTPServer((host, port), _Handler)
+                except OSError:
+                    _server = False
+                    return None
+                server.daemon_threads = True
+                threading.Thread(target=server.serve_forever, name='uploads', daemon=True).start()
+                try:
+                    expire()
+                except Exception:
+                    log.exception('Expiring stale uploads failed')
+                _server = server
+    return _server or None
+
+
+def attachments(mission_ref):
+    mission = storage.fetch('missions', mission_ref)
+    return list((mission or {}).get('attachments') or [])
+
+
+# --- Command line client ---
+def _request(method, url, token, body=b'', headers=()):
+    request = urllib.request.Request(url, data=body or None, method=method,
+                                     headers={'Authorization': f'Bearer {token}', **dict(headers)})
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b'{}')
+
+
+def send(path, token, url=UPLOAD_URL, retries=20):
+    """Upload a file, resuming where a previous attempt stopped."""
+    size = os.path.getsize(path)
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blobstore.CHUNK_SIZE), b''):
+            sha.update(block)
+    info = {'name': os.path.basename(path), 'size': size, 'modified': int(os.path.getmtime(path)),
+            'sha256': sha.hexdigest()}
+    failures = 0
+    upload = None
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                if upload is None:
+                    status, upload = _request('POST', f'{url}/uploads', token, json.dumps(info).encode(),
+                                              {'Content-Type': 'application/json'})
+                    if status != 200:
+                        raise SystemExit(upload.get('error'))
+                if upload['status'] == 'complete':
+                    return upload
+                if upload['status'] == 'completing':
+                    # Being moved into place by another request
+                    time.sleep(2)
+                    upload = None
+                    continue
+                f.seek(upload['offset'])
+                chunk = f.read(upload.get('chunk_size', CHUNK_SIZE))
+                status, reply = _request('PATCH', f"{url}/uploads/{upload['id']}", token, chunk, {
+                    'Upload-Offset': str(upload['offset']),
+                    'Upload-Checksum': f'sha256 {hashlib.sha256(chunk).hexdigest()}',
+                    'Content-Type': 'application/offset+octet-stream',
+                })
+                if status == 200:
+                    upload = dict(upload, **reply)
+                    failures = 0
+                    print(f"\r{upload['offset'] * 100 // size}% of {size:,} bytes", end='', file=sys.stderr)
+                elif 'offset' in reply:
+                    # Resume wherever the server stands
+                    upload['offset'] = reply['offset']
+                    failures += 1
+                else:
+                    raise SystemExit(reply.get('error', f'HTTP {status}'))
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                failures += 1
+                print(f'\n{e}; retrying', file=sys.stderr)
+                upload = None
+            if failures > retries:
+                raise SystemExit('Giving up after repeated failures')
+            if failures:
+                time.sleep(min(2 ** failures, 60))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Upload a mission attachment, resuming if interrupted.')
+    parser.add_argument('file')
+    parser.add_argument('--ticket', required=True, help='upload ticket shown on the mission report page')
+    parser.add_argument('--url', default=UPLOAD_URL)
+    args = parser.parse_args(argv)
+    upload = send(args.file, args.ticket, args.url)
+    print(f"\n{upload['name']} uploaded ({upload['size']:,} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import streamlit as st
+
+import aggregates
+import assignments
+import storage
+from ui import maintenance_due_table, paged_records
+
+# --- ATSEP Interface ---
+def answer_notification(notif, assignment):
+    # Sets the mission's assignment and removes the notification together
+    answered = assignments.answer(notif['id'], assignment)
+    st.session_state[f"answered_{notif['id']}"] = assignment if answered else None
+
+@st.fragment
+def mission_notification(notif):
+    # Accepting or rejecting reruns only this notification; the counters and
+    # the mission history catch up on the next full run of the page
+    with st.container(border=True):
+        key = f"answered_{notif['id']}"
+        if key in st.session_state:
+            answered = st.session_state[key]
+            if answered:
+                st.success(f"Mission {notif['mission_ref']} {answered.lower()}.")
+            else:
+                st.info(f"Mission {notif['mission_ref']} was already answered.")
+            return
+        st.warning(f"🔔 New Mission Assignment!")
+        st.write(f"**Airport:** {notif['airport']}")
+        st.write(f"**Mission Reference:** {notif['mission_ref']}")
+        st.write(f"**Problem:** {notif['problem']}")
+        col1, col2 = st.columns([3,1])
+        with col2:
+            st.button("Accept Mission", key=f"accept_{notif['mission_ref']}",
+                      on_click=answer_notification, args=(notif, 'Accepted'))
+            st.button("Reject", key=f"reject_{notif['mission_ref']}",
+                      on_click=answer_notification, args=(notif, 'Rejected'))
+
+def atsep_dashboard():
+    st.header('ATSEP Dashboard')
+    st.caption('Manage your missions and maintenance tasks')
+    
+    # Get mission counts
+    completed = aggregates.count('missions', status='Done', assignment='Accepted')
+    in_progress = aggregates.count('missions', status='En cours', assignment='Accepted')
+    new_assignments = aggregates.count('missions', assignment='New')
+    
+    # Summary Cards
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        with st.container(border=True):
+            st.markdown(f"### {completed}")
+            st.markdown("#### ✓ Completed Missions")
+            st.caption("Successfully completed")
+            
+    with col2:
+        with st.container(border=True):
+            st.markdown(f"### {in_progress}")
+            st.markdown("#### 🕒 In Progress")
+            st.caption("Currently working on")
+            
+    with col3:
+        with st.container(border=True):
+            st.markdown(f"### {new_assignments}")
+            st.markdown("#### 🔔 New Assignments")
+            st.caption("Waiting for acceptance")
+    
+    # Equipment due for maintenance, most urgent first
+    st.markdown("## Maintenance Due")
+    maintenance_due_table(10)
+    
+    # Show notifications for new missions
+    if storage.count('atsep_notifications', type='new_mission'):
+        st.markdown("## New Mission Notifications")
+        notifications = paged_records('atsep_notifications', 'atsep_notifications_page', type='new_mission')
+        for notif in notifications:
+            mission_notification(notif)
+    
+    # Mission History
+    st.markdown("## Mission History")
+    st.caption("History of your assigned maintenance missions")
+    
+    # Filter missions assigned to this ATSEP
+    atsep_missions = paged_records('missions', 'atsep_missions_page', assignment='Accepted')
+    if not atsep_missions:
+        st.info("No missions assigned yet. Check notifications for new assignments.")
+    else:
+        mission_data = []
+        for mission in atsep_missions:
+            mission_data.append({
+                'Status': mission['status'],
+                'Airport': mission['airport'],
+                'Reference': mission['ref'],
+                'Dates': f"{mission['date_start']} - {mission['date_finish']}",
+                'Duration': mission['duration'],
+                'Problem': mission['problem'],
+                'Actions': '📋 View Details'
+            })
+        st.dataframe(
+            mission_data,
+            use_container_width=True,
+            column_config={
+                'Status': st.column_config.TextColumn(
+                    'Status',
+                    help='Current status of the mission'
+                ),
+                'Actions': st.column_config.TextColumn(
+                    'Actions',
+                    help='Available actions for this mission'
+                )
+            }
+        )
+
+atsep_dashboard()
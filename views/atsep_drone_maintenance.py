@@ -0,0 +1,82 @@
+import streamlit as st
+
+import maintenance
+from ui import paged_records
+
+def atsep_drone_maintenance():
+    st.header('Drone Maintenance')
+    
+    # Add Maintenance Record form. It stays rendered across reruns (a button
+    # would only show it on the run it was clicked, losing the submission).
+    # Open work and a next due date feed the maintenance due queue.
+    with st.expander("➕ Add Maintenance Record"):
+        with st.form("maintenance_form", clear_on_submit=True):
+            st.caption("Record maintenance performed or planned on drone equipment")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                date = st.date_input("Date")
+                equipment = st.text_input("Equipment", placeholder="e.g., D001 or DJI Matrice 300 RTK")
+                maintenance_type = st.selectbox("Maintenance Type", maintenance.TYPES)
+                
+            with col2:
+                status = st.selectbox("Status", maintenance.STATUSES)
+                next_date = st.date_input("Next Maintenance Due (optional)", value=None)
+                parts_changed = st.text_input("Parts Changed", 
+                                            placeholder="e.g., Propellers, Battery pack (optional)")
+            
+            notes = st.text_area("Description of Work", placeholder="Detailed notes about the maintenance performed...")
+            findings = st.text_area("Findings/Issues")
+            actions = st.text_area("Actions Taken")
+            
+            col1, col2 = st.columns([4,1])
+            with col2:
+                submitted = st.form_submit_button("Add Record", type="primary", use_container_width=True)
+            
+            if submitted:
+                if not equipment.strip():
+                    st.error("Equipment is required.")
+                else:
+                    maintenance.log({
+                        'equipment': equipment.strip(),
+                        'date': date.strftime('%Y-%m-%d'),
+                        'type': maintenance_type,
+                        'status': status,
+                        'next_date': next_date.strftime('%Y-%m-%d') if next_date else None,
+                        'description': notes,
+                        'parts': parts_changed,
+                        'findings': findings,
+                        'actions': actions,
+                        'technician': st.session_state.get('username', 'Unknown'),
+                    })
+                    st.success("Maintenance record added successfully!")
+    
+    # Display maintenance records, newest first straight from the log index
+    st.markdown("## Maintenance History")
+    st.caption("Record of all maintenance activities performed on drone equipment")
+    
+    maintenance_records = paged_records('maintenance_log', 'atsep_maintenance_page')
+    if not maintenance_records:
+        st.info("No maintenance records found. Add your first record above.")
+    else:
+        st.dataframe(
+            maintenance_records,
+            use_container_width=True,
+            column_order=['equipment', 'date', 'type', 'status', 'next_date', 'description', 'parts', 'findings',
+                          'actions', 'technician', 'timestamp'],
+            column_config={
+                'equipment': st.column_config.TextColumn('Equipment'),
+                'date': st.column_config.TextColumn('Date'),
+                'type': st.column_config.TextColumn('Type'),
+                'status': st.column_config.TextColumn('Status'),
+                'next_date': st.column_config.TextColumn('Next Due'),
+                'description': st.column_config.TextColumn('Description'),
+                'parts': st.column_config.TextColumn('Parts Changed'),
+                'findings': st.column_config.TextColumn('Findings'),
+                'actions': st.column_config.TextColumn('Actions Taken'),
+                'technician': st.column_config.TextColumn('Technician'),
+                'timestamp': st.column_config.TextColumn('Added On')
+            }
+        )
+
+atsep_drone_maintenance()
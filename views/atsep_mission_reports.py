@@ -0,0 +1,180 @@
+import sqlite3
+import streamlit as st
+from datetime import datetime
+
+import aggregates
+import blobstore
+import flightlog
+import measurements
+import storage
+from ui import (blob_download_button, chunked_uploader, flight_stats_summary, measurement_summary, mission_attachments,
+                paged_records)
+
+def atsep_mission_reports():
+    st.header('Mission Report')
+    st.subheader('Submit Mission Report')
+    st.caption('Complete the fields below to submit a report for a completed mission')
+    
+    # Get accepted missions for selection
+    missions = [m for m in storage.find('missions', assignment='Accepted')
+               if m['status'] != 'Done']
+    
+    with st.form("mission_report_form"):
+        # Mission Selection
+        selected_mission = st.selectbox(
+            "Select Mission",
+            options=['Select a mission...'] + [m['ref'] for m in missions],
+            key='mission_select'
+        )
+        
+        # Auto-fill mission details if selected
+        selected_data = next((m for m in missions if m['ref'] == selected_mission), None)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            airport = st.text_input("Airport", value=selected_data['airport'] if selected_data else '')
+            start_date = st.date_input("Start Date")
+            completion_date = st.date_input("Completion Date")
+            
+        with col2:
+            status = st.selectbox("Status", ["Completed", "Partially Completed", "Need Follow-up"])
+            pilot = st.text_input("Pilot Name")
+            analyst = st.text_input("Data Analyst")
+        
+        findings = st.text_area("Findings", height=150)
+        actions = st.text_area("Actions Taken", height=150)
+        recommendations = st.text_area("Recommendations", height=150)
+          # File Upload Section
+        col1, col2 = st.columns(2)
+        with col1:
+            flight_profile = st.file_uploader("Upload Flight Profile", type=['pdf', 'doc', 'docx'] + list(flightlog.FORMATS),
+                                              help='CSV, GPX or .flog flight logs are analyzed on submit')
+            if flight_profile:
+                st.success(f"Flight profile {flight_profile.name} ready for upload")
+            
+        with col2:
+            mission_report_file = st.file_uploader("Upload Mission Report", type=['pdf', 'doc', 'docx'])
+            if mission_report_file:
+                st.success(f"Mission report {mission_report_file.name} ready for upload")
+        
+        # ILS/VOR recordings from the data analyst
+        measurement_files = st.file_uploader("Upload Measurement Files (.nav)", type=['nav'], accept_multiple_files=True)
+        
+        # Inspected facility, for the path coverage of flight logs
+        with st.expander("Inspected facility (optional)"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                facility_lat = st.number_input("Latitude (°)", min_value=-90.0, max_value=90.0, value=None, format="%.6f")
+                facility_lon = st.number_input("Longitude (°)", min_value=-180.0, max_value=180.0, value=None, format="%.6f")
+            with col2:
+                facility_bearing = st.number_input("Inspected radial / approach bearing (°)", min_value=0.0, max_value=360.0, value=None,
+                                                   help='Bearing from the facility along the inspected path')
+                facility_range = st.number_input("Range (NM)", min_value=0.5, value=10.0)
+            with col3:
+                facility_glide = st.number_input("Glide path angle (°)", min_value=0.0, max_value=10.0, value=None,
+                                                 help='Leave empty for a radial')
+                facility_elev = st.number_input("Facility elevation (m)", value=0.0)
+        
+        submitted = st.form_submit_button("Submit Report", type="primary")
+        if submitted and selected_mission != 'Select a mission...':
+            flight_profile_blob = blobstore.put_upload(flight_profile)
+            
+            # Summarize telemetry now so reviewers never re-parse the log
+            flight_stats = None
+            if flight_profile and flightlog.supported(flight_profile.name):
+                facility = None
+                if None not in (facility_lat, facility_lon, facility_bearing):
+                    facility = {'lat': facility_lat, 'lon': facility_lon, 'bearing': facility_bearing,
+                                'range_nm': facility_range, 'glide': facility_glide, 'elev': facility_elev}
+                try:
+                    flight_stats = flightlog.analyze(flight_profile_blob, facility)
+                except flightlog.FlightLogError as e:
+                    st.warning(f"Flight log not analyzed: {e}")
+            
+            # Analyzed once here; the results are cached under the file hash
+            measurement_blobs = [blobstore.put_upload(f) for f in measurement_files or []]
+            for handle in measurement_blobs:
+                try:
+                    measurements.analyze(handle)
+                except measurements.MeasurementError as e:
+                    st.warning(f"{handle['name']} not analyzed: {e}")
+            
+            # Create report data
+            report_data = {
+                'ref': selected_mission,
+                'airport': airport,
+                'date_start': start_date.strftime('%Y-%m-%d'),
+                'date_finish': completion_date.strftime('%Y-%m-%d'),
+                'status': 'Submitted',  # Set to Submitted for chief's notification
+                'mission_status': status,  # Store the actual mission completion status
+                'pilote': pilot,
+                'data_analyst': analyst,
+                'findings': findings,
+                'actions': actions,
+                'recommendations': recommendations,
+                'flight_profile': {
+                    'name': flight_profile.name if flight_profile else None,
+                    'blob': flight_profile_blob
+                },
+                'flight_stats': flight_stats,
+                'measurements': measurement_blobs,
+                'report': {
+                    'name': mission_report_file.name if mission_report_file else None,
+                    'blob': blobstore.put_upload(mission_report_file)
+                },
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            
+            # Store the report in the shared store
+            try:
+                storage.insert('submitted_reports', report_data)
+            except sqlite3.IntegrityError:
+                st.error(f"A report for mission {selected_mission} was already submitted.")
+            else:
+                # Update mission status
+                storage.update('missions', selected_mission, {'status': 'Done'})
+                
+                # Clear the form
+                st.success("Mission report submitted successfully!")
+                st.rerun()
+    
+    # Large files (flight logs, recordings) go in resumable chunks and are
+    # attached to the mission when complete
+    st.markdown("## Large Attachments")
+    st.caption("Files of any size; an interrupted upload resumes where it stopped")
+    accepted = storage.find('missions', assignment='Accepted')
+    attach_ref = st.selectbox("Mission", ['Select a mission...'] + [m['ref'] for m in accepted], key='attach_mission')
+    if attach_ref != 'Select a mission...':
+        chunked_uploader(attach_ref)
+        st.button("Refresh attachments", key='refresh_attachments')
+        mission_attachments(attach_ref, 'atsep_attachment')
+    
+    # Display submitted reports, most recent first, a page at a time
+    if aggregates.count('submitted_reports'):
+        st.markdown("## Submitted Reports")
+        for report in paged_records('submitted_reports', 'atsep_reports_page'):
+            with st.expander(f"Report for Mission {report['ref']} - {report['airport']}"):
+                st.write(f"**Status:** {report['status']}")
+                st.write(f"**Date Range:** {report['date_start']} to {report['date_finish']}")
+                st.write(f"**Team:** Pilot: {report['pilote']}, Analyst: {report['data_analyst']}")
+                st.write("**Findings:**", report['findings'])
+                st.write("**Actions Taken:**", report['actions'])
+                st.write("**Recommendations:**", report['recommendations'])
+                flight_stats_summary(report.get('flight_stats'))
+                measurement_summary(report.get('measurements'))
+                if report['flight_profile']['name']:
+                    blob_download_button(
+                        "Download Flight Profile",
+                        report['flight_profile']['blob'],
+                        file_name=report['flight_profile']['name'],
+                        key=f"dl_profile_{report['ref']}"
+                    )
+                if report['report']['name']:
+                    blob_download_button(
+                        "Download Mission Report",
+                        report['report']['blob'],
+                        file_name=report['report']['name'],
+                        key=f"dl_report_{report['ref']}"
+                    )
+
+atsep_mission_reports()
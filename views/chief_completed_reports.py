@@ -0,0 +1,183 @@
+import streamlit as st
+
+import aggregates
+import reportpack
+import storage
+from ui import (blob_download_button, flight_stats_summary, measurement_summary, mission_attachments, paged_records,
+                report_pack_button)
+
+# --- Report Packs ---
+# Packs render in background processes. The job list reruns on its own to
+# show their progress, but only while some are queued or rendering; the
+# month's reports are looked up when packs are asked for, not on each rerun
+@st.fragment
+def pack_month_controls():
+    months = reportpack.months()
+    if months:
+        col1, col2 = st.columns([2, 3])
+        with col1:
+            month = st.selectbox('Month', months, key='pack_month')
+        with col2:
+            st.write('')
+            if st.button('Generate packs for the month', key='pack_month_generate'):
+                jobs = reportpack.request_many(reportpack.submitted_in(month))
+                st.session_state['pack_month_requested'] = f'{len(jobs)} pack(s) requested for {month}'
+                # Rerun the page so the job list starts following them
+                st.rerun()
+        if 'pack_month_requested' in st.session_state:
+            st.caption(st.session_state.pop('pack_month_requested'))
+
+def pack_jobs(polling):
+    jobs = reportpack.active()
+    if jobs:
+        st.caption(f'{len(jobs)} pack(s) queued or rendering')
+        for job in jobs[:10]:
+            st.progress(job.get('progress') or 0.0, text=f"Mission {job['ref']}: {job.get('stage') or 'Queued'}")
+    elif polling:
+        # All done: rerun the page once to stop polling
+        st.rerun()
+    else:
+        st.caption('No packs rendering. Finished packs are downloaded from each report below.')
+
+def report_packs_panel():
+    with st.expander('📦 Report Packs'):
+        pack_month_controls()
+        polling = bool(reportpack.active())
+        st.fragment(pack_jobs, run_every='3s' if polling else None)(polling)
+
+# --- Completed Missions Reports ---
+def chief_completed_missions_reports():
+    st.header('Completed Mission Reports')
+    st.caption('Review and manage completed mission reports')
+    report_packs_panel()
+
+    total_reports = aggregates.count('submitted_reports')
+    if total_reports:
+        # Group reports by status
+        pending_count = aggregates.count('submitted_reports', status='Submitted')
+        
+        # Show unreviewed reports first, oldest first
+        if pending_count:
+            st.warning(f"You have {pending_count} new mission report(s) to review")
+            st.markdown("### New Reports Pending Review")
+            unreviewed_reports = paged_records('submitted_reports', 'pending_reports_page',
+                                               status='Submitted', descending=False)
+            for report in unreviewed_reports:
+                with st.expander(f"🆕 Mission {report['ref']} - {report['airport']}", expanded=True):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.write("**Mission Details**")
+                        st.write(f"Airport: {report['airport']}")
+                        st.write(f"Start Date: {report['date_start']}")
+                        st.write(f"Completion Date: {report['date_finish']}")
+                        st.write(f"Mission Status: {report['mission_status']}")
+                        st.write(f"Submitted: {report['timestamp']}")
+                    
+                    with col2:
+                        st.write("**Team**")
+                        st.write(f"Pilot: {report['pilote']}")
+                        st.write(f"Data Analyst: {report['data_analyst']}")
+                          # Add review controls
+                        new_status = st.selectbox(
+                            "Review Status",
+                            ["Approved", "Needs Revision"],
+                            key=f"review_{report['ref']}"
+                        )
+                        if st.button("Submit Review", key=f"submit_review_{report['ref']}"):
+                            storage.update('submitted_reports', report['ref'], {'status': new_status})
+                            st.success(f"Report marked as {new_status}")
+                            st.rerun()
+                    
+                    st.markdown("---")
+                    st.write("**Findings**")
+                    st.write(report['findings'])
+                    
+                    st.write("**Actions Taken**")
+                    st.write(report['actions'])
+                    
+                    st.write("**Recommendations**")
+                    st.write(report['recommendations'])
+                    
+                    flight_stats_summary(report.get('flight_stats'))
+                    measurement_summary(report.get('measurements'))
+                    mission_attachments(report['ref'], 'chief_attachment')
+                    report_pack_button(report['ref'], 'chief')
+                
+                # File download buttons
+                col1, col2 = st.columns(2)
+                with col1:
+                    if report['flight_profile']['name']:
+                        blob_download_button(
+                            "Download Flight Profile",
+                            report['flight_profile']['blob'],
+                            file_name=report['flight_profile']['name'],
+                            key=f"chief_dl_profile_{report['ref']}"
+                        )
+                with col2:
+                    if report['report']['name']:
+                        blob_download_button(
+                            "Download Mission Report",
+                            report['report']['blob'],
+                            file_name=report['report']['name'],
+                            key=f"chief_dl_report_{report['ref']}"
+                        )
+
+        # Show previously reviewed reports, most recent first
+        if total_reports > pending_count:
+            st.markdown("### Previously Reviewed Reports")
+            reviewed_reports = paged_records('submitted_reports', 'reviewed_reports_page',
+                                             exclude={'status': 'Submitted'})
+            for report in reviewed_reports:
+                with st.expander(f"Mission {report['ref']} - {report['airport']} ({report['status']})", expanded=False):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.write("**Mission Details**")
+                        st.write(f"Airport: {report['airport']}")
+                        st.write(f"Start Date: {report['date_start']}")
+                        st.write(f"Completion Date: {report['date_finish']}")
+                        st.write(f"Mission Status: {report['mission_status']}")
+                        st.write(f"Review Status: {report['status']}")
+                    
+                    with col2:
+                        st.write("**Team**")
+                        st.write(f"Pilot: {report['pilote']}")
+                        st.write(f"Data Analyst: {report['data_analyst']}")
+                    
+                    st.markdown("---")
+                    st.write("**Findings**")
+                    st.write(report['findings'])
+                    
+                    st.write("**Actions Taken**")
+                    st.write(report['actions'])
+                    
+                    st.write("**Recommendations**")
+                    st.write(report['recommendations'])
+                    
+                    flight_stats_summary(report.get('flight_stats'))
+                    measurement_summary(report.get('measurements'))
+                    mission_attachments(report['ref'], 'reviewed_attachment')
+                    report_pack_button(report['ref'], 'reviewed')
+                    
+                    # File download buttons
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if report['flight_profile']['name']:
+                            blob_download_button(
+                                "Download Flight Profile",
+                                report['flight_profile']['blob'],
+                                file_name=report['flight_profile']['name'],
+                                key=f"reviewed_dl_profile_{report['ref']}"
+                            )
+                    with col2:
+                        if report['report']['name']:
+                            blob_download_button(
+                                "Download Mission Report",
+                                report['report']['blob'],
+                                file_name=report['report']['name'],
+                                key=f"reviewed_dl_report_{report['ref']}"
+                            )
+                    st.caption(f"Submitted: {report['timestamp']}")
+    else:
+        st.info("No completed mission reports available.")
+
+chief_completed_missions_reports()
@@ -0,0 +1,101 @@
+import streamlit as st
+
+import aggregates
+import storage
+from ui import maintenance_due_table, paged_records
+
+# --- Chief of Unit Views ---
+def chief_dashboard():
+    st.subheader('Mission Tracking Dashboard')
+    
+    # Alerts raised by background checks
+    alerts = storage.find('alerts', status='Open')
+    if alerts:
+        with st.container(border=True):
+            st.markdown(f'**⚠️ {len(alerts)} open alert(s)**')
+            for alert in sorted(alerts, key=lambda a: a.get('timestamp') or '', reverse=True)[:10]:
+                col1, col2 = st.columns([6, 1])
+                with col1:
+                    st.write(alert['message'])
+                with col2:
+                    st.button('Dismiss', key=f"dismiss_alert_{alert['id']}", on_click=dismiss_alert, args=(alert['id'],))
+    
+    # Equipment due for maintenance, most urgent first
+    with st.expander('🔧 Maintenance due', expanded=True):
+        maintenance_due_table()
+    
+    # Search filters
+    col1, col2 = st.columns(2)
+    with col1:
+        airport_search = st.text_input("🔍 Filter by Airport")
+    with col2:
+        atsep_search = st.text_input("🔍 Filter by ATSEP")
+    
+    # Search criteria, matched by SQLite; the ATSEP may be any of the crew
+    contains = {}
+    if airport_search:
+        contains['airport'] = airport_search
+    if atsep_search:
+        contains[('groupchief', 'pilote', 'data_analyst')] = atsep_search
+    
+    # Metrics
+    if contains:
+        # Filtered: counted by SQLite with the same search
+        total_missions = storage.count('missions', contains=contains)
+        en_cours = storage.count('missions', contains=contains, status='En cours')
+        done = storage.count('missions', contains=contains, status='Done')
+        attribue = storage.count('missions', contains=contains, assignment='Accepted')
+        pas_attribue = storage.count('missions', contains=contains, assignment='New')
+    else:
+        # Unfiltered: read the maintained counters
+        total_missions = aggregates.count('missions')
+        en_cours = aggregates.count('missions', status='En cours')
+        done = aggregates.count('missions', status='Done')
+        attribue = aggregates.count('missions', assignment='Accepted')
+        pas_attribue = aggregates.count('missions', assignment='New')
+    
+    # Display metrics in cards
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        with st.container(border=True):
+            st.metric('Total Missions', total_missions)
+            st.metric('Accepted', attribue)
+    with col2:
+        with st.container(border=True):
+            st.metric('In Progress', en_cours)
+            st.metric('New', pas_attribue)
+    with col3:
+        with st.container(border=True):
+            st.metric('Completed', done)
+    
+    # Filtering for table view
+    status_filter = st.selectbox('Filter by Status', ['All', 'En cours', 'Done', 'New'])
+    assignment_filter = st.selectbox('Filter by Assignment', ['All', 'Accepted', 'New', 'Rejected'])
+    
+    # Apply additional filters
+    criteria = {}
+    if status_filter != 'All':
+        criteria['status'] = status_filter
+    if assignment_filter != 'All':
+        criteria['assignment'] = assignment_filter
+    table_missions = paged_records('missions', 'dashboard_missions_page', contains=contains, **criteria)
+    
+    # Prepare table data with relevant columns
+    if table_missions:
+        table_data = []
+        for m in table_missions:
+            table_data.append({
+                'Reference': m['ref'],
+                'Airport': m['airport'],
+                'Status': m['status'],
+                'Assignment': m['assignment'],
+                'Start Date': m['date_start'],
+                'End Date': m['date_finish'],
+                'Team': f"Chief: {m['groupchief']}, Pilot: {m['pilote']}, Analyst: {m['data_analyst']}"
+            })
+        st.dataframe(table_data, use_container_width=True)
+
+def dismiss_alert(alert_id):
+    storage.update('alerts', alert_id, {'status': 'Dismissed'})
+
+chief_dashboard()
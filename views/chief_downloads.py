@@ -0,0 +1,56 @@
+import streamlit as st
+
+import documents
+from ui import blob_download_button, paged_records
+
+# --- Document Library ---
+# Documents are listed per category from the store's category index, a page
+# at a time, and widget keys carry the document id, so deleting one leaves
+# the others' buttons alone.
+def document_list(category, search):
+    title = documents.CATEGORIES[category][0]
+    st.markdown(f'#### {title}')
+    docs = paged_records('downloads', f'downloads_{category}_page', **documents.query(category, search))
+    if not docs:
+        st.caption('No matching documents.' if search else 'No documents uploaded yet.')
+    for doc in docs:
+        current = documents.latest(doc)
+        with st.container():
+            col1, col2 = st.columns([6, 1])
+            with col1:
+                st.write(doc['name'])
+                if len(doc['versions']) > 1:
+                    st.caption(f"Version {current['version']} · uploaded {current['uploaded']}")
+                    with st.expander(f"Earlier versions ({len(doc['versions']) - 1})"):
+                        for version in reversed(doc['versions'][:-1]):
+                            blob_download_button(f"Version {version['version']} {version['uploaded']}".strip(), version['blob'],
+                                                 file_name=version['file'], key=f"dl_doc_{doc['id']}_v{version['version']}")
+            with col2:
+                blob_download_button('Download', current['blob'], file_name=current['file'], key=f"dl_doc_{doc['id']}")
+                st.button('Delete', key=f"del_doc_{doc['id']}", on_click=documents.delete, args=(doc['id'],))
+
+def chief_downloads():
+    st.subheader('Downloads & Document Management')
+    st.caption('Upload template documents and access files uploaded by ATSEP personnel for drone-based navaid maintenance operations.')
+    # --- Upload Section ---
+    # A file named like a document already in its category is stored as a
+    # new version of that document
+    st.markdown('### ⬆️ Upload Template Documents')
+    columns = st.columns(2)
+    for i, (category, (title, label, types)) in enumerate(documents.CATEGORIES.items()):
+        with columns[i % 2]:
+            st.markdown(f'**{title}**')
+            uploaded = st.file_uploader(f'Upload {label}', type=types, key=f'{category.lower()}_file')
+            if st.button(f'Upload {label}') and uploaded:
+                doc = documents.add(category, uploaded, st.session_state.get('username', ''))
+                if len(doc['versions']) > 1:
+                    st.success(f"{label} updated to version {len(doc['versions'])}!")
+                else:
+                    st.success(f'{label} uploaded!')
+    # --- Uploaded Section ---
+    st.markdown('### 📂 Uploaded Template Documents')
+    search = st.text_input('Search documents by name', key='downloads_search')
+    for category in documents.CATEGORIES:
+        document_list(category, search.strip())
+
+chief_downloads()
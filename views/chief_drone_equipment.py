@@ -0,0 +1,378 @@
+import sqlite3
+import streamlit as st
+from datetime import date
+
+import blobstore
+import certificates
+import fleet
+import forecast
+import maintenance
+import stock
+import storage
+from ui import blob_download_button, editable_table, paged_records
+
+# --- Drone Equipment Sub-Rubriques ---
+def chief_drone_maintenance():
+    st.markdown('## Maintenance History')
+    st.caption('View all maintenance records submitted by ATSEP personnel')
+    
+    # Filters map to an index range: equipment, then dates
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        equipment = st.selectbox('Equipment', ['All'] + maintenance.equipment(), key='maintenance_equipment')
+    with col2:
+        start = st.date_input('From', value=None, key='maintenance_from')
+    with col3:
+        finish = st.date_input('To', value=None, key='maintenance_to')
+    
+    query = maintenance.query(None if equipment == 'All' else equipment, start, finish)
+    maintenance_records = paged_records('maintenance_log', 'chief_maintenance_page', **query)
+    if not maintenance_records:
+        st.info("No maintenance records available.")
+    else:
+        # Display records with details in expandable sections, newest first
+        for record in maintenance_records:
+            with st.expander(f"{record['equipment']} - {record['type']} ({record['date']})"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.write("**Equipment:**", record['equipment'])
+                    st.write("**Maintenance Type:**", record['type'])
+                    st.write("**Date:**", record['date'])
+                    st.write("**Status:**", record['status'])
+                with col2:
+                    st.write("**Technician:**", record['technician'])
+                    if record['parts']:
+                        st.write("**Parts Changed:**", record['parts'])
+                    if record['next_date']:
+                        st.write("**Next Maintenance:**", record['next_date'])
+                    st.write("**Added On:**", record['timestamp'])
+                st.write("**Description:**", record['description'])
+                if record['findings']:
+                    st.write("**Findings/Issues:**", record['findings'])
+                if record['actions']:
+                    st.write("**Actions Taken:**", record['actions'])
+
+def chief_drone_certificates():
+    st.markdown('**Certificate Management**')
+    if 'show_add_cert' not in st.session_state:
+        st.session_state['show_add_cert'] = False
+    if st.button('Add Certificate', key='show_add_cert_btn'):
+        st.session_state['show_add_cert'] = not st.session_state['show_add_cert']
+    
+    if st.session_state['show_add_cert']:
+        with st.form('add_cert_form', clear_on_submit=True):
+            cert_name = st.text_input('Certificate Name')
+            validation = st.text_input('Validation Duration')
+            acq_date = st.date_input('Date Acquisition')
+            exp_date = st.date_input('Date Fin Expiration')
+            drone_options = ['(none)'] + [d['drone_id'] for d in fleet.drones()]
+            drone = st.selectbox('Drone', drone_options)
+            cert_file = st.file_uploader('Upload Calibration Certificate', type=['pdf', 'png', 'jpg'])
+            submitted = st.form_submit_button('Add Certificate')
+            if submitted and cert_file and cert_name:
+                storage.insert('certs', {'name': cert_name, 'validation': validation, 'acq': str(acq_date), 'exp': str(exp_date), 'file': cert_file.name, 'blob': blobstore.put_upload(cert_file), 'drone_id': None if drone == '(none)' else drone})
+                st.success('Certificate added!')
+
+    # Certificates come sorted by expiry from the certificate index
+    soon, sooner = certificates.ALERT_DAYS[:2]
+    filters = {
+        'All': certificates.by_expiry,
+        f'Expiring within {soon} days': lambda: certificates.expiring(soon),
+        f'Expiring within {sooner} days': lambda: certificates.expiring(sooner),
+        f'Expired in the last {soon} days': lambda: certificates.expiring(-1, expired_since=soon),
+    }
+    show = st.radio('Show', list(filters), horizontal=True, key='cert_filter')
+    certs = filters[show]()
+    if not certs:
+        st.info("No certificates available.")
+        return
+    
+    # Display certificates for download above the table
+    st.write("Download Certificates:")
+    cert_cols = st.columns(len(certs))
+    for col, cert in zip(cert_cols, certs):
+        with col:
+            blob_download_button(f"⬇️ {cert['file']}", 
+                                 cert.get('blob'), 
+                                 file_name=cert['file'],
+                                 key=f"dl_cert_{cert['id']}")
+    
+    # Display the table without download buttons
+    cert_rows = []
+    for cert in certs:
+        cert_rows.append({
+            'Name': cert['name'],
+            'Drone': cert.get('drone_id') or '',
+            'Validation': cert['validation'],
+            'Acquisition': cert['acq'],
+            'Expiration': cert['exp'],
+            'Days Left': certificates.days_left(cert),
+            'Status': certificates.status(cert),
+            'File': cert['file']
+        })
+    st.dataframe(cert_rows, use_container_width=True)
+
+def chief_drone_location():
+    st.markdown('**Drone Location Status**')
+    
+    # Bookings come from the fleet's interval index, not from a mission scan
+    on = st.date_input('Status on', value=date.today(), key='drone_location_date')
+    located = fleet.locate(on)
+    drones = fleet.drones()
+    if not drones:
+        st.info('No drones registered yet.')
+    
+    for d in drones:
+        ref = located.get(d['drone_id'])
+        mission = storage.fetch('missions', ref) if ref else None
+        with st.expander(f"Drone {d['drone_id']} - {'In Mission' if mission else 'Local Home'}"):
+            if mission:
+                st.write(f"Mission: {mission['ref']}")
+                st.write(f"Airport: {mission['airport']}")
+                st.write(f"Duration: {mission['duration']}")
+                st.write(f"Date Start: {mission['date_start']}")
+                st.write(f"Date Finish: {mission['date_finish']}")
+            else:
+                st.write(f"Status: {d.get('home_base') or 'Local Home'}")
+            if d.get('status') != 'Active':
+                st.caption(f"Drone status: {d.get('status')}")
+    
+    # Availability for a window
+    st.markdown('**Availability**')
+    col1, col2 = st.columns(2)
+    with col1:
+        free_from = st.date_input('From', value=date.today(), key='drone_free_from')
+    with col2:
+        free_to = st.date_input('To', value=date.today(), key='drone_free_to')
+    if free_to < free_from:
+        st.error('The window ends before it starts.')
+    else:
+        free = fleet.free_drones(free_from, free_to)
+        if free:
+            st.success(f"Free from {free_from} to {free_to}: {', '.join(free)}")
+        else:
+            st.warning(f"No drone is free from {free_from} to {free_to}.")
+    
+    # Register a drone
+    with st.expander('➕ Add Drone'):
+        with st.form('add_drone_form', clear_on_submit=True):
+            drone_id = st.text_input('Drone ID', placeholder='e.g., D004')
+            model = st.text_input('Model')
+            home_base = st.text_input('Home Base', value='Local Home')
+            if st.form_submit_button('Add Drone'):
+                try:
+                    storage.insert('drones', {
+                        'drone_id': drone_id.strip(),
+                        'model': model,
+                        'home_base': home_base,
+                        'status': 'Active'
+                    })
+                except (sqlite3.IntegrityError, ValueError):
+                    st.error(f"A unique Drone ID is required ({drone_id!r}).")
+                else:
+                    st.success(f"Drone {drone_id} added.")
+                    st.rerun()
+
+def chief_drone_spareparts():
+    st.markdown('## Stock of Spare Parts')
+    
+    # Add new part button
+    col1, col2 = st.columns([6,1])
+    with col2:
+        add_part = st.button("➕ Add Part", type="primary", use_container_width=True)
+    
+    if add_part:
+        with st.form("add_part_form"):
+            st.subheader("Add New Spare Part")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                part_id = st.text_input("Part ID", placeholder="e.g., P003")
+                name = st.text_input("Part Name", placeholder="e.g., Motor")
+                
+            with col2:
+                qty = st.number_input("Quantity", min_value=0, value=1)
+                min_qty = st.number_input("Minimum Stock Level", min_value=0, value=5)
+                
+            desc = st.text_area("Description", placeholder="Part description...")
+            
+            submitted = st.form_submit_button("Add Part")
+            if submitted:
+                new_part = {
+                    'part_id': part_id,
+                    'name': name,
+                    'desc': desc,
+                    'qty': qty,
+                    'min': min_qty
+                }
+                try:
+                    stock.add_part(new_part, user=st.session_state.get('username', 'Unknown'))
+                except (sqlite3.IntegrityError, ValueError):
+                    st.error(f"A unique Part ID is required ({part_id!r}).")
+                else:
+                    st.success("Part added successfully!")
+                    st.rerun()
+    
+    spare_parts_stock()
+
+@st.fragment
+def spare_parts_stock():
+    # Display and edit spare parts
+    parts = storage.fetch_all('spare_parts')
+    user = st.session_state.get('username', 'Unknown')
+    
+    # Show warning for items at their reorder point (forecast demand over
+    # the lead time plus safety stock, at least the minimum stock level)
+    reorder = forecast.reorder_list()
+    if reorder:
+        st.warning("⚠️ The following items should be reordered:")
+        for f in reorder[:20]:
+            runs_out = f" (runs out around {f['depletion']})" if f['depletion'] else ""
+            st.write(f"- {f['name']}: {f['qty']} remaining, reorder point {f['reorder_point']}, "
+                     f"order {f['reorder_qty']}{runs_out}")
+        if len(reorder) > 20:
+            st.caption(f"... and {len(reorder) - 20} more in the forecast below.")
+    
+    # Edit functionality; quantities only move through the stock ledger
+    st.markdown("### Current Stock")
+    
+    saved = editable_table(
+        'spare_parts',
+        parts,
+        key="spare_parts_editor",
+        insert=lambda part: stock.add_part(dict(part, qty=0), user=user),
+        readonly=("qty",),
+        use_container_width=True,
+        num_rows="dynamic",
+        column_config={
+            "part_id": st.column_config.TextColumn("Part ID", help="Unique identifier for the part"),
+            "name": st.column_config.TextColumn("Name", help="Name of the part"),
+            "desc": st.column_config.TextColumn("Description", help="Part description"),
+            "qty": st.column_config.NumberColumn("Quantity", help="Current quantity in stock (use the forms below to change it)"),
+            "min": st.column_config.NumberColumn("Min Stock", help="Minimum stock level", min_value=0)
+        }
+    )
+    
+    if saved:
+        st.success("Stock updated successfully!")
+    
+    labels = {p['part_id']: f"{p['name']} ({p['qty']} in stock)" for p in parts}
+    
+    # Use part functionality (for both Chief and ATSEP)
+    st.markdown("### Use Parts")
+    op_id = form_op_id('use_parts')
+    with st.form(f"use_parts_form_{op_id}"):
+        col1, col2 = st.columns(2)
+        with col1:
+            part_id = st.selectbox("Select Part", options=list(labels), format_func=labels.get)
+        with col2:
+            use_qty = st.number_input("Quantity to Use", min_value=1, value=1)
+            
+        note = st.text_input("Usage Note", placeholder="Optional: Add a note about the usage")
+        submitted = st.form_submit_button("Record Usage")
+        
+        if submitted and part_id:
+            try:
+                # The operation id the form was rendered with, so a resubmitted form is recorded once
+                entry = stock.use(part_id, use_qty, user=user, note=note, op_id=op_id)
+            except stock.InsufficientStock as e:
+                st.error(f"Insufficient stock! {e}.")
+            except KeyError:
+                st.error("This part no longer exists.")
+            else:
+                form_done('use_parts')
+                st.success(f"Used {use_qty} {entry['name']}(s). New stock level: {entry['balance']}")
+                st.rerun(scope='fragment')
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        op_id = form_op_id('receive_parts')
+        with st.form(f"receive_parts_form_{op_id}"):
+            st.markdown("**Receive Parts**")
+            part_id = st.selectbox("Part", options=list(labels), format_func=labels.get, key=f"receive_part_{op_id}")
+            qty = st.number_input("Quantity Received", min_value=1, value=1)
+            note = st.text_input("Reference", placeholder="Delivery note, order number...")
+            if st.form_submit_button("Record Receipt") and part_id:
+                try:
+                    stock.receive(part_id, qty, user=user, note=note, op_id=op_id)
+                except KeyError:
+                    st.error("This part no longer exists.")
+                else:
+                    form_done('receive_parts')
+                    st.rerun(scope='fragment')
+    with col2:
+        op_id = form_op_id('count_parts')
+        with st.form(f"count_parts_form_{op_id}"):
+            st.markdown("**Stock Count**")
+            part_id = st.selectbox("Part", options=list(labels), format_func=labels.get, key=f"count_part_{op_id}")
+            counted = st.number_input("Quantity Counted", min_value=0, value=0)
+            note = st.text_input("Count Note", placeholder="Optional")
+            if st.form_submit_button("Record Count") and part_id:
+                expected = next(p['qty'] for p in parts if p['part_id'] == part_id)
+                try:
+                    stock.count(part_id, counted, expected=expected, user=user, note=note, op_id=op_id)
+                except stock.StockChanged as e:
+                    st.error(f"{e}; check the count again.")
+                except KeyError:
+                    st.error("This part no longer exists.")
+                else:
+                    form_done('count_parts')
+                    st.rerun(scope='fragment')
+    
+    with st.expander("Consumption Forecast"):
+        st.caption(f"Reorder points cover {forecast.LEAD_TIME_DAYS} days of lead time; "
+                   f"orders cover {forecast.COVER_DAYS} more days.")
+        st.dataframe(
+            sorted(forecast.forecast(), key=lambda f: (f['depletion'] or '9999-12-31', f['part_id'])),
+            use_container_width=True,
+            column_order=['part_id', 'name', 'qty', 'weekly_rate', 'season', 'safety_stock',
+                          'reorder_point', 'reorder_qty', 'depletion'],
+            column_config={
+                'part_id': 'Part ID',
+                'name': 'Name',
+                'qty': 'Quantity',
+                'weekly_rate': st.column_config.NumberColumn('Use / week', format='%.2f'),
+                'season': st.column_config.NumberColumn('Season', format='%.2f'),
+                'safety_stock': 'Safety Stock',
+                'reorder_point': 'Reorder Point',
+                'reorder_qty': 'Order Qty',
+                'depletion': 'Runs Out'
+            }
+        )
+    
+    st.markdown("### Stock Movements")
+    entries, _ = stock.history(limit=20)
+    if entries:
+        st.dataframe(
+            entries,
+            use_container_width=True,
+            column_order=['date', 'part_id', 'name', 'kind', 'qty', 'balance', 'user', 'note'],
+            column_config={'qty': 'Change', 'balance': 'Balance'}
+        )
+    else:
+        st.info("No stock movements yet.")
+
+def form_op_id(form):
+    # The operation id is rendered into the form's key, so every submission
+    # of one rendering of the form carries the same id, however often it is
+    # sent. Once the operation goes through the form is rendered afresh under
+    # a new id, and a late resubmission of the old one no longer matches a
+    # form on the page.
+    return st.session_state.setdefault(f'{form}_op_id', stock.new_op_id())
+
+def form_done(form):
+    st.session_state[f'{form}_op_id'] = stock.new_op_id()
+
+def chief_drone_equipment():
+    st.subheader('Drone Equipment')
+    sub = st.radio('Section', ['Maintenance History', 'Certificate Management', 'Drone Location', 'Spare Parts Management'])
+    if sub == 'Maintenance History':
+        chief_drone_maintenance()
+    elif sub == 'Certificate Management':
+        chief_drone_certificates()
+    elif sub == 'Drone Location':
+        chief_drone_location()
+    elif sub == 'Spare Parts Management':
+        chief_drone_spareparts()
+
+chief_drone_equipment()
@@ -0,0 +1,207 @@
+import sqlite3
+import time
+import streamlit as st
+from datetime import datetime, timedelta
+
+import assignments
+import crew
+import fleet
+import schedule
+import storage
+from ui import editable_table, paged_records
+
+# --- Mission Management ---
+def chief_mission_management():
+    st.subheader('Mission Management')
+    if 'show_create_mission' not in st.session_state:
+        st.session_state['show_create_mission'] = False
+    
+    if st.button('Create Mission', key='show_create_mission_btn'):
+        st.session_state['show_create_mission'] = not st.session_state['show_create_mission']
+    
+    prefill = st.session_state.get('prefill_mission', {})
+    if st.session_state['show_create_mission']:
+        # Suggest the least busy free crew for the planned dates
+        col1, col2, col3 = st.columns([2, 2, 1])
+        plan_start = col1.date_input('Planned start', key='crew_plan_start')
+        plan_finish = col2.date_input('Planned finish', key='crew_plan_finish')
+        if col3.button('Suggest crew', key='suggest_crew_btn'):
+            suggestion = crew.recommend_one(plan_start, max(plan_start, plan_finish))
+            missing = [role for field, role in schedule.CREW_FIELDS.items() if field not in suggestion]
+            if missing:
+                st.warning(f"Nobody free for: {', '.join(missing)}")
+            prefill = dict(prefill, date_start=plan_start, date_finish=max(plan_start, plan_finish), **suggestion)
+            st.session_state['prefill_mission'] = prefill
+        today = datetime.now().date()
+        with st.form('create_mission_form', clear_on_submit=True):
+            airport = st.text_input('Name of Airport', value=prefill.get('airport', ''))
+            ref = st.text_input('Reference of the Mission', value=prefill.get('ref', ''))
+            date_start = st.date_input('Date Start', value=prefill.get('date_start', today))
+            date_finish = st.date_input('Date Finish', value=prefill.get('date_finish', today))
+            duration = st.text_input('Duration (auto-calc or manual)')
+            problem = st.text_area('Problem to Fix', value=prefill.get('problem', ''))
+            st.markdown('**Personnel Assignment**')
+            groupchief = st.text_input('Group Chief', value=prefill.get('groupchief', ''))
+            pilote = st.text_input('Pilote', value=prefill.get('pilote', ''))
+            data_analyst = st.text_input('Data Analyst', value=prefill.get('data_analyst', ''))
+            drone_options = ['(none)'] + [d['drone_id'] for d in fleet.drones(status='Active')]
+            drone = st.selectbox('Drone', drone_options)
+            allow_conflicts = st.checkbox('Create even if someone is double-booked')
+            submitted = st.form_submit_button('Create Mission')
+            if submitted:
+                # Create new mission
+                new_mission = {
+                    'ref': ref,
+                    'airport': airport,
+                    'date_start': date_start.strftime('%Y-%m-%d'),
+                    'date_finish': date_finish.strftime('%Y-%m-%d'),
+                    'duration': duration,
+                    'problem': problem,
+                    'status': 'New',
+                    'assignment': 'New',
+                    'groupchief': groupchief,
+                    'pilote': pilote,
+                    'data_analyst': data_analyst,
+                    'drone_id': None if drone == '(none)' else drone
+                }
+                # Crew and drone must be free over the mission's dates
+                conflicts = schedule.conflicts(new_mission)
+                if conflicts and not allow_conflicts:
+                    st.error('Double booking, mission not created:')
+                    show_conflicts(conflicts)
+                else:
+                    try:
+                        assignments.create(new_mission)
+                    except (sqlite3.IntegrityError, ValueError):
+                        st.error(f'A mission reference is required and must be unique ({ref!r}).')
+                    else:
+                        st.success(f'Mission {ref} created!')
+                        st.info(f"Assigned: Group Chief: {groupchief}, Pilote: {pilote}, Data Analyst: {data_analyst}")
+                        if 'prefill_mission' in st.session_state:
+                            del st.session_state['prefill_mission']
+                        st.session_state['show_create_mission'] = False
+                        st.rerun()
+    
+    # Display missions table. Only the filtered page is read and sent to the
+    # editor, so a rerun costs one page whatever the number of missions
+    st.markdown("### Current Missions")
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        status_filter = st.selectbox('Status', ['All', 'New', 'En cours', 'Done'], key='missions_status_filter')
+    with col2:
+        airport_filter = st.text_input('Airport', key='missions_airport_filter', placeholder='Filter by airport...')
+    query = {}
+    if status_filter != 'All':
+        query['status'] = status_filter
+    if airport_filter.strip():
+        query['contains'] = {'airport': airport_filter.strip()}
+    missions = paged_records('missions', 'missions_editor_page', **query)
+    saved = editable_table(
+        'missions',
+        missions,
+        key='missions_editor',
+        dependents=[('atsep_notifications', 'mission_ref')],
+        use_container_width=True,
+        num_rows="dynamic",
+        column_config={
+            "status": st.column_config.SelectboxColumn(
+                "Status",
+                options=["New", "En cours", "Done"],
+                required=True
+            ),
+            "assignment": st.column_config.SelectboxColumn(
+                "Assignment",
+                options=["New", "Accepted", "Rejected"],
+                required=True
+            )
+        }
+    )
+    
+    # Flag double bookings introduced by table edits
+    if saved:
+        st.success(f'{len(saved)} mission(s) saved.')
+        conflicts = schedule.check_batch(saved)
+        if conflicts:
+            st.warning('These edits double-book crew or drones:')
+            show_conflicts(conflicts)
+    
+    recommend_pending_crew()
+    
+    # Re-check the whole calendar
+    if st.button('Re-validate calendar', key='validate_calendar_btn'):
+        conflicts = schedule.validate_all()
+        if conflicts:
+            st.warning(f'{len(conflicts)} double booking(s) in the calendar:')
+            show_conflicts(conflicts)
+        else:
+            st.success('No double bookings.')
+
+def recommend_pending_crew():
+    # Crew the week's New missions that still lack someone, all at once
+    st.markdown("### Crew for Pending Missions")
+    if 'crew_applied' in st.session_state:
+        st.success(f"Crew assigned to {st.session_state.pop('crew_applied')} mission(s).")
+    col1, col2 = st.columns([2, 1])
+    week_start = col1.date_input('Week starting', key='crew_week_start')
+    if col2.button('Recommend crew', key='recommend_crew_btn'):
+        start = week_start.strftime('%Y-%m-%d')
+        finish = (week_start + timedelta(days=6)).strftime('%Y-%m-%d')
+        started = time.perf_counter()
+        pending = crew.pending_missions(start, finish)
+        suggestions = crew.recommend(pending)
+        st.session_state['crew_proposals'] = [
+            dict({field: mission.get(field) or '' for field in schedule.CREW_FIELDS},
+                 ref=mission['ref'], date_start=mission['date_start'], date_finish=mission.get('date_finish'),
+                 **suggestion)
+            for mission, suggestion in zip(pending, suggestions)
+        ]
+        st.session_state['crew_proposals_ms'] = (time.perf_counter() - started) * 1000
+    
+    proposals = st.session_state.get('crew_proposals')
+    if proposals is None:
+        return
+    if not proposals:
+        st.info('No pending missions without a full crew that week.')
+        return
+    st.caption(f"{len(proposals)} mission(s) crewed in {st.session_state['crew_proposals_ms']:.0f} ms")
+    st.dataframe(
+        proposals,
+        use_container_width=True,
+        column_order=['ref', 'date_start', 'date_finish', *schedule.CREW_FIELDS],
+        column_config={
+            'ref': 'Mission',
+            'date_start': 'Start',
+            'date_finish': 'Finish',
+            **schedule.CREW_FIELDS
+        }
+    )
+    if st.button('Apply recommended crew', key='apply_crew_btn'):
+        applied = 0
+        for proposal in proposals:
+            mission = storage.fetch('missions', proposal['ref'])
+            if mission is None:
+                continue
+            # Only fill roles still empty, in case someone was assigned meanwhile
+            changes = {field: proposal[field] for field in schedule.CREW_FIELDS
+                       if proposal[field] and not str(mission.get(field) or '').strip()}
+            if changes:
+                storage.update('missions', proposal['ref'], changes)
+                applied += 1
+        del st.session_state['crew_proposals']
+        st.session_state['crew_applied'] = applied
+        st.rerun()
+
+def show_conflicts(conflicts):
+    st.dataframe(
+        conflicts,
+        use_container_width=True,
+        column_config={
+            'resource': 'Booked',
+            'mission': 'Mission',
+            'conflicts_with': 'Conflicts with',
+            'from': 'From',
+            'to': 'To'
+        }
+    )
+
+chief_mission_management()
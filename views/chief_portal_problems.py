@@ -0,0 +1,84 @@
+import streamlit as st
+from datetime import datetime
+
+import aggregates
+import storage
+from ui import paged_records
+
+# --- Portal Problems ---
+def update_problem_status(problem_id, key):
+    # Runs before the fragment rerenders, so the counters below are current
+    storage.update('problem_reports', problem_id, {
+        'status': st.session_state[key],
+        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
+    st.session_state['problem_status_updated'] = problem_id
+
+@st.fragment
+def chief_portal_problems():
+    st.subheader('Portal Problems')
+    
+    # Show notification for new problems
+    new_problems = aggregates.count('problem_reports', status='New')
+    if new_problems:
+        st.warning(f"⚠️ You have {new_problems} new problem report(s) that need attention!")
+    
+    # Filter controls
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        status_filter = st.selectbox('Filter by Status', ['All', 'New', 'In Progress', 'Resolved'])
+    with col2:
+        airport_filter = st.text_input('Filter by Airport')
+    with col3:
+        sort_by = st.selectbox('Sort by', ['Priority', 'Date Reported'])
+    
+    # Filter and sort problems in the data layer
+    query = {'order_by': 'sort_key' if sort_by == 'Priority' else 'date'}
+    if status_filter != 'All':
+        query['status'] = status_filter
+    if airport_filter:
+        query['contains'] = {'airport': airport_filter}
+    
+    # Display problems in a table format with detailed view
+    st.markdown("### Problem Reports")
+    filtered_problems = paged_records('problem_reports', 'portal_problems_page', **query)
+    if filtered_problems:
+        for problem in filtered_problems:
+            with st.expander(
+                f"🔴 {problem['airport']} - {problem['system']} (Priority: {problem['priority']}, Status: {problem['status']})",
+                expanded=problem['status'] == 'New'
+            ):
+                col1, col2 = st.columns([2,1])
+                with col1:
+                    st.markdown("#### Problem Details")
+                    st.write(f"**Problem Description:** {problem['description']}")
+                    st.write(f"**Operational Impact:** {problem['impact']}")
+                    if problem['additional_info']:
+                        st.write(f"**Additional Information:** {problem['additional_info']}")
+                with col2:
+                    st.markdown("#### Report Information")
+                    st.write(f"**Report ID:** {problem['id']}")
+                    st.write(f"**Reporter:** {problem['reporter']}")
+                    st.write(f"**Contact:** {problem['contact']}")
+                    st.write(f"**Date Reported:** {problem['date']}")
+                    st.write(f"**Priority Level:** {problem['priority']}")
+                    
+                # Status update section
+                st.markdown("#### Update Status")
+                st.selectbox(
+                    "Update Status",
+                    ['New', 'In Progress', 'Resolved'],
+                    index=['New', 'In Progress', 'Resolved'].index(problem['status']),
+                    key=f"status_{problem['id']}",
+                    on_change=update_problem_status,
+                    args=(problem['id'], f"status_{problem['id']}")
+                )
+                if st.session_state.get('problem_status_updated') == problem['id']:
+                    del st.session_state['problem_status_updated']
+                    st.success(f"Status updated to {problem['status']}")
+                
+                st.caption(f"Last updated: {problem.get('last_updated', problem['timestamp'])}")
+    else:
+        st.info("No problem reports match your filter criteria.")
+
+chief_portal_problems()
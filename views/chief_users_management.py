@@ -0,0 +1,107 @@
+import sqlite3
+import streamlit as st
+
+import storage
+
+# --- Users Management ---
+def chief_users_management():
+    st.subheader('Users Management')
+    
+    # Add/Edit User Form at the top
+    if st.session_state.get('show_add_user_form', False):
+        with st.form("user_form"):
+            edit_key = st.session_state.get('edit_user')
+            edit_user = storage.fetch('users_list', edit_key) if edit_key is not None else None
+            
+            st.write(f"### {'Edit' if edit_user else 'Add'} User")
+            col1, col2 = st.columns(2)
+            with col1:
+                name = st.text_input("Full Name", value=edit_user['name'] if edit_user else '')
+                email = st.text_input("Email", value=edit_user['email'] if edit_user else '')
+                username = st.text_input("Username", value=edit_user.get('username', '') if edit_user else '')
+            with col2:
+                role = st.selectbox(
+                    "Role", 
+                    ["Group Chief", "Pilot", "Data Analyst"],
+                    index=["Group Chief", "Pilot", "Data Analyst"].index(edit_user['role']) if edit_user else 0
+                )
+                status = st.selectbox(
+                    "Status",
+                    ["Active", "Inactive"],
+                    index=["Active", "Inactive"].index(edit_user['status']) if edit_user else 0
+                )
+                password = st.text_input("Password", type="password", value=edit_user.get('password', '') if edit_user else '')
+            
+            col1, col2 = st.columns([1, 1])
+            with col1:
+                submitted = st.form_submit_button("Save User")
+            with col2:
+                if st.form_submit_button("Cancel"):
+                    st.session_state['show_add_user_form'] = False
+                    st.session_state['edit_user'] = None
+                    st.rerun()
+            
+            if submitted:
+                new_user = {
+                    'name': name,
+                    'email': email,
+                    'role': role,
+                    'status': status,
+                    'username': username,
+                    'password': password
+                }
+                
+                try:
+                    if edit_user is not None:
+                        storage.update('users_list', edit_key, new_user)
+                        st.success(f"User {name} updated successfully!")
+                    else:
+                        storage.insert('users_list', new_user)
+                        st.success(f"User {name} added successfully!")
+                except (sqlite3.IntegrityError, ValueError):
+                    st.error(f"A unique username is required ({username!r}).")
+                else:
+                    st.session_state['show_add_user_form'] = False
+                    st.session_state['edit_user'] = None
+                    st.rerun()
+    
+    # Search and Add User button
+    search_container = st.container()
+    col1, col2 = search_container.columns([3, 1])
+    
+    with col1:
+        search = st.text_input("🔍 Search users...", key="user_search")
+    
+    with col2:
+        if st.button("➕ Add User", key="add_user_btn"):
+            st.session_state['show_add_user_form'] = True
+            st.session_state['edit_user'] = None
+            st.rerun()
+    
+    # Filter users based on search
+    users = storage.fetch_all('users_list')
+    if search:
+        users = [u for u in users if search.lower() in u['name'].lower() or 
+                search.lower() in u['email'].lower() or 
+                search.lower() in u.get('username', '').lower()]
+    
+    # Display users in expandable containers
+    for idx, user in enumerate(users):
+        with st.expander(f"{user['name']} - {user['role']}", expanded=False):
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write(f"**Email:** {user['email']}")
+                st.write(f"**Username:** {user.get('username', 'N/A')}")
+                st.write(f"**Role:** {user['role']}")
+                st.write(f"**Status:** {user['status']}")
+            with col2:
+                if st.button("✏️ Edit", key=f"edit_{idx}"):
+                    st.session_state['show_add_user_form'] = True
+                    st.session_state['edit_user'] = user['username']
+                    st.rerun()
+                if st.button("❌ Delete", key=f"delete_{idx}"):
+                    storage.delete('users_list', user['username'])
+                    st.success(f"User {user['name']} deleted successfully!")
+                    st.rerun()
+
+chief_users_management()
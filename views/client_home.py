@@ -0,0 +1,26 @@
+import streamlit as st
+
+from ui import paged_records
+
+# --- Client Home ---
+def client_home():
+    st.header('Client Home')
+    st.subheader('Your Reported Problems')
+    
+    # Filter problems for current user
+    user_problems = paged_records('problem_reports', 'client_home_page',
+                                  reporter=st.session_state.get('username'))
+    
+    if not user_problems:
+        st.info('You have not reported any problems yet.')
+    else:
+        for problem in user_problems:
+            with st.expander(f"{problem['airport']} - {problem['system']} ({problem['date']})"):
+                st.write(f"**Priority:** {problem['priority']}")
+                st.write(f"**Problem Description:** {problem['description']}")
+                st.write(f"**Status:** {problem['status']}")
+                st.write(f"**Date Reported:** {problem['date']}")
+                if problem['additional_info']:
+                    st.write(f"**Additional Info:** {problem['additional_info']}")
+
+client_home()
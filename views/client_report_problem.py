@@ -0,0 +1,84 @@
+import streamlit as st
+from datetime import datetime
+
+import aggregates
+import storage
+from ui import paged_records
+
+# --- Client Problem Reports ---
+def client_problem_reports():
+    st.header('Problem Reports')
+    
+    # Add new problem report form
+    with st.form("problem_report_form"):
+        st.subheader('Submit New Problem Report')
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            airport = st.text_input("Airport")
+            system = st.text_input("System/Equipment Affected")
+            priority = st.selectbox(
+                "Priority Level",
+                ["High", "Medium", "Low"]
+            )
+            
+        with col2:
+            reporter = st.text_input("Reporter Name")
+            contact = st.text_input("Contact Information")
+            report_date = st.date_input("Report Date")
+        
+        problem_description = st.text_area("Problem Description")
+        impact = st.text_area("Operational Impact")
+        additional_info = st.text_area("Additional Information", help="Any other relevant details")
+        
+        submitted = st.form_submit_button("Submit Report")
+        if submitted:
+            report = {
+                'airport': airport,
+                'system': system,
+                'priority': priority,
+                'reporter': reporter,
+                'contact': contact,
+                'date': report_date.strftime('%Y-%m-%d'),
+                'description': problem_description,
+                'impact': impact,
+                'additional_info': additional_info,
+                'status': 'New',
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            storage.insert('problem_reports', report)
+            st.success("Problem report submitted successfully!")
+            st.rerun()
+    
+    # Display existing problem reports, high priority and most recent first
+    if aggregates.count('problem_reports'):
+        st.markdown("## Submitted Problems")
+        for report in paged_records('problem_reports', 'client_problems_page'):
+            with st.expander(
+                f"{report['airport']} - {report['system']} ({report['priority']} Priority)",
+                expanded=False
+            ):
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.write("**Airport:**", report['airport'])
+                    st.write("**System:**", report['system'])
+                    st.write("**Priority:**", report['priority'])
+                    st.write("**Status:**", report['status'])
+                
+                with col2:
+                    st.write("**Reporter:**", report['reporter'])
+                    st.write("**Contact:**", report['contact'])
+                    st.write("**Date:**", report['date'])
+                    st.write("**Report ID:**", report['id'])
+                
+                st.markdown("---")
+                st.write("**Problem Description:**", report['description'])
+                st.write("**Operational Impact:**", report['impact'])
+                if report['additional_info']:
+                    st.write("**Additional Information:**", report['additional_info'])
+                st.caption(f"Report submitted: {report['timestamp']}")
+    else:
+        st.info("No problem reports available.")
+
+st.header('Report a Problem')
+client_problem_reports()